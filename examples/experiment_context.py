@@ -4,15 +4,7 @@ import time
 import matplotlib.pyplot as plt
 import numpy
 
-from amnesis import ExperimentContext, ModelSerializer, remember
-
-
-class NumpySerializer(ModelSerializer):
-    def save(self, model, path):
-        numpy.save(path, model)
-
-    def load(self, path):
-        return numpy.load(path)
+from amnesis import ExperimentContext, remember
 
 
 def my_cool_experiment(experiment):
@@ -48,7 +40,7 @@ def my_cool_experiment(experiment):
 
     experiment.log_artifact(folder_path)
 
-    experiment.log_model(model, serializer=NumpySerializer())
+    experiment.log_model(model, serializer="numpy")
 
 
 def with_ctx():
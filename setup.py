@@ -30,6 +30,8 @@ setuptools.setup(
     ],
     extras_require={
         "dev": read_requirements(pathlib.Path("requirements/dev_requirements.txt")),
+        "export": read_requirements(pathlib.Path("requirements/export_requirements.txt")),
+        "msgpack": read_requirements(pathlib.Path("requirements/msgpack_requirements.txt")),
     },
     classifiers=[
         "Programming Language :: Python :: 3",
@@ -2,10 +2,17 @@ from .experiment import Experiment
 from .experiment_context import ExperimentContext
 from .model import ModelSerializer
 from .remember import remember
+from .serializers import ArrayDictSerializer, NumpySerializer, PickleSerializer
+from .sweep import GridSampler, RandomSampler
 
 __all__ = [
+    "ArrayDictSerializer",
     "Experiment",
     "ExperimentContext",
+    "GridSampler",
     "ModelSerializer",
+    "NumpySerializer",
+    "PickleSerializer",
+    "RandomSampler",
     "remember",
 ]
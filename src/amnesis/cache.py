@@ -0,0 +1,121 @@
+"""
+Fingerprints of the inputs of an experiment and storage of its result, used to
+skip experiments whose inputs were already recorded.
+"""
+
+import functools
+import hashlib
+import json
+import pathlib
+import pickle
+import types
+
+from .utils import atomic_write
+
+RESULT_NAME = "result.pkl"
+
+
+def code_fingerprint(func):
+    """
+    Hash of the code of a function, including the code of its nested functions.
+
+    Partial functions are hashed with their bound arguments, callable objects with
+    the code of their `__call__` method.
+
+    :return: the hash, or None if the function has no code object, e.g. a builtin, or
+        if the bound arguments of a partial function cannot be fingerprinted
+    """
+    digest = hashlib.sha256()
+
+    while isinstance(func, functools.partial):
+        try:
+            digest.update(fingerprint(args=func.args, kwargs=func.keywords).encode())
+        except TypeError:
+            return None
+        func = func.func
+
+    func = getattr(func, "__func__", func)
+    code = getattr(func, "__code__", None)
+    if code is None:
+        # Callable object
+        func = getattr(type(func), "__call__", None)
+        code = getattr(func, "__code__", None)
+        if code is None:
+            return None
+
+    digest.update(func.__qualname__.encode())
+    digest.update(_code_key(code).encode())
+
+    return digest.hexdigest()
+
+
+def _code_key(code: types.CodeType):
+    digest = hashlib.sha256()
+    digest.update(code.co_code)
+    digest.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        digest.update(_const_key(const).encode())
+
+    return digest.hexdigest()
+
+
+def _const_key(const):
+    # Same key in every process: sets are iterated in the order of the hashes of
+    # their elements, which depends on the hash seed of the process
+    if isinstance(const, types.CodeType):
+        return _code_key(const)
+    if isinstance(const, tuple):
+        return f"({', '.join(_const_key(item) for item in const)})"
+    if isinstance(const, (set, frozenset)):
+        items = sorted(_const_key(item) for item in const)
+        return f"{type(const).__name__}({{{', '.join(items)}}})"
+
+    return repr(const)
+
+
+def fingerprint(**inputs):
+    """
+    Hash of the inputs of an experiment. Arrays and bytes are hashed by their
+    content, with the type, shape and dtype of arrays.
+
+    :raise TypeError: if an input is neither JSON serializable, an array nor bytes
+    """
+    payload = json.dumps(inputs, sort_keys=True, default=_encode)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _encode(value):
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {"bytes": hashlib.sha256(value).hexdigest()}
+
+    # Arrays and scalars of numpy and of libraries following its interface
+    if all(hasattr(value, attribute) for attribute in ("tobytes", "dtype", "shape")):
+        return {
+            "type": f"{type(value).__module__}.{type(value).__qualname__}",
+            "dtype": str(value.dtype),
+            "shape": list(value.shape),
+            "bytes": hashlib.sha256(value.tobytes()).hexdigest(),
+        }
+
+    # The repr of other objects is not a reliable key: truncated or containing an id
+    raise TypeError(f"Cannot fingerprint an object of type {type(value).__name__}")
+
+
+def save_result(experiment_dir: pathlib.Path, result):
+    """
+    Pickle the result of an experiment.
+
+    :return: True if the result was saved, False if it cannot be pickled
+    """
+    try:
+        with atomic_write(experiment_dir / RESULT_NAME, "wb") as file:
+            pickle.dump(result, file, protocol=pickle.HIGHEST_PROTOCOL)
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return False
+
+    return True
+
+
+def load_result(experiment_dir: pathlib.Path):
+    with (experiment_dir / RESULT_NAME).open("rb") as file:
+        return pickle.load(file)
@@ -0,0 +1,280 @@
+"""
+SQLite catalog of the experiments stored in a repository.
+
+The catalog mirrors the metadata files of every experiment so that listing
+experiments does not have to walk and parse the whole repository. The `fields` column
+holds the metadata as strict JSON for the SQLite JSON functions: NaN becomes null and
+infinities the largest float.
+"""
+
+import contextlib
+import json
+import math
+import os
+import pathlib
+import sqlite3
+import sys
+from typing import Iterable, Iterator, List, Optional
+
+from .experiment import Experiment
+from .query import Query
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS models (
+    name TEXT PRIMARY KEY
+);
+
+CREATE TABLE IF NOT EXISTS experiments (
+    uuid TEXT PRIMARY KEY,
+    model_name TEXT NOT NULL,
+    name TEXT,
+    date TEXT,
+    metadata TEXT NOT NULL,
+    fields TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS experiments_model_name ON experiments (model_name, name);
+
+PRAGMA user_version = 1;
+"""
+
+# Incremented when the schema changes, see `Catalog._migrate`
+SCHEMA_VERSION = 1
+
+
+class Catalog:
+    """
+    Persistent index of the models and experiments of a repository
+    """
+
+    def __init__(self, path: pathlib.Path, timeout: float = 30.0):
+        """
+        :param path: path of the SQLite database
+        :param timeout: seconds to wait for a lock held by another process
+        """
+        self.path = path
+        self.timeout = timeout
+
+    def exists(self):
+        return self.path.exists()
+
+    def create(self):
+        with self._connect() as connection:
+            connection.executescript(SCHEMA)
+
+    def add_model(self, model_name: str):
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR IGNORE INTO models (name) VALUES (?)", (model_name,)
+            )
+
+    def upsert(self, experiment: Experiment):
+        with self._connect() as connection:
+            self._upsert(connection, experiment)
+
+    def delete(self, uuids: Iterable[str]):
+        with self._connect() as connection:
+            connection.executemany(
+                "DELETE FROM experiments WHERE uuid = ?", [(uuid,) for uuid in uuids]
+            )
+
+    def get_models(self) -> List[str]:
+        with self._connect() as connection:
+            rows = connection.execute("SELECT name FROM models ORDER BY name")
+            return [row[0] for row in rows]
+
+    def get_experiments(self, model_name: str) -> Optional[List[Experiment]]:
+        with self._connect() as connection:
+            model = connection.execute(
+                "SELECT 1 FROM models WHERE name = ?", (model_name,)
+            ).fetchone()
+
+            if model is None:
+                return None
+
+            rows = connection.execute(
+                "SELECT metadata FROM experiments WHERE model_name = ?", (model_name,)
+            )
+            return [Experiment.from_dict(json.loads(row[0])) for row in rows]
+
+    def iter_experiments(self, model_name: str, query: Query = None) -> Iterator[Experiment]:
+        """
+        :param model_name: name of the model
+        :param query: filter evaluated by SQLite, only the matching experiments are loaded
+        """
+        sql = "SELECT metadata FROM experiments WHERE model_name = ?"
+        parameters = [model_name]
+
+        if query is not None:
+            condition, condition_parameters = query.to_sql("fields")
+            sql += f" AND {condition}"
+            parameters += condition_parameters
+
+        with self._connect() as connection:
+            for row in connection.execute(sql, parameters):
+                yield Experiment.from_dict(json.loads(row[0]))
+
+    def top_k(
+        self,
+        model_names: List[str],
+        metric: str,
+        k: int,
+        maximize: bool = False,
+        query: Query = None,
+    ) -> List[Experiment]:
+        """
+        Experiments with the best numeric value of a metric, best first. SQLite only keeps
+        the k best rows while scanning.
+        """
+        if not model_names or k <= 0:
+            return []
+
+        if '"' in metric:
+            raise ValueError(f"Unsupported metric name {metric!r}")
+
+        path = f'$.metrics."{metric}"'
+        placeholders = ", ".join("?" for _ in model_names)
+        sql = (
+            f"SELECT metadata FROM experiments WHERE model_name IN ({placeholders}) "
+            "AND typeof(json_extract(fields, ?)) IN ('integer', 'real')"
+        )
+        parameters = [*model_names, path]
+
+        if query is not None:
+            condition, condition_parameters = query.to_sql("fields")
+            sql += f" AND {condition}"
+            parameters += condition_parameters
+
+        sql += f" ORDER BY json_extract(fields, ?) {'DESC' if maximize else 'ASC'}, date LIMIT ?"
+        parameters += [path, k]
+
+        with self._connect() as connection:
+            rows = connection.execute(sql, parameters)
+            return [Experiment.from_dict(json.loads(row[0])) for row in rows]
+
+    def find_by_fingerprint(self, model_name: str, fingerprint: str) -> List[Experiment]:
+        """
+        Finished experiments recorded with a cache fingerprint that are not cache hits
+        themselves, most recent first.
+        """
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT metadata FROM experiments "
+                "WHERE model_name = ? "
+                "AND json_extract(fields, '$.cache.fingerprint') = ? "
+                "AND json_extract(fields, '$.cache.hit') IS NULL "
+                "AND json_extract(fields, '$.status') = 'finished' "
+                "ORDER BY date DESC",
+                (model_name, fingerprint),
+            )
+            return [Experiment.from_dict(json.loads(row[0])) for row in rows]
+
+    def rebuild(self, models: Iterable[str], experiments: Iterable[Experiment]):
+        """
+        Rebuild the catalog from scratch.
+
+        The new catalog is written next to the current one and swapped in with an
+        atomic rename, so readers never see a partially built catalog.
+
+        :param models: names of every model of the repository
+        :param experiments: every experiment of the repository
+        :return: number of indexed experiments
+        """
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+        count = 0
+        tmp_catalog = Catalog(tmp_path, self.timeout)
+        try:
+            with tmp_catalog._connect() as connection:
+                connection.executescript(SCHEMA)
+                connection.executemany(
+                    "INSERT OR IGNORE INTO models (name) VALUES (?)",
+                    [(model,) for model in models],
+                )
+                for experiment in experiments:
+                    self._upsert(connection, experiment)
+                    count += 1
+
+            os.replace(tmp_path, self.path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+        return count
+
+    @staticmethod
+    def _upsert(connection: sqlite3.Connection, experiment: Experiment):
+        metadata = experiment.to_dict()
+
+        connection.execute(
+            "INSERT OR IGNORE INTO models (name) VALUES (?)", (experiment.model_name,)
+        )
+        connection.execute(
+            "INSERT OR REPLACE INTO experiments (uuid, model_name, name, date, metadata, fields) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                experiment.uuid,
+                experiment.model_name,
+                experiment.name,
+                experiment.date,
+                json.dumps(metadata),
+                json.dumps(_strict_json(metadata)),
+            ),
+        )
+
+    @staticmethod
+    def _migrate(connection: sqlite3.Connection):
+        """
+        Upgrade a catalog created by a previous version
+        """
+        version = connection.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+
+        tables = connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'experiments'"
+        ).fetchone()
+        if tables is None:
+            # Empty database, the schema is created by `create`
+            return
+
+        with connection:
+            # Take the write lock, then check again as another process may have migrated
+            connection.execute("BEGIN IMMEDIATE")
+            version = connection.execute("PRAGMA user_version").fetchone()[0]
+            if version < 1:
+                connection.execute(
+                    "ALTER TABLE experiments ADD COLUMN fields TEXT NOT NULL DEFAULT '{}'"
+                )
+                rows = connection.execute("SELECT uuid, metadata FROM experiments").fetchall()
+                connection.executemany(
+                    "UPDATE experiments SET fields = ? WHERE uuid = ?",
+                    [(json.dumps(_strict_json(json.loads(metadata))), uuid) for uuid, metadata in rows],
+                )
+            connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    @contextlib.contextmanager
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=self.timeout)
+        try:
+            self._migrate(connection)
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+
+def _strict_json(value):
+    if isinstance(value, float):
+        if math.isnan(value):
+            return None
+        if math.isinf(value):
+            return math.copysign(sys.float_info.max, value)
+    elif isinstance(value, dict):
+        return {key: _strict_json(item) for key, item in value.items()}
+    elif isinstance(value, (list, tuple)):
+        return [_strict_json(item) for item in value]
+
+    return value
@@ -0,0 +1,39 @@
+from amnesis.query import QueryError
+from amnesis.repository import Repository
+from amnesis.utils.table import Table
+
+
+def best(
+    repo: Repository,
+    metric: str,
+    k: int = 10,
+    maximize: bool = False,
+    model_name: str = None,
+    where: str = None,
+):
+    if model_name is not None and model_name not in {
+        model.name for model in repo.get_models() or []
+    }:
+        print(f"Model {model_name} not found. Try `amnesis models` to list all models.")
+        return
+
+    try:
+        experiments = repo.top_k(
+            metric, k=k, maximize=maximize, models=model_name, where=where or None
+        )
+    except (QueryError, ValueError) as error:
+        print(error)
+        return
+
+    rows = (
+        {
+            "rank": rank,
+            "model": experiment.model_name,
+            "experiment": experiment.name,
+            metric: experiment.metrics[metric],
+            "date": experiment.date,
+        }
+        for rank, experiment in enumerate(experiments, start=1)
+    )
+
+    print(Table.from_rows(rows, ["rank", "model", "experiment", metric, "date"]))
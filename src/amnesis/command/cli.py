@@ -1,10 +1,17 @@
 import clipy
 
-from amnesis.repository import Repository
+from amnesis.session import get_session
 
+from .best import best
+from .export import export
+from .gc import gc
 from .initialization import init
 from .list_experiments import list_experiments
 from .list_models import list_models
+from .migrate_layout import migrate_layout
+from .pack import pack
+from .profile import profile
+from .reindex import reindex
 
 
 @clipy.App(
@@ -12,7 +19,25 @@ from .list_models import list_models
     description="A local experiments tracking tool",
 )
 @clipy.Command(
-    name="init", usage="amnesis init", description="Initialize a new amnesis project"
+    name="init",
+    usage="amnesis init",
+    description="Initialize a new amnesis project",
+    options=[
+        clipy.Option(
+            name="metadata_codec",
+            type=str,
+            default="json",
+            required=False,
+            choices=["json", "msgpack"],
+        ),
+        clipy.Option(
+            name="layout",
+            type=str,
+            default="flat",
+            required=False,
+            choices=["flat", "sharded"],
+        ),
+    ],
 )
 @clipy.Command(
     name="info",
@@ -22,8 +47,9 @@ from .list_models import list_models
 @clipy.Command(name="models", usage="amnesis models", description="List all models")
 @clipy.Command(
     name="experiments",
-    usage="amnesis experiments",
-    description="List all experiments",
+    usage="amnesis experiments [--sort=COLUMNS] [--desc]",
+    description="List all experiments. Sort with e.g. --sort=accuracy,-lr: a column "
+    "prefixed by - is sorted in descending order, --desc reverses every column",
     options=[
         clipy.Option(name="model", type=str, default=None, required=False),
         clipy.Option(
@@ -33,13 +59,95 @@ from .list_models import list_models
             name="metrics", action="store_true", default=False, required=False
         ),
         clipy.Option(name="sort", type=str, default=None, required=False),
+        clipy.Option(name="desc", action="store_true", default=False, required=False),
+        clipy.Option(name="where", type=str, default=None, required=False),
     ],
 )
+@clipy.Command(
+    name="best",
+    usage="amnesis best --metric METRIC",
+    description="List the best experiments on a metric",
+    options=[
+        clipy.Option(name="metric", type=str, required=True),
+        clipy.Option(name="k", type=int, default=10, required=False),
+        clipy.Option(name="min", action="store_true", default=False, required=False),
+        clipy.Option(name="max", action="store_true", default=False, required=False),
+        clipy.Option(name="model", type=str, default=None, required=False),
+        clipy.Option(name="where", type=str, default=None, required=False),
+    ],
+)
+@clipy.Command(
+    name="export",
+    usage="amnesis export --output PATH",
+    description="Export experiments to a Parquet, Arrow, CSV or JSON lines file",
+    options=[
+        clipy.Option(name="output", type=str, required=True),
+        clipy.Option(
+            name="format",
+            type=str,
+            default=None,
+            required=False,
+            choices=["parquet", "arrow", "csv", "jsonl"],
+        ),
+        clipy.Option(name="model", type=str, default=None, required=False),
+        clipy.Option(name="where", type=str, default=None, required=False),
+    ],
+)
+@clipy.Command(
+    name="pack",
+    usage="amnesis pack",
+    description="Fold the metadata of finished experiments into segment files",
+    options=[
+        clipy.Option(name="model", type=str, default=None, required=False),
+    ],
+)
+@clipy.Command(
+    name="profile",
+    usage="amnesis profile --model MODEL --experiment EXPERIMENT",
+    description="Show the spans measured in an experiment",
+    options=[
+        clipy.Option(name="model", type=str, required=True),
+        clipy.Option(name="experiment", type=str, required=True),
+    ],
+)
+@clipy.Command(
+    name="gc",
+    usage="amnesis gc [--keep_top_k K --metric METRIC] [--keep_last N] [--keep_newer_than AGE] [--budget SIZE]",
+    description="Delete the experiments that are not kept by the retention rules",
+    options=[
+        clipy.Option(name="keep_top_k", type=int, default=None, required=False),
+        clipy.Option(name="metric", type=str, default=None, required=False),
+        clipy.Option(name="max", action="store_true", default=False, required=False),
+        clipy.Option(name="keep_last", type=int, default=None, required=False),
+        clipy.Option(name="keep_newer_than", type=str, default=None, required=False),
+        clipy.Option(name="budget", type=str, default=None, required=False),
+        clipy.Option(
+            name="keep_metadata", action="store_true", default=False, required=False
+        ),
+        clipy.Option(name="dry_run", action="store_true", default=False, required=False),
+        clipy.Option(name="model", type=str, default=None, required=False),
+    ],
+)
+@clipy.Command(
+    name="migrate-layout",
+    usage="amnesis migrate-layout --layout LAYOUT",
+    description="Move the experiment directories to the flat or sharded layout",
+    options=[
+        clipy.Option(
+            name="layout", type=str, required=True, choices=["flat", "sharded"]
+        ),
+    ],
+)
+@clipy.Command(
+    name="reindex",
+    usage="amnesis reindex",
+    description="Rebuild the experiments catalog from the metadata files",
+)
 def main(command: clipy.CommandDefinition):
     command_name = command.name
     options = command.options
 
-    repository = Repository()
+    repository = get_session().repository
     in_repository = repository.in_repository()
 
     if not in_repository and command_name != "init":
@@ -49,7 +157,11 @@ def main(command: clipy.CommandDefinition):
         return
 
     if command_name == "init":
-        init(repo=repository)
+        init(
+            repo=repository,
+            metadata_codec=options["metadata_codec"],
+            layout=options["layout"],
+        )
     elif command_name == "info":
         raise NotImplementedError
     elif command_name == "models":
@@ -61,6 +173,54 @@ def main(command: clipy.CommandDefinition):
             hyperparameters=options["hyperparameters"],
             metrics=options["metrics"],
             sort=options["sort"],
+            where=options["where"],
+            desc=options["desc"],
+        )
+    elif command_name == "best":
+        if options["min"] and options["max"]:
+            print("Options --min and --max are mutually exclusive")
+            return
+
+        best(
+            repo=repository,
+            metric=options["metric"],
+            k=options["k"],
+            maximize=options["max"],
+            model_name=options["model"],
+            where=options["where"],
+        )
+    elif command_name == "export":
+        export(
+            repo=repository,
+            path=options["output"],
+            format=options["format"],
+            model_name=options["model"],
+            where=options["where"],
+        )
+    elif command_name == "pack":
+        pack(repo=repository, model_name=options["model"])
+    elif command_name == "profile":
+        profile(
+            repo=repository,
+            model_name=options["model"],
+            experiment_name=options["experiment"],
+        )
+    elif command_name == "gc":
+        gc(
+            repo=repository,
+            keep_top_k=options["keep_top_k"],
+            metric=options["metric"],
+            maximize=options["max"],
+            keep_last=options["keep_last"],
+            keep_newer_than=options["keep_newer_than"],
+            budget=options["budget"],
+            keep_metadata=options["keep_metadata"],
+            dry_run=options["dry_run"],
+            model_name=options["model"],
         )
+    elif command_name == "migrate-layout":
+        migrate_layout(repo=repository, layout=options["layout"])
+    elif command_name == "reindex":
+        reindex(repo=repository)
     else:
         print(f"Unknown command: {command_name}")
@@ -0,0 +1,28 @@
+import pathlib
+
+from amnesis.query import QueryError
+from amnesis.repository import Repository
+
+
+def export(
+    repo: Repository,
+    path: str,
+    format: str = None,
+    model_name: str = None,
+    where: str = None,
+):
+    if model_name is not None and model_name not in {
+        model.name for model in repo.get_models() or []
+    }:
+        print(f"Model {model_name} not found. Try `amnesis models` to list all models.")
+        return
+
+    try:
+        count = repo.export(
+            pathlib.Path(path), format=format, models=model_name, where=where or None
+        )
+    except (QueryError, ValueError, ImportError) as error:
+        print(error)
+        return
+
+    print(f"Exported {count} experiments to {path}")
@@ -0,0 +1,59 @@
+from amnesis.repository import Repository
+from amnesis.retention import RetentionPolicy, format_size, parse_age, parse_size
+from amnesis.utils.table import Table
+
+
+def gc(
+    repo: Repository,
+    keep_top_k: int = None,
+    metric: str = None,
+    maximize: bool = False,
+    keep_last: int = None,
+    keep_newer_than: str = None,
+    budget: str = None,
+    keep_metadata: bool = False,
+    dry_run: bool = False,
+    model_name: str = None,
+):
+    if model_name is not None and model_name not in {
+        model.name for model in repo.get_models() or []
+    }:
+        print(f"Model {model_name} not found. Try `amnesis models` to list all models.")
+        return
+
+    try:
+        policy = RetentionPolicy(
+            keep_top_k=keep_top_k,
+            metric=metric,
+            maximize=maximize,
+            keep_last=keep_last,
+            keep_newer_than=parse_age(keep_newer_than) if keep_newer_than else None,
+            budget=parse_size(budget) if budget else None,
+            keep_metadata=keep_metadata,
+        )
+    except ValueError as error:
+        print(error)
+        return
+
+    report = repo.gc(policy, models=model_name, dry_run=dry_run)
+
+    if report.experiments:
+        rows = (
+            {
+                "model": experiment.model_name,
+                "experiment": experiment.name,
+                "date": experiment.date,
+                "status": experiment.status,
+            }
+            for experiment in report.experiments
+        )
+        print(Table.from_rows(rows, ["model", "experiment", "date", "status"]))
+
+    verb = "Would delete" if dry_run else "Deleted"
+    what = "the files of " if keep_metadata else ""
+    print(
+        f"{verb} {what}{len(report.experiments)} experiments, "
+        f"{format_size(report.freed_bytes)} of {format_size(report.total_bytes)}"
+    )
+    if report.objects:
+        print(f"Removed {report.objects} unused objects")
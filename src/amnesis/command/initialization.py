@@ -1,9 +1,9 @@
 from amnesis.repository import Repository
 
 
-def init(repo: Repository):
+def init(repo: Repository, metadata_codec: str = "json", layout: str = "flat"):
     try:
-        repo.init()
+        repo.init(metadata_codec=metadata_codec, layout=layout)
         print("Amnesis repository initialized")
     except FileExistsError:
         print("Repository is already initialized")
@@ -1,68 +1,11 @@
-from typing import List
+from typing import Iterable
 
 from amnesis.experiment import Experiment
+from amnesis.query import QueryError, parse_query
 from amnesis.repository import Repository
+from amnesis.utils.table import Table, display_names, parse_sort_keys
 
-
-class DataFrame:
-    """
-    A class that represent data in a table format.
-
-    It allow concatenation of dataframes and display of the data in a table format.
-    """
-
-    def __init__(self, columns: list, data: list):
-        self.columns = columns
-        self.data = data
-
-    def __add__(self, other):
-        """
-        Add the columns of the other dataframe to the current dataframe if it does not already exist.
-        The rows are assumed to be in the same order. If the columns are not in the same order, the data will be
-        misaligned.
-        """
-        duplicate_columns = [col for col in other.columns if col in self.columns]
-
-        other_columns = [col for col in other.columns if col not in duplicate_columns]
-
-        self.columns += other_columns
-
-        if not self.data:
-            self.data = other.data
-            return self
-
-        for i, _ in enumerate(self.data):
-            self.data[i] += [
-                other.data[i][other.columns.index(col)] for col in other_columns
-            ]
-
-        return self
-
-    def __str__(self):
-        max_len = [
-            max([len(str(row[i])) for row in self.data] + [len(self.columns[i])])
-            for i in range(len(self.columns))
-        ]
-
-        header = " | ".join(
-            [f"{col:<{max_len[i]}}" for i, col in enumerate(self.columns)]
-        )
-        separator = "-+-".join(["-" * length for length in max_len])
-
-        lines = [header, separator]
-
-        for row in self.data:
-            line = " | ".join([f"{row[i]:<{max_len[i]}}" for i in range(len(row))])
-            lines.append(line)
-
-        return "\n".join(lines)
-
-    def sort(self, column: str):
-        """
-        Sort the data by the values in the column.
-        """
-        column_index = self.columns.index(column)
-        self.data = sorted(self.data, key=lambda x: x[column_index])
+INFO_COLUMNS = ["model", "experiment", "date", "uuid"]
 
 
 def get_model_names(repo: Repository):
@@ -70,55 +13,39 @@ def get_model_names(repo: Repository):
         models = repo.get_models()
     except FileNotFoundError as error:
         print(error)
+        return []
 
-    return [model.name for model in models]
+    return [model.name for model in models or []]
 
 
-def get_experiment_info_frame(experiments: List[Experiment]):
-    columns = ["model", "experiment", "date", "uuid"]
-    data = []
-    for experiment in experiments:
-        data.append(
-            [experiment.model_name, experiment.name, experiment.date, experiment.uuid]
+def get_experiment_row(experiment: Experiment, hyperparameters: bool, metrics: bool):
+    row = {
+        "model": experiment.model_name,
+        "experiment": experiment.name,
+        "date": experiment.date,
+        "uuid": experiment.uuid,
+    }
+    # Logged values are namespaced, they never replace the info columns or each other
+    if hyperparameters:
+        row.update(
+            (f"hyperparameters.{name}", value)
+            for name, value in experiment.hyperparameters.items()
         )
+    if metrics:
+        row.update((f"metrics.{name}", value) for name, value in experiment.metrics.items())
 
-    return DataFrame(columns, data)
-
-
-def get_hyperparameters_frame(experiments: List[Experiment]):
-    # fetch all unique hyperparameters
-    hyperparameters = set()
-    for experiment in experiments:
-        hyperparameters.update(experiment.hyperparameters.keys())
-    hyperparameters = sorted(list(hyperparameters))
-
-    columns = ["model", "experiment"] + list(hyperparameters)
-    data = []
-    for experiment in experiments:
-        row = [experiment.model_name, experiment.name]
-        for hp in hyperparameters:
-            row.append(experiment.hyperparameters.get(hp, ""))
-        data.append(row)
-
-    return DataFrame(columns, data)
-
-
-def get_metrics_frame(experiments: List[Experiment]):
-    # fetch all unique metrics
-    metrics = set()
-    for experiment in experiments:
-        metrics.update(experiment.metrics.keys())
-    metrics = sorted(list(metrics))
+    return row
 
-    columns = ["model", "experiment"] + list(metrics)
-    data = []
-    for experiment in experiments:
-        row = [experiment.model_name, experiment.name]
-        for metric in metrics:
-            row.append(experiment.metrics.get(metric, ""))
-        data.append(row)
 
-    return DataFrame(columns, data)
+def get_column_names(hyperparameter_names: Iterable[str], metric_names: Iterable[str]):
+    """
+    Displayed name of the columns of the logged values: the name of the value, or its
+    namespaced name if it is also the name of an info column or of both a
+    hyperparameter and a metric.
+    """
+    return display_names(
+        {"hyperparameters": hyperparameter_names, "metrics": metric_names}, INFO_COLUMNS
+    )
 
 
 def list_experiments(
@@ -127,7 +54,15 @@ def list_experiments(
     hyperparameters: bool = False,
     metrics: bool = False,
     sort: str = None,
+    where: str = None,
+    desc: bool = False,
 ):
+    try:
+        query = parse_query(where)
+    except QueryError as error:
+        print(error)
+        return
+
     models_name = get_model_names(repo)
 
     if model_name is not None and model_name not in models_name:
@@ -136,30 +71,36 @@ def list_experiments(
 
     models = [model_name] if model_name in models_name else models_name
 
-    experiments = []
-    for model in models:
-        experiments += repo.get_experiments(model)
+    # Only the displayed values of each experiment are kept while streaming
+    rows = []
+    hyperparameter_names = {}
+    metric_names = {}
+    for experiment in repo.iter_experiments(models, where=query):
+        rows.append(get_experiment_row(experiment, hyperparameters, metrics))
+        if hyperparameters:
+            hyperparameter_names.update(dict.fromkeys(experiment.hyperparameters))
+        if metrics:
+            metric_names.update(dict.fromkeys(experiment.metrics))
 
-    # Empty frame
-    frame = DataFrame([], [])
+    columns = INFO_COLUMNS
+    names = get_column_names(hyperparameter_names, metric_names)
+    if hyperparameters or metrics:
+        columns = ["model", "experiment"] + list(names)
 
-    if not (hyperparameters or metrics):
-        frame = get_experiment_info_frame(experiments)
-
-    if hyperparameters:
-        hp_frame = get_hyperparameters_frame(experiments)
-        frame += hp_frame
-
-    if metrics:
-        metrics_frame = get_metrics_frame(experiments)
-        frame += metrics_frame
+    frame = Table.from_rows(rows, columns).rename(names)
 
     if sort:
-        if sort not in frame.columns:
-            print(
-                f"Column {sort} not found in the dataframe. Available columns are: {', '.join(frame.columns)}"
-            )
-            return
-        frame.sort(sort)
+        keys = parse_sort_keys(sort)
+        if desc:
+            keys = [(name, not descending) for name, descending in keys]
+        # Namespaced names, e.g. metrics.accuracy, are accepted for every column
+        keys = [(names.get(name, name), descending) for name, descending in keys]
+        for name, _ in keys:
+            if name not in frame:
+                print(
+                    f"Column {name} not found in the dataframe. Available columns are: {', '.join(frame.names)}"
+                )
+                return
+        frame = frame.sort(keys)
 
     print(frame)
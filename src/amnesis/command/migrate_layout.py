@@ -0,0 +1,6 @@
+from amnesis.repository import Repository
+
+
+def migrate_layout(repo: Repository, layout: str):
+    count = repo.migrate_layout(layout)
+    print(f"Moved {count} experiments to the {layout} layout")
@@ -0,0 +1,12 @@
+from amnesis.repository import Repository
+
+
+def pack(repo: Repository, model_name: str = None):
+    if model_name is not None and model_name not in {
+        model.name for model in repo.get_models() or []
+    }:
+        print(f"Model {model_name} not found. Try `amnesis models` to list all models.")
+        return
+
+    count = repo.pack(model_name)
+    print(f"Packed {count} experiments")
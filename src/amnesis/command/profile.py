@@ -0,0 +1,38 @@
+from amnesis.repository import Repository
+from amnesis.retention import format_size
+from amnesis.utils.table import Table
+
+MEMORY_COLUMNS = ("memory_peak", "rss_peak")
+
+
+def profile(repo: Repository, model_name: str, experiment_name: str):
+    try:
+        experiment = repo.get_experiment(model_name, experiment_name)
+    except FileNotFoundError as error:
+        print(error)
+        return
+
+    if not experiment.profile:
+        print(
+            f"No spans recorded for experiment {experiment.name}. "
+            "Use `ctx.span` or `ctx.timed` to measure parts of an experiment."
+        )
+        return
+
+    columns = ["span", "count", "wall", "cpu", "p50", "p99"]
+    columns += [
+        column
+        for column in MEMORY_COLUMNS
+        if any(column in stats for stats in experiment.profile.values())
+    ]
+
+    rows = []
+    for path, stats in experiment.profile.items():
+        *parents, name = path.split("/")
+        row = {"span": "  " * len(parents) + name, **stats}
+        for column in MEMORY_COLUMNS:
+            if row.get(column) is not None:
+                row[column] = format_size(row[column])
+        rows.append(row)
+
+    print(Table.from_rows(rows, columns))
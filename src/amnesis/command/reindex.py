@@ -0,0 +1,6 @@
+from amnesis.repository import Repository
+
+
+def reindex(repo: Repository):
+    count = repo.reindex()
+    print(f"Catalog rebuilt with {count} experiments")
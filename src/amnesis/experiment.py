@@ -1,11 +1,43 @@
 import dataclasses
-import json
 import pathlib
+from typing import Callable, Dict
+
+from .metadata_codec import MetadataCodec, get_path_codec
+from .utils import atomic_write
+
+# Version of the metadata written by this version of amnesis
+SCHEMA_VERSION = 3
+
+
+def _upgrade_to_1(metadata: dict):
+    # Metadata written before the schema version, the fields added since have defaults
+    return metadata
+
+
+def _upgrade_to_2(metadata: dict):
+    # The git provenance was a string, a placeholder before it was captured
+    git = metadata.get("git")
+    if not isinstance(git, dict):
+        metadata["git"] = {} if git in (None, "", "self.git.head") else {"commit": git}
+    return metadata
+
+
+def _upgrade_to_3(metadata: dict):
+    # The profile of the spans was added with a default
+    return metadata
+
+
+# Function upgrading the metadata of each version to the next version
+UPGRADES: Dict[int, Callable[[dict], dict]] = {
+    0: _upgrade_to_1,
+    1: _upgrade_to_2,
+    2: _upgrade_to_3,
+}
 
 
 @dataclasses.dataclass(order=True)
 class Experiment:
-    git: str
+    git: dict
 
     model_name: str
     name: str
@@ -15,17 +47,47 @@ class Experiment:
     time: float
     hyperparameters: dict
     metrics: dict
+    status: str = "finished"
+    artifacts: dict = dataclasses.field(default_factory=dict)
+    cache: dict = dataclasses.field(default_factory=dict)
+    profile: dict = dataclasses.field(default_factory=dict)
 
-    def save(self, path: pathlib.Path):
+    def to_dict(self):
+        return {"schema_version": SCHEMA_VERSION, **dataclasses.asdict(self)}
+
+    @classmethod
+    def from_dict(cls, metadata: dict):
+        """
+        Create an experiment from its metadata, upgraded to the current schema version.
+
+        :raise ValueError: if the metadata was written by a newer version of amnesis
+        """
+        metadata = dict(metadata)
+        version = metadata.pop("schema_version", 0)
+
+        if version > SCHEMA_VERSION:
+            raise ValueError(
+                f"Metadata schema version {version} is not supported, "
+                f"the latest supported version is {SCHEMA_VERSION}. Upgrade amnesis"
+            )
+
+        while version < SCHEMA_VERSION:
+            metadata = UPGRADES[version](metadata)
+            version += 1
+
+        return cls(**metadata)
+
+    def save(self, path: pathlib.Path, codec: MetadataCodec = None):
+        """
+        :param codec: codec of the file, defaults to the codec of the file name
+        """
         if not path.parent.exists():
             path.parent.mkdir(parents=True, exist_ok=True)
 
-        with path.open("w") as file:
-            json.dump(dataclasses.asdict(self), file, indent=4)
+        codec = codec or get_path_codec(path)
+        with atomic_write(path, "wb") as file:
+            file.write(codec.encode(self.to_dict()))
 
     @classmethod
     def load(cls, path: pathlib.Path):
-        with path.open() as file:
-            metadata = json.load(file)
-
-        return cls(**metadata)
+        return cls.from_dict(get_path_codec(path).decode(path.read_bytes()))
@@ -1,14 +1,25 @@
+import dataclasses
 import datetime
+import os
 import pathlib
 import shutil
+import threading
 import time
 import uuid
-from typing import Dict
+import warnings
+from typing import Dict, Union
 
+from .cache import fingerprint, save_result
 from .experiment import Experiment
+from .git import find_git_dir, get_git_info, write_diff
+from .metric_series import MetricSeries, series_path
 from .model import ModelSerializer
+from .profiler import Profiler
 from .repository import Repository
-from .utils import generate_name
+from .serializers import get_serializer
+from .session import get_session
+from .utils import CopyReport, TRANSFER_MODES, generate_name, transfer_file, transfer_tree
+from .writer import BackgroundWriter
 
 
 class ExperimentContext:
@@ -17,47 +28,118 @@ class ExperimentContext:
 
     hyperparameters: Dict[str, any]
     metrics: Dict[str, any]
+    series: Dict[str, MetricSeries]
+
+    def __init__(
+        self,
+        model_name: str,
+        experiment_name: str = None,
+        asynchronous: bool = False,
+        checkpoint_interval: float = 30.0,
+        cache: Union[bool, str] = False,
+        cache_version: str = None,
+        git_diff: bool = False,
+        profile_memory: str = None,
+    ):
+        """
+        :param model_name: name of the model
+        :param experiment_name: name of the experiment. If None, a name will be automatically generated
+        :param asynchronous: if True, metadata checkpoints and metric series are written by a background thread
+        :param checkpoint_interval: minimum number of seconds between two metadata checkpoints in asynchronous mode
+        :param cache: if True, `lookup_cache` finds a finished experiment with the same inputs. If "refresh", the
+            experiment is recomputed and becomes the cached one
+        :param cache_version: version included in the fingerprint, changing it invalidates the cached experiments
+        :param git_diff: if True, the diff of the git working tree against HEAD is saved in the artifacts as
+            `git.diff` by a background thread. Requires the git command line
+        :param profile_memory: how the peak memory of the spans is measured, None, "tracemalloc" or "rss",
+            see `profiler.Profiler`
+        """
+        if cache not in (False, True, "refresh"):
+            raise ValueError(f"Unknown cache mode {cache}. Use True, False or \"refresh\"")
+
+        # Shared by the experiments of the process, the repository root and models are found once
+        session = get_session()
+        self.repository = session.repository
+
+        self.experiment = self._new_experiment(model_name)
 
-    def __init__(self, model_name: str, experiment_name: str = None):
-        self.repository = Repository()
-
-        self.experiment = Experiment(
-            git="self.git.head",  # TODO: get git head
-            model_name=model_name,
-            name=None,
-            uuid=uuid.uuid4().hex,
-            date=None,
-            time=None,
-            hyperparameters={},
-            metrics={},
-        )
-
-        if not experiment_name:
-            experiment_name = self._generate_name()
+        # Create model directory
+        self.model_dir = session.create_model_dir(model_name)
+        self.names = session.get_name_registry(model_name)
 
-        if self._experiment_name_exist(experiment_name):
+        # The name is reserved when the experiment starts, a context that is never
+        # entered, e.g. a decorated function that is never called, takes no name
+        if experiment_name and self.names.exists(experiment_name):
             raise ValueError("Experiment name already exists")
 
+        self.experiment_name = experiment_name
         self.experiment.name = experiment_name
+        self._name_reserved = False
+        self._entered = False
 
         self.hyperparameters = {}
         self.metrics = {}
+        self.series = {}
+        self.artifacts = {}
 
-        # Create model directory
-        self.model_dir = self.repository.get_amnesis_dir() / model_name
-        self.model_dir.mkdir(parents=True, exist_ok=True)
+        self.asynchronous = asynchronous
+        self.checkpoint_interval = checkpoint_interval
+        self.writer = None
+        self._lock = threading.Lock()
+
+        self.cache = cache
+        self.cache_version = cache_version
+        self.fingerprint = None
+        self.cache_hit = None
+
+        self.git_diff = git_diff
+        self._git_diff_thread = None
+
+        self.profiler = Profiler(memory=profile_memory)
 
     def __enter__(self):
-        self.experiment_dir = self.model_dir / self.experiment.uuid
+        if self._entered:
+            # Entered again, e.g. by each call of a decorated function, the context
+            # records a new experiment
+            self._reset()
+        self._entered = True
+        self._reserve_name()
+
+        self.experiment_dir = self.repository.get_experiment_dir(
+            self.experiment.model_name, self.experiment.uuid
+        )
         self.experiment_dir.mkdir(parents=True, exist_ok=True)
+        self.metadata_path = self.repository.get_metadata_path(
+            self.experiment.model_name, self.experiment.uuid
+        )
 
         self.time = time.perf_counter()
         self.date = datetime.datetime.now()
 
+        if self.asynchronous:
+            self.writer = BackgroundWriter(
+                self._write_checkpoint, interval=self.checkpoint_interval
+            ).start()
+
+        if self.git_diff:
+            self._git_diff_thread = threading.Thread(target=self._log_git_diff, daemon=True)
+            self._git_diff_thread.start()
+
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            self._stop_writer()
+        except Exception as error:
+            # The final metadata is saved anyway, a failed checkpoint must not leave
+            # the experiment running
+            warnings.warn(f"Background write of experiment {self.experiment.name} failed: {error!r}")
+
+        if self._git_diff_thread is not None:
+            self._git_diff_thread.join()
+        self.profiler.close()
         self.time = round(time.perf_counter() - self.time, 6)
+        self.experiment.status = "failed" if exc_type is not None else "finished"
 
         self.save_metadata()
 
@@ -66,20 +148,171 @@ class ExperimentContext:
         self.experiment.time = self.time
         self.experiment.hyperparameters = self.hyperparameters
         self.experiment.metrics = self.metrics
+        self.experiment.artifacts = self.artifacts
+        self.experiment.cache = self._cache_metadata()
+        self.experiment.profile = self.profiler.summary()
+
+        for series in self.series.values():
+            series.flush()
+
+        self.experiment.save(self.metadata_path)
+        self.repository.index_experiment(self.experiment)
+
+    def checkpoint(self):
+        """
+        Save the metadata of the running experiment. In asynchronous mode, the
+        checkpoint is only requested and written later by the background thread.
+        """
+        if self.writer is not None:
+            self.writer.mark_dirty()
+        else:
+            self._write_checkpoint()
+
+    def lookup_cache(self, **inputs):
+        """
+        Fingerprint the inputs of the experiment and find a finished experiment with the
+        same fingerprint.
+
+        The fingerprint covers the given inputs, the hyperparameters logged so far and
+        `cache_version`. On a hit, its hyperparameters and metrics are copied to this
+        experiment, which is saved as a cache hit of the found experiment.
+
+        :param inputs: inputs of the experiment, e.g. the code and arguments of a function. Inputs
+            must be JSON serializable, arrays or bytes, otherwise the experiment is not cached
+        :return: the cached experiment, or None if the experiment must be computed
+        """
+        if not self.cache:
+            return None
+
+        with self._lock:
+            hyperparameters = dict(self.hyperparameters)
+
+        try:
+            self.fingerprint = fingerprint(
+                inputs=inputs, hyperparameters=hyperparameters, version=self.cache_version
+            )
+        except TypeError as error:
+            warnings.warn(f"The experiment is not cached: {error}")
+            return None
+
+        if self.cache == "refresh":
+            return None
+
+        hit = self.repository.find_cached_experiment(self.experiment.model_name, self.fingerprint)
+        if hit is None:
+            return None
+
+        self.cache_hit = hit
+        with self._lock:
+            self.hyperparameters.update(hit.hyperparameters)
+            self.metrics.update(hit.metrics)
+
+        return hit
+
+    def save_result(self, result):
+        """
+        Save the result of the experiment so that later cache hits can return it.
+        Only saved once the inputs were fingerprinted with `lookup_cache`.
+
+        :return: True if the result was saved
+        """
+        if self.fingerprint is None or self.cache_hit is not None:
+            return False
 
-        self.experiment.save(self.experiment_dir / "metadata.json")
+        return save_result(self.experiment_dir, result)
 
-    def log_model(self, model, serializer: ModelSerializer):
-        model_path = self.experiment_dir / "model"
+    def span(self, name: str):
+        """
+        Measure the wall time, CPU time and optionally the peak memory of a block of code:
+
+            with ctx.span("train"):
+                ...
+
+        Spans can be nested and repeated, their aggregated measures are saved in the
+        `profile` of the metadata.
+
+        :param name: name of the span
+        """
+        return self.profiler.span(name)
+
+    def timed(self, func=None, name: str = None):
+        """
+        Decorator measuring each call of a function as a span, see `span`.
+
+        :param name: name of the span, defaults to the qualified name of the function
+        """
+        return self.profiler.timed(func, name=name)
+
+    def log_model(self, model, serializer: Union[ModelSerializer, str]):
+        """
+        :param model: model to save
+        :param serializer: serializer instance, or name of a built-in serializer
+            ("numpy", "arrays" or "pickle"), see `serializers.SERIALIZERS`
+        """
+        serializer = get_serializer(serializer)
+        model_path = self.repository.get_model_path(self.experiment)
         serializer.save(model, model_path)
 
     def log_hyperparameter(self, name, hyperparameter):
-        self.hyperparameters[name] = hyperparameter
-
-    def log_metric(self, name, metric):
-        self.metrics[name] = metric
+        with self._lock:
+            self.hyperparameters[name] = hyperparameter
+
+        if self.writer is not None:
+            self.writer.mark_dirty()
+
+    def log_metric(self, name, metric, step: int = None, timestamp: float = None):
+        """
+        Log the value of a metric. The last logged value is saved in the metadata.
+
+        When a step or a timestamp is given, the value is also appended to the time
+        series of the metric, see `Repository.get_metric_series`.
+
+        :param name: name of the metric
+        :param metric: value of the metric
+        :param step: step of the value, e.g. the epoch. Defaults to the previous step + 1
+        :param timestamp: UNIX timestamp of the value. Defaults to now
+        """
+        with self._lock:
+            self.metrics[name] = metric
+
+        if self.writer is not None:
+            self.writer.mark_dirty()
+
+        if step is None and timestamp is None:
+            return
+
+        series = self.series.get(name)
+        if series is None:
+            path = series_path(self.experiment_dir / "metrics", name)
+            series = self.series[name] = MetricSeries(path, writer=self.writer)
+
+        series.append(metric, step, timestamp)
+
+    def log_artifact(
+        self,
+        artifact: pathlib.Path,
+        dedup: bool = False,
+        mode: str = "copy",
+        workers: int = None,
+    ):
+        """
+        Save a file or a directory in the artifacts of the experiment.
+
+        A report of the transfer (strategy, files, bytes, seconds and throughput) is saved
+        in the `artifacts` of the metadata.
+
+        :param artifact: path of the file or directory
+        :param dedup: if True, the files are added to the content-addressed store of the
+            repository and hardlinked in the experiment. Logging a file whose content is
+            already stored does not transfer it again.
+        :param mode: how the artifact is transferred, one of "copy", "move", "hardlink",
+            "symlink" or "reflink". Unsupported modes fall back to a copy.
+        :param workers: number of threads transferring the files of a directory
+        :return: strategy used to transfer the artifact, e.g. "reflink" or "copy"
+        """
+        if mode not in TRANSFER_MODES:
+            raise ValueError(f"Unknown artifact mode {mode}. Available modes are: {', '.join(TRANSFER_MODES)}")
 
-    def log_artifact(self, artifact: pathlib.Path):
         name = artifact.name
         is_dir = artifact.is_dir()
 
@@ -87,22 +320,159 @@ class ExperimentContext:
 
         artifact_dir.mkdir(parents=True, exist_ok=True)
 
-        if is_dir:
-            shutil.copytree(artifact, artifact_dir / name)
+        start = time.perf_counter()
+
+        if dedup:
+            report = self._log_deduplicated_artifact(artifact, artifact_dir, mode)
+        elif is_dir:
+            report = transfer_tree(artifact, artifact_dir / name, mode, workers)
         else:
-            shutil.copy2(artifact, artifact_dir / name)
+            if os.path.lexists(artifact_dir / name):
+                os.unlink(artifact_dir / name)
+
+            size = artifact.stat().st_size
+            strategy = transfer_file(artifact, artifact_dir / name, mode)
+            report = CopyReport(strategy=strategy, files=1, bytes=size)
+
+        report.seconds = time.perf_counter() - start
+
+        with self._lock:
+            self.artifacts[name] = report.to_dict()
+
+        return report.strategy
+
+    def _log_deduplicated_artifact(self, artifact: pathlib.Path, artifact_dir: pathlib.Path, mode: str):
+        store = self.repository.get_object_store()
+
+        if artifact.is_dir():
+            files = [path for path in artifact.rglob("*") if path.is_file()]
+        else:
+            files = [artifact]
+
+        report = CopyReport()
+        manifest = {}
+        strategies = set()
+        for file in files:
+            name = file.relative_to(artifact.parent).as_posix()
+            size = file.stat().st_size
+            digest, strategy = store.put(file, mode)
+            manifest[name] = digest
+            strategies.add(strategy)
+
+            report.files += 1
+            report.bytes += size
+
+            # The manifest is enough to resolve the artifact when hardlinks are not supported
+            store.link(digest, artifact_dir / name)
+
+        if mode == "move" and artifact.is_dir():
+            shutil.rmtree(artifact)
+
+        self.repository.update_artifact_manifest(self.experiment, manifest)
+
+        report.strategy = "+".join(sorted(strategies)) or "dedup"
+        return report
+
+    def _log_git_diff(self):
+        found = find_git_dir(self.repository.root or pathlib.Path.cwd())
+        if found is None or not self.experiment.git.get("commit"):
+            return
+
+        path = self.experiment_dir / "git.diff"
+        if not write_diff(found[0], path):
+            warnings.warn("Failed to save the git diff, is git installed?")
+            return
+
+        self.log_artifact(path, mode="move")
+
+    def _write_checkpoint(self):
+        with self._lock:
+            experiment = dataclasses.replace(
+                self.experiment,
+                date=self.date.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+                time=round(time.perf_counter() - self.time, 6),
+                hyperparameters=dict(self.hyperparameters),
+                metrics=dict(self.metrics),
+                artifacts=dict(self.artifacts),
+                cache=self._cache_metadata(),
+                profile=self.profiler.summary(),
+                status="running",
+            )
+
+        experiment.save(self.metadata_path)
+        self.repository.index_experiment(experiment)
+
+    def _cache_metadata(self):
+        if self.fingerprint is None:
+            return {}
+
+        return {
+            "fingerprint": self.fingerprint,
+            "hit": self.cache_hit.uuid if self.cache_hit is not None else None,
+        }
+
+    def _stop_writer(self):
+        if self.writer is None:
+            return
+
+        for series in self.series.values():
+            series.flush()
+            series.writer = None
+
+        writer = self.writer
+        self.writer = None
+        writer.close()
+
+    def _new_experiment(self, model_name: str):
+        return Experiment(
+            # Read from the files of the git repository, cached by the process
+            git=get_git_info(self.repository.root),
+            model_name=model_name,
+            name=None,
+            uuid=uuid.uuid4().hex,
+            date=None,
+            time=None,
+            hyperparameters={},
+            metrics={},
+        )
+
+    def _reset(self):
+        self.experiment = self._new_experiment(self.experiment.model_name)
+        self.experiment.name = self.experiment_name
+        self._name_reserved = False
+
+        with self._lock:
+            self.hyperparameters = {}
+            self.metrics = {}
+            self.series = {}
+            self.artifacts = {}
+
+        self.fingerprint = None
+        self.cache_hit = None
+        self.profiler = Profiler(memory=self.profiler.memory)
+
+    def _reserve_name(self):
+        if self._name_reserved:
+            return
+
+        if not self.experiment.name:
+            self.experiment.name = self._generate_name()
+        elif not self.names.reserve(self.experiment.name, self.experiment.uuid):
+            raise ValueError("Experiment name already exists")
+
+        self._name_reserved = True
 
     def _generate_name(self):
         attempts = 0
 
         name = generate_name()
-        while self._experiment_name_exist(name):
+        while not self.names.reserve(name, self.experiment.uuid):
             if attempts > 42:
                 raise TimeoutError(
                     "It looks like you are very unlucky and/or you do have a large "
                     "number of versions. You can avoid this issue by manually "
-                    "naming your version, or you can clean your project by deleting "
-                    "unused versions."
+                    "naming your version, or you can delete unused versions with "
+                    "`amnesis gc`."
                 )
 
             name = generate_name()
@@ -111,13 +481,4 @@ class ExperimentContext:
         return name
 
     def _experiment_name_exist(self, name):
-        experiments = self.repository.get_experiments(self.experiment.model_name)
-
-        if experiments is None:
-            return False
-
-        for experiment in experiments:
-            if experiment.name == name:
-                return True
-
-        return False
+        return self.names.exists(name)
@@ -0,0 +1,230 @@
+"""
+Export of experiments to a single file for bulk analysis.
+
+Experiments are flattened to one row each, with a `hyperparameters.<name>` and a
+`metrics.<name>` column per hyperparameter and metric. Experiments are read once:
+JSON lines are streamed, the flattened rows of the other formats are spooled to a
+temporary file until their schema is known and then written in batches. CSV and
+JSON lines are always available, Parquet and Arrow require PyArrow.
+"""
+
+import csv
+import json
+import pathlib
+import tempfile
+from typing import Dict, Iterable, Iterator, List
+
+from .experiment import Experiment
+from .utils import atomic_write
+
+FORMATS = ("parquet", "arrow", "csv", "jsonl")
+
+# Columns of every row, followed by the hyperparameters and metrics
+BASE_COLUMNS = {
+    "model": "model_name",
+    "experiment": "name",
+    "uuid": "uuid",
+    "date": "date",
+    "time": "time",
+    "status": "status",
+}
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as error:
+        raise ImportError(
+            "PyArrow is required by the parquet and arrow formats, "
+            "install it with `pip install amnesis[export]`"
+        ) from error
+
+    return pyarrow
+
+
+def flatten(experiment: Experiment) -> Dict:
+    """
+    Row of an experiment, values that are not numbers, booleans or strings are
+    encoded in JSON.
+    """
+    row = {column: getattr(experiment, field) for column, field in BASE_COLUMNS.items()}
+    for prefix in ("git", "hyperparameters", "metrics"):
+        for name, value in getattr(experiment, prefix).items():
+            if value is not None and not isinstance(value, (bool, int, float, str)):
+                value = json.dumps(value)
+            row[f"{prefix}.{name}"] = value
+
+    return row
+
+
+def _base_schema():
+    # Type of each column, one of "bool", "int", "float" or "string". Columns mixing
+    # integers and reals are "float", columns mixing other types are "string".
+    schema = {column: "string" for column in BASE_COLUMNS}
+    schema["time"] = "float"
+    return schema
+
+
+def _update_schema(schema: Dict[str, str], row: Dict):
+    for column, value in row.items():
+        if column in BASE_COLUMNS or value is None:
+            continue
+        schema[column] = _merge_types(schema.get(column), _type(value))
+
+
+def _type(value):
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    return "string"
+
+
+def _merge_types(current, new):
+    if current is None or current == new:
+        return new
+    if {current, new} == {"int", "float"}:
+        return "float"
+    return "string"
+
+
+def _cast(value, column_type: str):
+    if value is None or column_type != "string" or isinstance(value, str):
+        return value
+    return json.dumps(value)
+
+
+def _batches(rows: Iterator[Dict], batch_size: int) -> Iterator[List[Dict]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def export_experiments(
+    experiments: Iterable[Experiment],
+    path: pathlib.Path,
+    format: str = None,
+    batch_size: int = 10000,
+):
+    """
+    Write experiments to a file.
+
+    The experiments are read once. For the CSV, Parquet and Arrow formats, their rows
+    are spooled to a temporary JSON lines file while the schema is inferred, and read
+    back from it. Memory does not depend on the number of experiments, and the schema
+    always matches the written rows even if experiments change during the export.
+
+    :param experiments: experiments to export
+    :param path: path of the file, replaced atomically
+    :param format: one of `FORMATS`, defaults to the extension of the path
+    :param batch_size: number of rows per batch, the row group size of Parquet files
+    :return: number of exported experiments
+    """
+    path = pathlib.Path(path)
+    if format is None:
+        format = path.suffix.lstrip(".")
+
+    if format not in FORMATS:
+        raise ValueError(
+            f"Unknown format {format}. Available formats are: {', '.join(FORMATS)}"
+        )
+
+    if format == "jsonl":
+        return _export_jsonl(experiments, path)
+
+    with tempfile.TemporaryFile("w+", encoding="utf-8") as spool:
+        schema = _spool(experiments, spool)
+        spool.seek(0)
+        rows = (json.loads(line) for line in spool)
+
+        if format == "csv":
+            return _export_csv(rows, schema, path)
+
+        return _export_arrow(_batches(rows, batch_size), schema, path, format)
+
+
+def _spool(experiments: Iterable[Experiment], file) -> Dict[str, str]:
+    schema = _base_schema()
+    for experiment in experiments:
+        row = flatten(experiment)
+        _update_schema(schema, row)
+        file.write(json.dumps(row))
+        file.write("\n")
+
+    return schema
+
+
+def _export_jsonl(experiments: Iterable[Experiment], path: pathlib.Path):
+    count = 0
+    with atomic_write(path, "w", encoding="utf-8") as file:
+        for experiment in experiments:
+            file.write(json.dumps(flatten(experiment)))
+            file.write("\n")
+            count += 1
+
+    return count
+
+
+def _export_csv(rows: Iterator[Dict], schema: Dict[str, str], path: pathlib.Path):
+    count = 0
+    with atomic_write(path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.DictWriter(
+            file, fieldnames=list(schema), extrasaction="ignore"
+        )
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(
+                {column: _cast(value, schema.get(column)) for column, value in row.items()}
+            )
+            count += 1
+
+    return count
+
+
+def _export_arrow(
+    batches: Iterator[List[Dict]], schema: Dict[str, str], path: pathlib.Path, format: str
+):
+    pyarrow = _pyarrow()
+    types = {
+        "bool": pyarrow.bool_(),
+        "int": pyarrow.int64(),
+        "float": pyarrow.float64(),
+        "string": pyarrow.string(),
+    }
+    arrow_schema = pyarrow.schema([(column, types[kind]) for column, kind in schema.items()])
+
+    count = 0
+    with atomic_write(path, "wb") as file:
+        if format == "parquet":
+            writer = pyarrow.parquet.ParquetWriter(file, arrow_schema)
+        else:
+            writer = pyarrow.ipc.new_file(file, arrow_schema)
+
+        with writer:
+            for batch in batches:
+                columns = [
+                    [_cast(row.get(column), kind) for row in batch]
+                    for column, kind in schema.items()
+                ]
+                arrays = [
+                    pyarrow.array(values, types[kind])
+                    for values, kind in zip(columns, schema.values())
+                ]
+                record_batch = pyarrow.RecordBatch.from_arrays(arrays, schema=arrow_schema)
+                if format == "parquet":
+                    writer.write_batch(record_batch, row_group_size=len(batch))
+                else:
+                    writer.write_batch(record_batch)
+                count += len(batch)
+
+    return count
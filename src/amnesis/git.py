@@ -0,0 +1,622 @@
+"""
+Git provenance of the experiments, read without running git.
+
+HEAD is resolved by reading `.git/HEAD`, the loose refs and `packed-refs`. The
+working tree is dirty if changes are staged, i.e. the tree of the index differs from
+the tree of HEAD, or if a tracked file does not match the stat information cached
+in the index (size and modification time), as git does before comparing contents.
+Untracked files are ignored. HEAD and the index are cached per process and per
+repository until their files change, the staged changes are checked once per change
+of HEAD or of the index, and the scan of the tracked files is reused for a second.
+"""
+
+import hashlib
+import mmap
+import os
+import pathlib
+import struct
+import subprocess
+import threading
+import time
+import zlib
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .utils import MtimeCache
+
+INDEX_SIGNATURE = b"DIRC"
+# ctime, mtime, dev, ino, mode, uid, gid and size of an index entry, followed by its hash
+INDEX_ENTRY = struct.Struct(">10I20sH")
+
+FLAG_ASSUME_VALID = 0x8000
+FLAG_EXTENDED = 0x4000
+FLAG_SKIP_WORKTREE = 0x4000
+FLAG_INTENT_TO_ADD = 0x2000
+MODE_GITLINK = 0o160000
+
+PACK_INDEX_MAGIC = b"\377tOc"
+# Types of the objects of a pack, deltas are stored against an offset or an object id
+PACK_OBJECT_TYPES = {1: b"commit", 2: b"tree", 3: b"blob", 4: b"tag"}
+PACK_OFS_DELTA = 6
+PACK_REF_DELTA = 7
+
+# Symbolic refs pointing to symbolic refs are followed this many times
+MAX_REF_DEPTH = 5
+
+
+def find_git_dir(path: pathlib.Path) -> Optional[Tuple[pathlib.Path, pathlib.Path]]:
+    """
+    Find the git repository containing a directory.
+
+    :return: root of the working tree and git directory, or None if the directory is
+        not in a git repository. The git directory of worktrees and submodules is read
+        from their `.git` file.
+    """
+    path = pathlib.Path(os.path.abspath(path))
+    for directory in (path, *path.parents):
+        dot_git = directory / ".git"
+        if dot_git.is_dir():
+            return directory, dot_git
+
+        if dot_git.is_file():
+            content = dot_git.read_text().strip()
+            if content.startswith("gitdir:"):
+                git_dir = pathlib.Path(content[len("gitdir:") :].strip())
+                return directory, (directory / git_dir).resolve()
+
+    return None
+
+
+def _common_dir(git_dir: pathlib.Path):
+    # Worktrees share the refs of the main repository
+    commondir = git_dir / "commondir"
+    if commondir.is_file():
+        return (git_dir / commondir.read_text().strip()).resolve()
+
+    return git_dir
+
+
+def _packed_refs(common_dir: pathlib.Path) -> Dict[str, str]:
+    refs = {}
+    try:
+        with (common_dir / "packed-refs").open() as file:
+            for line in file:
+                # Comments and peeled tags start with "#" and "^"
+                if line.startswith(("#", "^")):
+                    continue
+                parts = line.split()
+                if len(parts) == 2:
+                    refs[parts[1]] = parts[0]
+    except FileNotFoundError:
+        pass
+
+    return refs
+
+
+def resolve_head(git_dir: pathlib.Path):
+    """
+    :return: commit of HEAD, None for a repository without commits, and the name of
+        the current branch, None for a detached HEAD
+    """
+    common_dir = _common_dir(git_dir)
+    content = (git_dir / "HEAD").read_text().strip()
+
+    branch = None
+    packed_refs = None
+    for _ in range(MAX_REF_DEPTH):
+        if not content.startswith("ref:"):
+            return content or None, branch
+
+        ref = content[len("ref:") :].strip()
+        if branch is None:
+            branch = ref[len("refs/heads/") :] if ref.startswith("refs/heads/") else ref
+
+        for directory in (git_dir, common_dir):
+            ref_path = directory / ref
+            if ref_path.is_file():
+                content = ref_path.read_text().strip()
+                break
+        else:
+            if packed_refs is None:
+                packed_refs = _packed_refs(common_dir)
+            content = packed_refs.get(ref)
+            if content is None:
+                # Branch without commits
+                return None, branch
+
+    return None, branch
+
+
+class IndexEntry(NamedTuple):
+    """
+    Entry of the git index
+    """
+
+    path: bytes
+    mode: int
+    object_id: bytes
+    # Non-zero for the sides of a conflict during a merge
+    stage: int
+    size: int
+    mtime_seconds: int
+    mtime_nanoseconds: int
+    # False for the entries git does not compare with the working tree: assumed valid,
+    # skipped by a sparse checkout or submodules
+    checked_out: bool
+    # Files added with `git add --intent-to-add`, not part of the tree of the index
+    intent_to_add: bool
+
+
+def read_index(index_path: pathlib.Path) -> List[IndexEntry]:
+    """
+    Read the entries of the index, sorted by path.
+    """
+    data = index_path.read_bytes()
+    signature, version, count = struct.unpack_from(">4sII", data)
+    if signature != INDEX_SIGNATURE or version not in (2, 3, 4):
+        raise ValueError(f"Unsupported git index {index_path}")
+
+    entries = []
+    offset = 12
+    path = b""
+    for _ in range(count):
+        entry_start = offset
+        (
+            _,
+            _,
+            mtime_seconds,
+            mtime_nanoseconds,
+            _,
+            _,
+            mode,
+            _,
+            _,
+            size,
+            object_id,
+            flags,
+        ) = INDEX_ENTRY.unpack_from(data, offset)
+        offset += INDEX_ENTRY.size
+
+        extended_flags = 0
+        if version >= 3 and flags & FLAG_EXTENDED:
+            (extended_flags,) = struct.unpack_from(">H", data, offset)
+            offset += 2
+
+        if version == 4:
+            # The path is compressed against the previous path, the number of bytes
+            # to strip from it is an offset-encoded varint
+            byte = data[offset]
+            offset += 1
+            strip = byte & 0x7F
+            while byte & 0x80:
+                byte = data[offset]
+                offset += 1
+                strip = ((strip + 1) << 7) | (byte & 0x7F)
+            end = data.index(b"\0", offset)
+            path = path[: len(path) - strip] + data[offset:end]
+            offset = end + 1
+        else:
+            end = data.index(b"\0", offset)
+            path = data[offset:end]
+            # Entries are padded with 1 to 8 null bytes to a multiple of 8 bytes
+            offset = entry_start + ((end - entry_start) // 8 + 1) * 8
+
+        checked_out = not (
+            flags & FLAG_ASSUME_VALID
+            or extended_flags & FLAG_SKIP_WORKTREE
+            or mode & 0o170000 == MODE_GITLINK
+        )
+        entries.append(
+            IndexEntry(
+                path,
+                mode,
+                object_id,
+                (flags >> 12) & 0x3,
+                size,
+                mtime_seconds,
+                mtime_nanoseconds,
+                checked_out,
+                bool(extended_flags & FLAG_INTENT_TO_ADD),
+            )
+        )
+
+    return entries
+
+
+def is_dirty(root: pathlib.Path, entries: List[IndexEntry]):
+    """
+    Check the tracked files of the working tree against the stat cache of the index.
+
+    :param entries: entries of the index, see `read_index`
+    :return: True if a tracked file was modified or removed
+    """
+    for path, _, _, _, size, mtime_seconds, mtime_nanoseconds, checked_out, _ in entries:
+        if not checked_out:
+            continue
+
+        try:
+            stat = os.lstat(os.path.join(root, os.fsdecode(path)))
+        except (FileNotFoundError, NotADirectoryError):
+            return True
+
+        if stat.st_size & 0xFFFFFFFF != size:
+            return True
+        if int(stat.st_mtime) & 0xFFFFFFFF != mtime_seconds:
+            return True
+        # Some filesystems and git builds do not record nanoseconds
+        if mtime_nanoseconds and stat.st_mtime_ns % 1_000_000_000 != mtime_nanoseconds:
+            return True
+
+    return False
+
+
+def index_tree_id(entries: List[IndexEntry]) -> Optional[bytes]:
+    """
+    Compute the id of the tree of the index, the tree `git write-tree` would write.
+
+    :param entries: entries of the index, see `read_index`
+    :return: the tree id, None if the index has conflicts
+    """
+    if any(entry.stage for entry in entries):
+        return None
+
+    items = [
+        (entry.path, entry.mode, entry.object_id)
+        for entry in entries
+        if not entry.intent_to_add
+    ]
+    return _tree_id(items)
+
+
+def _tree_id(items: List[Tuple[bytes, int, bytes]]) -> bytes:
+    # The index is sorted by path, which is also the order of the entries of the trees
+    content = bytearray()
+    index = 0
+    while index < len(items):
+        path, mode, object_id = items[index]
+        name, slash, _ = path.partition(b"/")
+        if not slash:
+            content += b"%o %s\0%s" % (mode, name, object_id)
+            index += 1
+            continue
+
+        prefix = name + b"/"
+        end = index + 1
+        while end < len(items) and items[end][0].startswith(prefix):
+            end += 1
+        subtree = [
+            (path[len(prefix) :], mode, object_id) for path, mode, object_id in items[index:end]
+        ]
+        content += b"40000 %s\0%s" % (name, _tree_id(subtree))
+        index = end
+
+    return hashlib.sha1(b"tree %d\0%s" % (len(content), content)).digest()
+
+
+def read_object(common_dir: pathlib.Path, object_id: bytes) -> Tuple[bytes, bytes]:
+    """
+    Read a loose or packed object of a git repository.
+
+    :param common_dir: git directory holding the objects
+    :param object_id: binary id of the object
+    :return: type and content of the object
+    :raise KeyError: if the object is not found
+    """
+    hex_id = object_id.hex()
+    objects_dir = common_dir / "objects"
+    try:
+        data = zlib.decompress((objects_dir / hex_id[:2] / hex_id[2:]).read_bytes())
+    except FileNotFoundError:
+        pass
+    else:
+        header, _, content = data.partition(b"\0")
+        return header.split(b" ")[0], content
+
+    for index_path in sorted((objects_dir / "pack").glob("pack-*.idx")):
+        offset = _pack_offset(index_path, object_id)
+        if offset is None:
+            continue
+
+        with index_path.with_suffix(".pack").open("rb") as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as pack:
+                return _read_packed_object(common_dir, pack, offset)
+
+    raise KeyError(f"Git object {hex_id} not found")
+
+
+def _pack_offset(index_path: pathlib.Path, object_id: bytes) -> Optional[int]:
+    # Version 2 pack index: a fan-out table of the number of ids by first byte, then the
+    # sorted ids, their CRC, their offsets and the large offsets
+    data = index_path.read_bytes()
+    if data[:4] != PACK_INDEX_MAGIC or struct.unpack_from(">I", data, 4)[0] != 2:
+        raise ValueError(f"Unsupported git pack index {index_path}")
+
+    fanout = 8
+    count = struct.unpack_from(">I", data, fanout + 255 * 4)[0]
+    ids = fanout + 256 * 4
+    offsets = ids + count * 24
+
+    first = object_id[0]
+    low = struct.unpack_from(">I", data, fanout + (first - 1) * 4)[0] if first else 0
+    high = struct.unpack_from(">I", data, fanout + first * 4)[0]
+    while low < high:
+        middle = (low + high) // 2
+        candidate = data[ids + middle * 20 : ids + middle * 20 + 20]
+        if candidate < object_id:
+            low = middle + 1
+        elif candidate > object_id:
+            high = middle
+        else:
+            (offset,) = struct.unpack_from(">I", data, offsets + middle * 4)
+            if offset & 0x80000000:
+                large_offsets = offsets + count * 4
+                large_offset = large_offsets + (offset & 0x7FFFFFFF) * 8
+                (offset,) = struct.unpack_from(">Q", data, large_offset)
+            return offset
+
+    return None
+
+
+def _read_packed_object(common_dir: pathlib.Path, pack, offset: int) -> Tuple[bytes, bytes]:
+    # The header holds the type and the size of the object, the size is not needed
+    start = offset
+    byte = pack[offset]
+    kind = (byte >> 4) & 0x7
+    offset += 1
+    while byte & 0x80:
+        byte = pack[offset]
+        offset += 1
+
+    if kind == PACK_OFS_DELTA:
+        # Offset of the base object before this one, as an offset-encoded varint
+        byte = pack[offset]
+        offset += 1
+        distance = byte & 0x7F
+        while byte & 0x80:
+            byte = pack[offset]
+            offset += 1
+            distance = ((distance + 1) << 7) | (byte & 0x7F)
+        kind, base = _read_packed_object(common_dir, pack, start - distance)
+        return kind, _apply_delta(base, _inflate(pack, offset))
+
+    if kind == PACK_REF_DELTA:
+        kind, base = read_object(common_dir, bytes(pack[offset : offset + 20]))
+        return kind, _apply_delta(base, _inflate(pack, offset + 20))
+
+    if kind not in PACK_OBJECT_TYPES:
+        raise ValueError(f"Unsupported git pack object type {kind}")
+
+    return PACK_OBJECT_TYPES[kind], _inflate(pack, offset)
+
+
+def _inflate(pack, offset: int, chunk_size: int = 64 * 1024) -> bytes:
+    # The compressed size is not stored, the stream is fed until its end
+    decompressor = zlib.decompressobj()
+    chunks = []
+    while not decompressor.eof and offset < len(pack):
+        chunks.append(decompressor.decompress(pack[offset : offset + chunk_size]))
+        offset += chunk_size
+
+    return b"".join(chunks)
+
+
+def _apply_delta(base: bytes, delta: bytes) -> bytes:
+    def varint(position):
+        value = shift = 0
+        while True:
+            byte = delta[position]
+            position += 1
+            value |= (byte & 0x7F) << shift
+            shift += 7
+            if not byte & 0x80:
+                return value, position
+
+    # Sizes of the base and of the result
+    _, position = varint(0)
+    _, position = varint(position)
+
+    result = bytearray()
+    while position < len(delta):
+        opcode = delta[position]
+        position += 1
+        if opcode & 0x80:
+            # Copy from the base, the bits of the opcode tell which bytes of the offset
+            # and of the size follow
+            offset = size = 0
+            for shift in range(4):
+                if opcode & (1 << shift):
+                    offset |= delta[position] << (8 * shift)
+                    position += 1
+            for shift in range(3):
+                if opcode & (1 << (4 + shift)):
+                    size |= delta[position] << (8 * shift)
+                    position += 1
+            result += base[offset : offset + (size or 0x10000)]
+        elif opcode:
+            # Insert the next bytes of the delta
+            result += delta[position : position + opcode]
+            position += opcode
+        else:
+            raise ValueError("Invalid git delta")
+
+    return bytes(result)
+
+
+def read_tree_id(common_dir: pathlib.Path, commit: str) -> bytes:
+    """
+    :param commit: hexadecimal id of a commit
+    :return: binary id of the tree of the commit
+    """
+    kind, content = read_object(common_dir, bytes.fromhex(commit))
+    if kind != b"commit" or not content.startswith(b"tree "):
+        raise ValueError(f"Invalid git commit {commit}")
+
+    return bytes.fromhex(content[len(b"tree ") : content.index(b"\n")].decode("ascii"))
+
+
+class GitRepository:
+    """
+    Git repository whose HEAD and index are cached until their files change
+    """
+
+    def __init__(self, root: pathlib.Path, git_dir: pathlib.Path, poll_interval: float = 1.0):
+        """
+        :param root: root of the working tree
+        :param git_dir: git directory, see `find_git_dir`
+        :param poll_interval: minimum number of seconds between two checks of the files
+            of the git directory, and between two scans of the working tree
+        """
+        self.root = root
+        self.git_dir = git_dir
+        self.common_dir = _common_dir(git_dir)
+        self.poll_interval = poll_interval
+
+        self._head = MtimeCache(self._read_head, self._head_paths, poll_interval)
+        self._index = MtimeCache(self._read_index, lambda: [git_dir / "index"], poll_interval)
+        # Commit and entries of the index of the last results, with the time of the scan
+        self._staged = None
+        self._worktree = None
+        self._lock = threading.Lock()
+
+    def get_info(self):
+        """
+        :return: dictionary with the commit, branch and dirty state, empty if HEAD
+            cannot be read. The dirty state is None without commits or if the index
+            cannot be read or compared with HEAD.
+        """
+        head = self._head.get()
+        if head is None:
+            return {}
+
+        commit, branch = head
+        entries = self._index.get()
+        dirty = None
+        if commit is not None and entries is not None:
+            staged = self._is_staged(commit, entries)
+            if staged or self._is_worktree_dirty(entries):
+                dirty = True
+            elif staged is not None:
+                dirty = False
+
+        return {"commit": commit, "branch": branch, "dirty": dirty}
+
+    def _is_staged(self, commit: str, entries: List[IndexEntry]):
+        # The index is reloaded when its file changes, a new list is a new index
+        with self._lock:
+            if (
+                self._staged is not None
+                and self._staged[0] == commit
+                and self._staged[1] is entries
+            ):
+                return self._staged[2]
+
+        try:
+            # Conflicts have no tree and are staged changes
+            staged = index_tree_id(entries) != read_tree_id(self.common_dir, commit)
+        except (OSError, KeyError, ValueError, IndexError, struct.error, zlib.error):
+            staged = None
+
+        with self._lock:
+            self._staged = (commit, entries, staged)
+        return staged
+
+    def _is_worktree_dirty(self, entries: List[IndexEntry]):
+        # Edits of the working tree do not change the index, the files are scanned
+        # again once the index changes or after `poll_interval` seconds
+        now = time.monotonic()
+        with self._lock:
+            if (
+                self._worktree is not None
+                and self._worktree[0] is entries
+                and now - self._worktree[1] < self.poll_interval
+            ):
+                return self._worktree[2]
+
+        dirty = is_dirty(self.root, entries)
+        with self._lock:
+            self._worktree = (entries, now, dirty)
+        return dirty
+
+    def _read_head(self):
+        try:
+            return resolve_head(self.git_dir)
+        except (FileNotFoundError, UnicodeDecodeError):
+            return None
+
+    def _read_index(self):
+        try:
+            return read_index(self.git_dir / "index")
+        except FileNotFoundError:
+            # Repository without index, nothing is tracked
+            return []
+        except (ValueError, struct.error, IndexError):
+            return None
+
+    def _head_paths(self):
+        head = self.git_dir / "HEAD"
+        paths = [head, self.common_dir / "packed-refs"]
+        try:
+            content = head.read_text().strip()
+        except FileNotFoundError:
+            return paths
+
+        if content.startswith("ref:"):
+            ref = content[len("ref:") :].strip()
+            paths += [self.git_dir / ref, self.common_dir / ref]
+        return paths
+
+
+_repositories: Dict[pathlib.Path, GitRepository] = {}
+_roots: Dict[str, Optional[Tuple[pathlib.Path, pathlib.Path]]] = {}
+_lock = threading.Lock()
+
+
+def get_git_info(path: pathlib.Path = None):
+    """
+    Get the git provenance of a directory. The git repository of a directory is found
+    once per process, its HEAD and index are read again only when they change.
+
+    :param path: directory inside the git repository, defaults to the current directory
+    :return: dictionary with the commit, branch and dirty state, empty if the directory
+        is not in a git repository
+    """
+    path = os.path.abspath(path or os.getcwd())
+
+    with _lock:
+        if path not in _roots:
+            _roots[path] = find_git_dir(pathlib.Path(path))
+        found = _roots[path]
+        if found is None:
+            return {}
+
+        root, git_dir = found
+        repository = _repositories.get(git_dir)
+        if repository is None:
+            repository = GitRepository(root, git_dir)
+            _repositories[git_dir] = repository
+
+    return repository.get_info()
+
+
+def write_diff(root: pathlib.Path, destination: pathlib.Path, timeout: float = 60.0):
+    """
+    Write the diff of the working tree against HEAD, including staged changes, with
+    the git command line.
+
+    :return: True if the diff was written, False if git is not available or failed
+    """
+    try:
+        with destination.open("wb") as file:
+            subprocess.run(
+                ["git", "diff", "HEAD", "--binary"],
+                cwd=root,
+                stdout=file,
+                stderr=subprocess.DEVNULL,
+                timeout=timeout,
+                check=True,
+            )
+    except (OSError, subprocess.SubprocessError):
+        if destination.exists():
+            destination.unlink()
+        return False
+
+    return True
@@ -0,0 +1,98 @@
+"""
+Codecs of the metadata files of the experiments.
+
+JSON is the default and is human readable. MessagePack files are smaller and faster
+to parse, and require the `msgpack` package. The codec of a file is given by its name,
+so a repository can hold files written with different codecs.
+"""
+
+import abc
+import json
+import pathlib
+from typing import Union
+
+
+class MetadataCodec(abc.ABC):
+    """
+    Encoding of the metadata of an experiment
+    """
+
+    name: str
+    file_name: str
+
+    @abc.abstractmethod
+    def encode(self, metadata: dict) -> bytes:
+        pass
+
+    @abc.abstractmethod
+    def decode(self, data: bytes) -> dict:
+        """
+        :raise ValueError: if the data cannot be decoded
+        """
+
+
+class JsonCodec(MetadataCodec):
+    name = "json"
+    file_name = "metadata.json"
+
+    def encode(self, metadata: dict) -> bytes:
+        return json.dumps(metadata, indent=4).encode("utf-8")
+
+    def decode(self, data: bytes) -> dict:
+        return json.loads(data)
+
+
+class MsgpackCodec(MetadataCodec):
+    name = "msgpack"
+    file_name = "metadata.msgpack"
+
+    def encode(self, metadata: dict) -> bytes:
+        return _msgpack().packb(metadata, use_bin_type=True)
+
+    def decode(self, data: bytes) -> dict:
+        msgpack = _msgpack()
+        try:
+            return msgpack.unpackb(data, raw=False)
+        except (msgpack.UnpackException, ValueError) as error:
+            raise ValueError(f"Invalid MessagePack metadata: {error}") from error
+
+
+def _msgpack():
+    try:
+        import msgpack
+    except ImportError as error:
+        raise ImportError(
+            "msgpack is required by the msgpack metadata codec, "
+            "install it with `pip install amnesis[msgpack]`"
+        ) from error
+
+    return msgpack
+
+
+CODECS = {
+    "json": JsonCodec,
+    "msgpack": MsgpackCodec,
+}
+
+# Codec of each metadata file name
+FILE_NAMES = {codec.file_name: name for name, codec in CODECS.items()}
+
+
+def get_codec(codec: Union[str, MetadataCodec]):
+    """
+    Get a codec instance from its name in `CODECS`, codec instances are returned as is.
+    """
+    if isinstance(codec, MetadataCodec):
+        return codec
+
+    if codec not in CODECS:
+        raise ValueError(f"Unknown metadata codec {codec}. Available codecs are: {', '.join(CODECS)}")
+
+    return CODECS[codec]()
+
+
+def get_path_codec(path: pathlib.Path):
+    """
+    Get the codec of a metadata file from its name, JSON for unknown names.
+    """
+    return get_codec(FILE_NAMES.get(path.name, "json"))
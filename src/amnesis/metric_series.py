@@ -0,0 +1,102 @@
+"""
+Append-only binary storage of step-indexed metrics.
+
+Each metric is stored in its own file of fixed-width little-endian records
+(step: int64, timestamp: float64, value: float64).
+"""
+
+import functools
+import pathlib
+import struct
+import time
+import urllib.parse
+
+RECORD = struct.Struct("<qdd")
+DTYPE = [("step", "<i8"), ("timestamp", "<f8"), ("value", "<f8")]
+SUFFIX = ".bin"
+
+
+def series_path(directory: pathlib.Path, name: str):
+    return directory / (urllib.parse.quote(name, safe="") + SUFFIX)
+
+
+def series_name(path: pathlib.Path):
+    return urllib.parse.unquote(path.name[: -len(SUFFIX)])
+
+
+def read_series(path: pathlib.Path):
+    """
+    Read a metric series as a NumPy structured array with the fields
+    `step`, `timestamp` and `value`.
+    """
+    try:
+        import numpy
+    except ImportError as error:
+        raise ImportError("NumPy is required to read metric series") from error
+
+    return numpy.fromfile(path, dtype=numpy.dtype(DTYPE))
+
+
+class MetricSeries:
+    """
+    Buffered writer of the points of one metric
+    """
+
+    def __init__(self, path: pathlib.Path, buffer_size: int = 4096, writer=None):
+        """
+        :param path: path of the series file, points are appended to it if it exists
+        :param buffer_size: number of points kept in memory before being written
+        :param writer: optional `BackgroundWriter` the writes are handed to
+        """
+        self.path = path
+        self.buffer_size = buffer_size
+        self.writer = writer
+
+        self._buffer = bytearray()
+        self._pending = 0
+        self.last_step = -1
+
+        if path.exists() and path.stat().st_size >= RECORD.size:
+            with path.open("rb") as file:
+                file.seek(-RECORD.size, 2)
+                self.last_step = RECORD.unpack(file.read(RECORD.size))[0]
+
+    def append(self, value: float, step: int = None, timestamp: float = None):
+        """
+        :param value: value of the metric
+        :param step: step of the point, defaults to the previous step + 1
+        :param timestamp: UNIX timestamp of the point, defaults to now
+        """
+        if step is None:
+            step = self.last_step + 1
+        if timestamp is None:
+            timestamp = time.time()
+
+        self._buffer += RECORD.pack(step, timestamp, value)
+        self._pending += 1
+        self.last_step = step
+
+        if self._pending >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+
+        buffer = self._buffer
+        if self.writer is not None and not self.writer.submit(
+            functools.partial(self._write, buffer)
+        ):
+            # The writer is behind, the points are written with the next flush
+            return
+
+        self._buffer = bytearray()
+        self._pending = 0
+
+        if self.writer is None:
+            self._write(buffer)
+
+    def _write(self, buffer: bytearray):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("ab") as file:
+            file.write(buffer)
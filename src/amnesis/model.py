@@ -3,6 +3,9 @@ import pathlib
 
 
 class ModelSerializer(abc.ABC):
+    # True if `load_mmap` maps the model from disk instead of reading it in memory
+    supports_mmap = False
+
     @abc.abstractmethod
     def save(self, model, path: pathlib.Path):
         pass
@@ -10,3 +13,9 @@ class ModelSerializer(abc.ABC):
     @abc.abstractmethod
     def load(self, path: pathlib.Path):
         pass
+
+    def load_mmap(self, path: pathlib.Path):
+        """
+        Load a model memory-mapped from disk. Only called if `supports_mmap` is True.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support memory-mapped loading")
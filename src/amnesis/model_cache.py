@@ -0,0 +1,85 @@
+"""
+Process-wide cache of the models loaded from a repository.
+"""
+
+import collections
+import threading
+from typing import Callable, Hashable
+
+_MISSING = object()
+
+
+class ModelCache:
+    """
+    Least recently used cache of models, evicted by size.
+
+    The size of a model is an estimate of the memory it holds, memory-mapped models
+    are shared with the page cache and count as 0 bytes, they are only bounded by
+    `max_entries`.
+    """
+
+    def __init__(self, max_bytes: int = 2 * 1024**3, max_entries: int = 128):
+        """
+        :param max_bytes: maximum total size of the cached models
+        :param max_entries: maximum number of cached models
+        """
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+
+        self._entries = collections.OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self):
+        return self._size
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable):
+        return key in self._entries
+
+    def get(self, key: Hashable, default=None):
+        with self._lock:
+            if key not in self._entries:
+                return default
+
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+    def put(self, key: Hashable, model, size: int):
+        with self._lock:
+            if key in self._entries:
+                self._size -= self._entries.pop(key)[1]
+
+            # Models larger than the cache are not cached
+            if size > self.max_bytes:
+                return
+
+            self._entries[key] = (model, size)
+            self._size += size
+            self._evict()
+
+    def get_or_load(self, key: Hashable, load: Callable[[], object], size: int):
+        model = self.get(key, _MISSING)
+        if model is _MISSING:
+            model = load()
+            self.put(key, model, size)
+
+        return model
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _evict(self):
+        while self._entries and (
+            self._size > self.max_bytes or len(self._entries) > self.max_entries
+        ):
+            _, (_, size) = self._entries.popitem(last=False)
+            self._size -= size
+
+
+MODEL_CACHE = ModelCache()
@@ -0,0 +1,100 @@
+"""
+Registry of the experiment names already taken by a model.
+
+Every name is reserved by atomically creating a marker file, so lookups and
+reservations are a single filesystem operation and two processes can never
+reserve the same name.
+"""
+
+import os
+import pathlib
+import shutil
+import urllib.parse
+import warnings
+from typing import Callable, Iterable, Tuple
+
+
+class NameRegistry:
+    """
+    Per-model registry of reserved experiment names
+    """
+
+    READY_MARKER = ".ready"
+
+    def __init__(self, model_dir: pathlib.Path, dir_name: str = ".names"):
+        """
+        :param model_dir: directory of the model
+        :param dir_name: name of the registry directory inside the model directory
+        """
+        self.path = model_dir / dir_name
+
+    def initialize(self, existing: Callable[[], Iterable[Tuple[str, str]]]):
+        """
+        Create the registry if it does not exist yet.
+
+        The registry is filled in a temporary directory and published with a rename,
+        so other processes never reserve names in a partially filled registry.
+
+        :param existing: callable returning the (name, uuid) pairs of the experiments
+            created before the registry existed
+        """
+        if self.path.exists():
+            return
+
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        if tmp_path.exists():
+            shutil.rmtree(tmp_path)
+        tmp_path.mkdir(parents=True)
+
+        try:
+            for name, uuid in existing():
+                try:
+                    self._create_marker(tmp_path / self._key(name), uuid)
+                except FileExistsError:
+                    # The first experiment keeps the name
+                    warnings.warn(f"Experiment name {name} is used by several experiments")
+
+            # The registry is never empty, so the rename fails if another process
+            # published its registry first.
+            self._create_marker(tmp_path / self.READY_MARKER, "")
+
+            try:
+                os.rename(tmp_path, self.path)
+            except OSError:
+                pass
+        finally:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+    def exists(self, name: str):
+        return (self.path / self._key(name)).exists()
+
+    def reserve(self, name: str, uuid: str):
+        """
+        Atomically reserve a name.
+
+        :return: True if the name was reserved, False if it is already taken
+        """
+        try:
+            self._create_marker(self.path / self._key(name), uuid)
+        except FileExistsError:
+            return False
+
+        return True
+
+    def release(self, name: str):
+        marker = self.path / self._key(name)
+        if marker.exists():
+            marker.unlink()
+
+    @staticmethod
+    def _key(name: str):
+        # Dots are escaped so that names such as ".." or ".ready" stay plain files
+        return urllib.parse.quote(name, safe="").replace(".", "%2E")
+
+    @staticmethod
+    def _create_marker(path: pathlib.Path, uuid: str):
+        file_descriptor = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        try:
+            os.write(file_descriptor, uuid.encode())
+        finally:
+            os.close(file_descriptor)
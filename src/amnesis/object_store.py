@@ -0,0 +1,107 @@
+"""
+Content-addressed store of artifact files.
+
+Every file is stored once under `objects/<hash[:2]>/<hash[2:]>`, experiments
+reference the stored objects through hardlinks and a manifest of their artifacts.
+"""
+
+import hashlib
+import os
+import pathlib
+import stat
+import threading
+
+from .utils import transfer_file
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path: pathlib.Path):
+    digest = hashlib.sha256()
+    buffer = bytearray(CHUNK_SIZE)
+    view = memoryview(buffer)
+
+    with path.open("rb", buffering=0) as file:
+        while True:
+            size = file.readinto(buffer)
+            if not size:
+                break
+            digest.update(view[:size])
+
+    return digest.hexdigest()
+
+
+class ObjectStore:
+    """
+    Store of deduplicated files keyed by their SHA-256
+    """
+
+    def __init__(self, path: pathlib.Path):
+        """
+        :param path: directory of the store
+        """
+        self.path = path
+
+    def object_path(self, digest: str):
+        return self.path / digest[:2] / digest[2:]
+
+    def contains(self, digest: str):
+        return self.object_path(digest).exists()
+
+    def put(self, source: pathlib.Path, mode: str = "copy"):
+        """
+        Add a file to the store. The file is only transferred if its content is not
+        already stored.
+
+        :param source: path of the file
+        :param mode: how the file is transferred to the store, see `transfer_file`.
+            "symlink" is not supported and falls back to a copy. "hardlink" clones the
+            file with a reflink, or copies it, so that editing the source never changes
+            a stored object. With "move", the source is removed even when its content
+            is already stored.
+        :return: hash of the file and strategy used, "dedup" if the content was already stored
+        """
+        digest = hash_file(source)
+        destination = self.object_path(digest)
+
+        if destination.exists():
+            if mode == "move":
+                source.unlink()
+            return digest, "dedup"
+
+        if mode == "symlink":
+            mode = "copy"
+        elif mode == "hardlink":
+            # Objects are only hardlinked from the store to the experiments
+            mode = "reflink"
+
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = destination.with_name(
+            f"{destination.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        try:
+            strategy = transfer_file(source, tmp_path, mode)
+            os.chmod(tmp_path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+            os.replace(tmp_path, destination)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+        return digest, strategy
+
+    def link(self, digest: str, destination: pathlib.Path):
+        """
+        Hardlink a stored object to a destination.
+
+        :return: True if the link was created, False if the filesystem does not support it
+        """
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        if destination.exists():
+            destination.unlink()
+
+        try:
+            os.link(self.object_path(digest), destination)
+        except OSError:
+            return False
+
+        return True
@@ -0,0 +1,195 @@
+"""
+Segment files holding the metadata of many experiments.
+
+Packing folds the metadata files of finished experiments into a segment, like the
+packed objects of git, to save inodes and directory listings. Each segment
+`segment-<n>.pack` is a header followed by the encoded metadata of its experiments,
+and comes with an index `segment-<n>.idx` of the offset and length of every
+experiment, sorted by uuid. Segments are never modified once written, a segment
+without index is ignored.
+"""
+
+import mmap
+import os
+import pathlib
+import struct
+from typing import Iterable, Iterator, List, Set, Tuple
+
+from .experiment import Experiment
+from .metadata_codec import MetadataCodec, get_codec
+from .utils import atomic_write
+
+SEGMENT_MAGIC = b"AMNSEG01"
+INDEX_MAGIC = b"AMNIDX01"
+
+# Magic and name of the metadata codec
+SEGMENT_HEADER = struct.Struct("<8s16s")
+# uuid, offset and length of the metadata of an experiment
+INDEX_RECORD = struct.Struct("<32sQI")
+
+
+class Segment:
+    """
+    Read-only segment of packed experiments
+    """
+
+    def __init__(self, path: pathlib.Path):
+        """
+        :param path: path of the `.pack` file
+        """
+        self.path = path
+        self.index_path = path.with_suffix(".idx")
+
+    def read_index(self) -> List[Tuple[str, int, int]]:
+        """
+        :return: uuid, offset and length of every experiment, sorted by uuid
+        """
+        data = self.index_path.read_bytes()
+        if data[: len(INDEX_MAGIC)] != INDEX_MAGIC:
+            raise ValueError(f"Invalid segment index {self.index_path}")
+
+        return [
+            (uuid.rstrip(b"\0").decode("ascii"), offset, length)
+            for uuid, offset, length in INDEX_RECORD.iter_unpack(data[len(INDEX_MAGIC) :])
+        ]
+
+    def uuids(self):
+        return [uuid for uuid, _, _ in self.read_index()]
+
+    def iter_experiments(self, exclude: Set[str] = frozenset()) -> Iterator[Experiment]:
+        """
+        :param exclude: uuids of experiments to skip without decoding them
+        """
+        index = self.read_index()
+        if not index:
+            return
+
+        with self.path.open("rb") as file:
+            codec = self._read_codec(file)
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                for uuid, offset, length in sorted(index, key=lambda record: record[1]):
+                    if uuid not in exclude:
+                        yield Experiment.from_dict(codec.decode(data[offset : offset + length]))
+
+    def codec_name(self):
+        with self.path.open("rb") as file:
+            return self._read_codec(file).name
+
+    @staticmethod
+    def _read_codec(file) -> MetadataCodec:
+        magic, codec = SEGMENT_HEADER.unpack(file.read(SEGMENT_HEADER.size))
+        if magic != SEGMENT_MAGIC:
+            raise ValueError(f"Invalid segment {file.name}")
+
+        return get_codec(codec.rstrip(b"\0").decode("ascii"))
+
+
+class PackStore:
+    """
+    Segments of the packed experiments of a model
+    """
+
+    def __init__(self, path: pathlib.Path):
+        """
+        :param path: directory of the segments
+        """
+        self.path = path
+
+    def segments(self) -> List[Segment]:
+        if not self.path.is_dir():
+            return []
+
+        return [
+            Segment(path.with_suffix(".pack"))
+            for path in sorted(self.path.glob("segment-*.idx"))
+        ]
+
+    def uuids(self) -> Set[str]:
+        return {uuid for segment in self.segments() for uuid in segment.uuids()}
+
+    def iter_experiments(self, exclude: Set[str] = frozenset()) -> Iterator[Experiment]:
+        """
+        :param exclude: uuids of experiments to skip, e.g. experiments also stored loose
+        """
+        seen = set(exclude)
+        for segment in self.segments():
+            for experiment in segment.iter_experiments(seen):
+                seen.add(experiment.uuid)
+                yield experiment
+
+    def write(self, experiments: Iterable[Experiment], codec: MetadataCodec) -> Segment:
+        """
+        Write a new segment. The segment is published by writing its index last.
+
+        :return: the segment, or None if there are no experiments
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        segment = Segment(self.path / f"segment-{self._next_number():06d}.pack")
+
+        index = []
+        with atomic_write(segment.path, "wb") as file:
+            file.write(SEGMENT_HEADER.pack(SEGMENT_MAGIC, codec.name.encode("ascii")))
+            offset = SEGMENT_HEADER.size
+            for experiment in experiments:
+                data = codec.encode(experiment.to_dict())
+                file.write(data)
+                index.append((experiment.uuid, offset, len(data)))
+                offset += len(data)
+
+        if not index:
+            segment.path.unlink()
+            return None
+
+        index.sort()
+        with atomic_write(segment.index_path, "wb") as file:
+            file.write(INDEX_MAGIC)
+            for uuid, offset, length in index:
+                file.write(INDEX_RECORD.pack(uuid.encode("ascii"), offset, length))
+
+        return segment
+
+    def remove(self, uuids: Set[str]):
+        """
+        Remove experiments by rewriting the segments holding them into new segments.
+
+        :return: number of removed experiments
+        """
+        removed = 0
+        for segment in self.segments():
+            segment_uuids = set(segment.uuids())
+            if not segment_uuids & uuids:
+                continue
+
+            codec = get_codec(segment.codec_name())
+            self.write(segment.iter_experiments(exclude=uuids), codec)
+
+            # The index is removed first, a segment without index is ignored
+            segment.index_path.unlink()
+            segment.path.unlink()
+            removed += len(segment_uuids & uuids)
+
+        return removed
+
+    def _next_number(self):
+        numbers = [
+            int(path.stem.split("-")[1])
+            for path in self.path.glob("segment-*.pack")
+            if path.stem.split("-")[1].isdigit()
+        ]
+        return max(numbers, default=0) + 1
+
+
+def remove_loose_metadata(experiment_dir: pathlib.Path, file_name: str):
+    """
+    Remove the metadata file of a packed experiment, and its directory if it is empty.
+    """
+    try:
+        (experiment_dir / file_name).unlink()
+    except FileNotFoundError:
+        pass
+
+    try:
+        os.rmdir(experiment_dir)
+    except OSError:
+        # Models, artifacts or metric series of the experiment stay loose
+        pass
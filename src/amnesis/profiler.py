@@ -0,0 +1,276 @@
+"""
+Spans timing the parts of an experiment, see `ExperimentContext.span`.
+
+A span measures the wall time and the CPU time of the process spent in a block of
+code. Spans opened inside another span are nested, their name is the path of the
+open spans, e.g. "train/epoch". Repeated spans are aggregated: the count, total times
+and the median and 99th percentile of the wall time are kept, the percentiles are
+computed from a bounded random sample of the durations.
+
+The peak memory of the spans is optionally measured above its value when the span
+started, either as the memory traced by `tracemalloc` or as the resident set size of
+the process. The resident set size is only sampled when the span starts and ends, its
+peak inside the span is known when the span raised the peak of the process and is
+otherwise approximated by its value at the end. Both are process-wide, spans of
+concurrent threads see the memory of each other.
+"""
+
+import functools
+import math
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+MEMORY_MODES = (None, "tracemalloc", "rss")
+
+# Number of durations of a span kept to compute its percentiles
+SAMPLE_SIZE = 1024
+
+
+class SpanStats:
+    """
+    Aggregated measures of the runs of a span
+    """
+
+    __slots__ = ("count", "wall", "cpu", "memory_peak", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.memory_peak = None
+        self.samples: List[float] = []
+
+    def add(self, wall: float, cpu: float, memory: int = None, rng: random.Random = None):
+        self.count += 1
+        self.wall += wall
+        self.cpu += cpu
+        if memory is not None and (self.memory_peak is None or memory > self.memory_peak):
+            self.memory_peak = memory
+
+        # Reservoir sampling keeps a uniform sample of the durations
+        if len(self.samples) < SAMPLE_SIZE:
+            self.samples.append(wall)
+        else:
+            index = (rng or random).randrange(self.count)
+            if index < SAMPLE_SIZE:
+                self.samples[index] = wall
+
+    def percentile(self, q: float):
+        """
+        :param q: percentile between 0 and 100, nearest-rank on the sampled durations
+        """
+        if not self.samples:
+            return None
+
+        samples = sorted(self.samples)
+        rank = max(math.ceil(q * len(samples) / 100), 1)
+        return samples[rank - 1]
+
+    def to_dict(self, memory_key: str = None):
+        stats = {
+            "count": self.count,
+            "wall": round(self.wall, 6),
+            "cpu": round(self.cpu, 6),
+            "p50": round(self.percentile(50), 6),
+            "p99": round(self.percentile(99), 6),
+        }
+        if memory_key is not None:
+            stats[memory_key] = self.memory_peak
+
+        return stats
+
+
+class _Frame:
+    __slots__ = ("path", "wall", "cpu", "memory", "outer_peak", "children_peak")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.memory = 0
+        self.outer_peak = 0
+        self.children_peak = 0
+
+
+class Span:
+    """
+    Context manager measuring a span, created by `Profiler.span`
+    """
+
+    __slots__ = ("profiler", "name", "frame")
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+        self.frame = None
+
+    def __enter__(self):
+        self.frame = self.profiler._enter(self.name)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler._exit(self.frame)
+
+
+class Profiler:
+    """
+    Aggregated spans of an experiment
+    """
+
+    def __init__(self, memory: str = None):
+        """
+        :param memory: how the peak memory of the spans is measured, None to not measure it,
+            "tracemalloc" for the memory allocated by Python or "rss" for the resident set
+            size of the process, both measured above their value when the span starts
+        """
+        if memory not in MEMORY_MODES:
+            raise ValueError(
+                f"Unknown memory mode {memory}. Available modes are: tracemalloc, rss"
+            )
+        if memory == "rss" and _max_rss is None:
+            raise ValueError("The rss memory mode is not supported on this platform")
+
+        self.memory = memory
+        self.stats: Dict[str, SpanStats] = {}
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._rng = random.Random(0)
+        self._started_tracemalloc = False
+
+    def span(self, name: str) -> Span:
+        """
+        :param name: name of the span, nested in the spans open in the current thread
+        """
+        return Span(self, name)
+
+    def timed(self, func: Callable = None, name: str = None):
+        """
+        Decorator measuring each call of a function as a span, used as `@timed` or
+        `@timed(name="step")`.
+
+        :param name: name of the span, defaults to the qualified name of the function
+        """
+        if func is None:
+            return functools.partial(self.timed, name=name)
+
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with Span(self, span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    def summary(self) -> Dict[str, dict]:
+        """
+        :return: measures of each span by path, in the order the spans were first opened
+        """
+        memory_key = {"tracemalloc": "memory_peak", "rss": "rss_peak"}.get(self.memory)
+        with self._lock:
+            return {
+                path: stats.to_dict(memory_key)
+                for path, stats in self.stats.items()
+                if stats.count
+            }
+
+    def close(self):
+        """
+        Stop tracemalloc if it was started by the profiler.
+        """
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def _stack(self) -> List[_Frame]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _enter(self, name: str):
+        stack = self._stack()
+        path = f"{stack[-1].path}/{name}" if stack else name
+        if path not in self.stats:
+            with self._lock:
+                self.stats.setdefault(path, SpanStats())
+
+        frame = _Frame(path)
+        if self.memory == "tracemalloc":
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+            frame.memory, frame.outer_peak = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+        elif self.memory == "rss":
+            frame.memory = _rss()
+            frame.outer_peak = _max_rss()
+
+        stack.append(frame)
+        frame.cpu = time.process_time()
+        frame.wall = time.perf_counter()
+        return frame
+
+    def _exit(self, frame: _Frame):
+        wall = time.perf_counter() - frame.wall
+        cpu = time.process_time() - frame.cpu
+
+        stack = self._stack()
+        stack.pop()
+
+        memory = None
+        if self.memory == "tracemalloc" and tracemalloc.is_tracing():
+            peak = max(tracemalloc.get_traced_memory()[1], frame.children_peak)
+            memory = max(peak - frame.memory, 0)
+            if stack:
+                # The peak was reset when the span started, the parent keeps the peak
+                # it had reached before
+                parent = stack[-1]
+                parent.children_peak = max(parent.children_peak, peak, frame.outer_peak)
+        elif self.memory == "rss":
+            peak = _rss()
+            max_rss = _max_rss()
+            if max_rss > frame.outer_peak:
+                # The peak of the process was raised, so it was reached inside the span
+                peak = max(peak, max_rss)
+            memory = max(peak - frame.memory, 0)
+
+        with self._lock:
+            self.stats[frame.path].add(wall, cpu, memory, self._rng)
+
+
+def _get_max_rss():
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    # Kilobytes on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return lambda: resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def _get_rss():
+    try:
+        page_size = os.sysconf("SC_PAGE_SIZE")
+        with open("/proc/self/statm", "rb") as file:
+            file.read()
+    except (AttributeError, ValueError, OSError):
+        # Without procfs, only the peak of the process is known
+        return _max_rss
+
+    def rss():
+        with open("/proc/self/statm", "rb") as file:
+            return int(file.read().split()[1]) * page_size
+
+    return rss
+
+
+_max_rss = _get_max_rss()
+_rss = None if _max_rss is None else _get_rss()
@@ -0,0 +1,380 @@
+"""
+Small and safe expression language filtering experiments.
+
+Expressions use the Python syntax, restricted to comparisons of fields with constants
+or other fields, combined with `and`, `or` and `not`:
+
+    hyperparameters.lr < 1e-3 and metrics.val_acc > 0.9
+    metrics["train/loss"] <= 0.1 or name in ("baseline", "best")
+    date >= "2024-01-01" and not status == "failed"
+
+Fields are `name`, `date`, `model_name` (or `model`), `uuid`, `status`, `time`,
+`hyperparameters.<name>`, `metrics.<name>` and `git.<name>` (`git.commit`, `git.branch`
+or `git.dirty`). A comparison involving a missing field, a NaN or values of different
+types is false, booleans are numbers.
+
+`value in field` tests whether a string field contains a substring, a list field
+contains an element or a dictionary field contains a key. `field in (...)` tests
+whether a field is one of the listed values.
+
+A query is evaluated in Python on experiments and can be compiled to a SQL condition
+on the catalog.
+"""
+
+import ast
+import math
+import operator
+from typing import Any, Callable, List, Tuple
+
+from .experiment import Experiment
+
+FIELDS = {
+    "name": "name",
+    "date": "date",
+    "model": "model_name",
+    "model_name": "model_name",
+    "uuid": "uuid",
+    "status": "status",
+    "time": "time",
+}
+DICT_FIELDS = ("hyperparameters", "metrics", "git")
+
+OPERATORS = {
+    ast.Eq: (operator.eq, "="),
+    ast.NotEq: (operator.ne, "!="),
+    ast.Lt: (operator.lt, "<"),
+    ast.LtE: (operator.le, "<="),
+    ast.Gt: (operator.gt, ">"),
+    ast.GtE: (operator.ge, ">="),
+    ast.In: (lambda left, right: left in right, "IN"),
+    ast.NotIn: (lambda left, right: left not in right, "NOT IN"),
+}
+
+_MISSING = object()
+
+# Placeholder of the metadata column in the compiled SQL
+_COLUMN = "{column}"
+
+# Kind of a JSON value from its type, booleans are numbers as in Python
+_SQL_KINDS = (
+    "CASE {type} WHEN 'integer' THEN 'number' WHEN 'real' THEN 'number' "
+    "WHEN 'true' THEN 'number' WHEN 'false' THEN 'number' WHEN 'text' THEN 'text' "
+    "WHEN 'array' THEN 'list' WHEN 'object' THEN 'object' END"
+)
+
+
+class QueryError(ValueError):
+    """
+    Invalid query expression
+    """
+
+
+class Query:
+    """
+    Compiled filter expression
+    """
+
+    def __init__(self, expression: str):
+        """
+        :param expression: filter expression, see the module documentation
+        :raise QueryError: if the expression is not valid
+        """
+        self.expression = expression
+
+        try:
+            tree = ast.parse(expression, mode="eval")
+        except SyntaxError as error:
+            raise QueryError(f"Invalid expression {expression!r}: {error.msg}") from error
+
+        self._predicate = self._compile(tree.body)
+        self._sql = self._compile_sql(tree.body)
+
+    def __call__(self, experiment: Experiment) -> bool:
+        return self._predicate(experiment)
+
+    def to_sql(self, column: str = "metadata") -> Tuple[str, List[Any]]:
+        """
+        Compile the query to a SQL condition on a column of JSON metadata.
+
+        :return: the condition and its parameters
+        """
+        return self._sql(column)
+
+    def _compile(self, node: ast.AST) -> Callable[[Experiment], bool]:
+        if isinstance(node, ast.BoolOp):
+            operands = [self._compile(value) for value in node.values]
+            if isinstance(node.op, ast.And):
+                return lambda experiment: all(operand(experiment) for operand in operands)
+            return lambda experiment: any(operand(experiment) for operand in operands)
+
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            operand = self._compile(node.operand)
+            return lambda experiment: not operand(experiment)
+
+        if isinstance(node, ast.Compare):
+            comparisons = []
+            left = node.left
+            for op, right in zip(node.ops, node.comparators):
+                comparisons.append(self._compile_comparison(left, op, right))
+                left = right
+            return lambda experiment: all(comparison(experiment) for comparison in comparisons)
+
+        raise QueryError(
+            f"Unsupported expression {ast.unparse(node)!r}, expected a comparison"
+        )
+
+    def _compile_comparison(self, left: ast.AST, op: ast.cmpop, right: ast.AST):
+        if type(op) not in OPERATORS:
+            raise QueryError(f"Unsupported operator in {self.expression!r}")
+        if isinstance(op, (ast.In, ast.NotIn)):
+            self._check_membership(left, right)
+
+        compare = OPERATORS[type(op)][0]
+        get_left = self._compile_operand(left)
+        get_right = self._compile_operand(right)
+        is_membership = isinstance(op, (ast.In, ast.NotIn))
+
+        def comparison(experiment):
+            left_value = get_left(experiment)
+            right_value = get_right(experiment)
+            if left_value is _MISSING or right_value is _MISSING:
+                return False
+
+            # Values of different types never compare, as in the SQL compilation
+            left_kind = _kind(left_value)
+            if is_membership:
+                right_kind = _kind(right_value)
+                if right_kind == "list" and left_kind not in ("number", "text"):
+                    return False
+                if right_kind in ("text", "object") and left_kind != "text":
+                    return False
+                if right_kind not in ("list", "text", "object"):
+                    return False
+            elif left_kind != _kind(right_value) or left_kind not in ("number", "text"):
+                return False
+
+            try:
+                return bool(compare(left_value, right_value))
+            except TypeError:
+                return False
+
+        return comparison
+
+    def _check_membership(self, left: ast.AST, right: ast.AST):
+        if isinstance(left, (ast.List, ast.Tuple)):
+            raise QueryError(f"The left operand of in must be a single value in {ast.unparse(left)!r}")
+        if self._field_path(right) is None and not isinstance(right, (ast.List, ast.Tuple)):
+            raise QueryError(
+                f"The right operand of in must be a field or a list of values, got {ast.unparse(right)!r}"
+            )
+
+    def _compile_operand(self, node: ast.AST):
+        path = self._field_path(node)
+        if path is not None:
+            return lambda experiment: _get_field(experiment, path)
+
+        value = self._constant(node)
+        return lambda experiment: value
+
+    def _compile_sql(self, node: ast.AST):
+        if isinstance(node, ast.BoolOp):
+            operands = [self._compile_sql(value) for value in node.values]
+            keyword = " AND " if isinstance(node.op, ast.And) else " OR "
+            return lambda column: _join_sql(keyword, [operand(column) for operand in operands])
+
+        if isinstance(node, ast.UnaryOp):
+            operand = self._compile_sql(node.operand)
+
+            def negation(column):
+                sql, parameters = operand(column)
+                return f"NOT ({sql})", parameters
+
+            return negation
+
+        operands = []
+        left = node.left
+        for op, right in zip(node.ops, node.comparators):
+            operands.append(self._compile_sql_comparison(left, op, right))
+            left = right
+
+        return lambda column: _join_sql(" AND ", [operand(column) for operand in operands])
+
+    def _compile_sql_comparison(self, left: ast.AST, op: ast.cmpop, right: ast.AST):
+        keyword = OPERATORS[type(op)][1]
+        left_expression, left_parameters, left_kind = self._compile_sql_operand(left)
+        right_expression, right_parameters, right_kind = self._compile_sql_operand(right)
+
+        if keyword in ("IN", "NOT IN"):
+            self._check_membership(left, right)
+
+        if keyword in ("IN", "NOT IN") and self._field_path(right) is not None:
+            sql, parameters = self._compile_sql_field_membership(
+                left_expression, left_parameters, left_kind, self._field_path(right)
+            )
+            if keyword == "NOT IN":
+                sql = f"NOT ({sql})"
+        elif keyword in ("IN", "NOT IN"):
+            sql = (
+                f"{left_kind} IN ('number', 'text') "
+                f"AND {left_expression} {keyword} {right_expression}"
+            )
+            parameters = left_parameters + right_parameters
+        else:
+            # Values of different types never compare, as in Python
+            sql = (
+                f"{left_kind} = {right_kind} AND {left_kind} IN ('number', 'text') "
+                f"AND {left_expression} {keyword} {right_expression}"
+            )
+            parameters = left_parameters + right_parameters
+
+        # Missing values make the comparison false instead of NULL
+        sql = f"COALESCE(({sql}), 0)"
+
+        return lambda column: (sql.replace(_COLUMN, column), parameters)
+
+    def _compile_sql_field_membership(
+        self, left_expression: str, left_parameters: List[Any], left_kind: str, path: List[str]
+    ):
+        """
+        Membership of a value in a field: substring of a string, element of a list or
+        key of a dictionary, as the `in` operator of Python.
+        """
+        json_path = _json_path(path)
+        right_expression = f"json_extract({_COLUMN}, '{json_path}')"
+        elements = f"json_each({_COLUMN}, '{json_path}') AS element"
+        sql = (
+            f"CASE json_type({_COLUMN}, '{json_path}') "
+            f"WHEN 'text' THEN CASE WHEN {left_kind} = 'text' "
+            f"THEN instr({right_expression}, {left_expression}) > 0 END "
+            f"WHEN 'array' THEN CASE WHEN {left_kind} IN ('number', 'text') "
+            f"THEN EXISTS (SELECT 1 FROM {elements} WHERE element.value = {left_expression} "
+            f"AND {_SQL_KINDS.replace('{type}', 'element.type')} = {left_kind}) END "
+            f"WHEN 'object' THEN CASE WHEN {left_kind} = 'text' "
+            f"THEN EXISTS (SELECT 1 FROM {elements} WHERE element.key = {left_expression}) END "
+            "END"
+        )
+        # The left operand appears three times
+        return sql, left_parameters * 3
+
+    def _compile_sql_operand(self, node: ast.AST):
+        """
+        :return: SQL expression of the operand, its parameters and the SQL expression of its kind
+        """
+        path = self._field_path(node)
+        if path is not None:
+            json_path = _json_path(path)
+            expression = f"json_extract({_COLUMN}, '{json_path}')"
+            kind = _SQL_KINDS.replace("{type}", f"json_type({_COLUMN}, '{json_path}')")
+            return expression, [], kind
+
+        value = self._constant(node)
+        if isinstance(value, tuple):
+            placeholders = ", ".join("?" for _ in value)
+            return f"({placeholders})", list(value), "'list'"
+
+        kind = "'text'" if isinstance(value, str) else "'number'"
+        return "?", [value], kind
+
+    def _field_path(self, node: ast.AST):
+        """
+        :return: keys of the field in the metadata, or None if the node is a constant
+        """
+        if isinstance(node, ast.Name):
+            if node.id in DICT_FIELDS:
+                raise QueryError(f"{node.id} must be followed by a name, e.g. {node.id}.accuracy")
+            if node.id not in FIELDS:
+                raise QueryError(
+                    f"Unknown field {node.id!r}. Available fields are: "
+                    f"{', '.join(list(FIELDS) + [field + '.<name>' for field in DICT_FIELDS])}"
+                )
+            return [FIELDS[node.id]]
+
+        if isinstance(node, (ast.Attribute, ast.Subscript)):
+            if isinstance(node, ast.Attribute):
+                key = node.attr
+            elif isinstance(node.slice, ast.Constant) and isinstance(node.slice.value, str):
+                key = node.slice.value
+            else:
+                raise QueryError(f"Only string keys are supported in {ast.unparse(node)!r}")
+
+            if '"' in key:
+                raise QueryError(f"Unsupported key {key!r}")
+
+            if isinstance(node.value, ast.Name) and node.value.id in DICT_FIELDS:
+                return [node.value.id, key]
+
+            parent = self._field_path(node.value)
+            if parent is None or parent[0] not in DICT_FIELDS:
+                raise QueryError(f"Unsupported field {ast.unparse(node)!r}")
+
+            return parent + [key]
+
+        return None
+
+    def _constant(self, node: ast.AST):
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float, str, bool)):
+            return node.value
+
+        if (
+            isinstance(node, ast.UnaryOp)
+            and isinstance(node.op, (ast.USub, ast.UAdd))
+            and isinstance(node.operand, ast.Constant)
+            and isinstance(node.operand.value, (int, float))
+        ):
+            value = node.operand.value
+            return -value if isinstance(node.op, ast.USub) else value
+
+        if isinstance(node, (ast.List, ast.Tuple)):
+            return tuple(self._constant(element) for element in node.elts)
+
+        raise QueryError(
+            f"Unsupported value {ast.unparse(node)!r}, expected a field, a number, a string or a boolean"
+        )
+
+
+def _get_field(experiment: Experiment, path: List[str]):
+    value = getattr(experiment, path[0], _MISSING)
+    for key in path[1:]:
+        if not isinstance(value, dict) or key not in value:
+            return _MISSING
+        value = value[key]
+
+    # NaN is stored as null in the catalog, it is missing in both evaluations
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return _MISSING
+
+    return value
+
+
+def _kind(value):
+    if isinstance(value, (bool, int, float)):
+        return "number"
+    if isinstance(value, str):
+        return "text"
+    if isinstance(value, (list, tuple)):
+        return "list"
+    if isinstance(value, dict):
+        return "object"
+    return None
+
+
+def _json_path(path: List[str]):
+    json_path = "$" + "".join(f'."{key}"' for key in path)
+    return json_path.replace("'", "''")
+
+
+def _join_sql(keyword: str, operands: List[Tuple[str, List[Any]]]):
+    sql = keyword.join(f"({operand})" for operand, _ in operands)
+    parameters = [parameter for _, operand_parameters in operands for parameter in operand_parameters]
+    return sql, parameters
+
+
+def parse_query(expression: str):
+    """
+    :return: the compiled query, or None if the expression is empty
+    """
+    if not expression:
+        return None
+
+    return Query(expression)
+
@@ -1,10 +1,15 @@
+import concurrent.futures
 import functools
+import inspect
+import multiprocessing
 import sys
 import traceback
-from typing import List, Optional, TypedDict
+from typing import List, Optional, TypedDict, Union
 import warnings
 
+from .cache import code_fingerprint
 from .experiment_context import ExperimentContext
+from .sweep import SweepSummary, as_sampler, default_workers
 
 color_warning = lambda s: f"\033[93m{s}\033[0m"
 
@@ -13,20 +18,28 @@ class capture:
     """
     Original authors: Pietro Berkes, Andrea Maffezzoli --- https://code.activestate.com/recipes/577283-decorator-to-expose-local-variables-of-a-function-/
     Capture the local variables of the decorated function
+
+    Modes:
+    - "monitoring": `sys.monitoring` (Python 3.12+) scoped to the code object of the function
+    - "trace": trace hook removed as soon as the frame of the function starts, its locals are read once it returns
+    - "profile": global profiler called on every call and return, used when the function has no code object
+    - "auto": the fastest mode available
     """
 
-    def __init__(self, func):
+    MODES = ("auto", "monitoring", "trace", "profile")
+
+    def __init__(self, func, mode: str = "auto"):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown capture mode {mode}. Available modes are: {', '.join(self.MODES)}")
+
         self._func = func
+        self._mode = mode
 
     def __call__(self, *args, **kwargs):
         self._capt_locals = None
         res = None
 
-        def tracer(frame, event, arg):
-            if event == "return":
-                self._capt_locals = frame.f_locals.copy()
-
-        sys.setprofile(tracer)
+        stop = self._start()
         try:
             res = self._func(*args, **kwargs)
         except Exception as e:
@@ -40,18 +53,94 @@ class capture:
             raise e
 
         finally:
-            sys.setprofile(None)
+            stop()
 
         ret_locals = self._capt_locals
         del self._capt_locals
 
         return res, ret_locals
 
+    def _start(self):
+        code = getattr(inspect.unwrap(self._func), "__code__", None)
+
+        mode = self._mode
+        if mode == "auto":
+            mode = "trace" if code is not None else "profile"
+            if code is not None and hasattr(sys, "monitoring"):
+                mode = "monitoring"
+
+        match mode:
+            case "monitoring":
+                return self._start_monitoring(code)
+            case "trace":
+                return self._start_trace(code)
+            case _:
+                return self._start_profile()
+
+    def _start_monitoring(self, code):
+        monitoring = sys.monitoring
+        free_ids = [tool_id for tool_id in range(6) if monitoring.get_tool(tool_id) is None]
+
+        if not free_ids:
+            return self._start_trace(code)
+
+        tool_id = free_ids[0]
+        monitoring.use_tool_id(tool_id, "amnesis")
+
+        def on_return(_code, _offset, _retval):
+            # Frame 1 is the frame of the monitored function
+            self._capt_locals = sys._getframe(1).f_locals.copy()
+
+        monitoring.register_callback(tool_id, monitoring.events.PY_RETURN, on_return)
+        monitoring.set_local_events(tool_id, code, monitoring.events.PY_RETURN)
+
+        def stop():
+            monitoring.set_local_events(tool_id, code, monitoring.events.NO_EVENTS)
+            monitoring.register_callback(tool_id, monitoring.events.PY_RETURN, None)
+            monitoring.free_tool_id(tool_id)
+
+        return stop
+
+    def _start_trace(self, code):
+        previous_tracer = sys.gettrace()
+        frames = []
+
+        def tracer(frame, event, arg):
+            # Stop tracing as soon as the frame of the function is found, its locals
+            # are still readable from the frame object once it has returned
+            if frame.f_code is code:
+                frames.append(frame)
+                sys.settrace(previous_tracer)
+            return None
+
+        sys.settrace(tracer)
+
+        def stop():
+            sys.settrace(previous_tracer)
+            if frames:
+                self._capt_locals = frames[0].f_locals.copy()
+            frames.clear()
+
+        return stop
+
+    def _start_profile(self):
+        def tracer(frame, event, arg):
+            if event == "return":
+                self._capt_locals = frame.f_locals.copy()
+
+        sys.setprofile(tracer)
+
+        def stop():
+            sys.setprofile(None)
+
+        return stop
+
 
 class remember(ExperimentContext):
     """
     Wraps the decorated function with the Experiment context manager
     Automatically logs hyperparameters and other metrics if requested
+    Each call of the decorated function records a new experiment
     """
 
     class Log(TypedDict):
@@ -70,14 +159,40 @@ class remember(ExperimentContext):
         experiment_name: str = None,
         log: Optional[Log] = None,
         quick=False,
+        capture_mode: str = "auto",
+        asynchronous: bool = False,
+        cache: Union[bool, str] = False,
+        cache_version: str = None,
+        git_diff: bool = False,
+        profile_memory: str = None,
     ):
         """
         :param model_name: name of the model
         :param experiment_name: name of the experiment. If None, a name will be automatically generated
+            for each call. A given name can only be used by one call
         :param log: dictionary containing lists of hyperparameters and metrics to log automatically. Artefacts and other parameters must be logged manually.
         :param quick: if True, disables automatic logging of local variables using a profiler. Enabling this flag requires you to log your metrics and other parameters manually.
+        :param capture_mode: how local variables are captured, one of `capture.MODES`. "auto" only hooks the frame of the decorated function, "profile" uses the legacy global profiler.
+        :param asynchronous: if True, metadata checkpoints and metric series are written by a background thread
+        :param cache: if True, a call whose function code, arguments and hyperparameters were already recorded returns
+            the stored result instead of running the function again. If "refresh", the function always runs and its
+            result replaces the cached one
+        :param cache_version: version included in the fingerprint, changing it invalidates the cached results
+        :param git_diff: if True, the diff of the git working tree against HEAD is saved in the artifacts
+        :param profile_memory: how the peak memory of the spans is measured, None, "tracemalloc" or "rss"
         """
-        super().__init__(model_name, experiment_name)
+        if capture_mode not in capture.MODES:
+            raise ValueError(f"Unknown capture mode {capture_mode}. Available modes are: {', '.join(capture.MODES)}")
+
+        super().__init__(
+            model_name,
+            experiment_name,
+            asynchronous=asynchronous,
+            cache=cache,
+            cache_version=cache_version,
+            git_diff=git_diff,
+            profile_memory=profile_memory,
+        )
         if log and quick:
             warnings.warn(
                 color_warning(
@@ -87,9 +202,26 @@ class remember(ExperimentContext):
             )
 
         self._log = log if not quick else None
+        self._capture_mode = capture_mode
         self._exp_locals = None
 
+        # Options of the experiments run by `sweep`, each run has its own context
+        self._options = {
+            "model_name": model_name,
+            "log": log,
+            "quick": quick,
+            "capture_mode": capture_mode,
+            "asynchronous": asynchronous,
+            "cache": cache,
+            "cache_version": cache_version,
+            "git_diff": git_diff,
+            "profile_memory": profile_memory,
+        }
+        self._wrapper = None
+
     def __enter__(self):
+        # The locals captured by a previous call must not be logged again
+        self._exp_locals = None
         super().__enter__()
         return self
 
@@ -124,10 +256,99 @@ class remember(ExperimentContext):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             with self as ctx:
+                if self.cache:
+                    code = code_fingerprint(inspect.unwrap(func))
+                    if code is None:
+                        warnings.warn(color_warning(f"{func!r} cannot be fingerprinted, it is not cached."))
+                    else:
+                        hit = ctx.lookup_cache(code=code, args=args, kwargs=kwargs)
+                        if hit is not None:
+                            return self.repository.load_result(hit)
+
                 if self._log:
-                    experiment, self._exp_locals = capture(func)(ctx, *args, **kwargs)
-                    return experiment
+                    experiment, self._exp_locals = capture(func, self._capture_mode)(ctx, *args, **kwargs)
                 else:
-                    return func(ctx, *args, **kwargs)
+                    experiment = func(ctx, *args, **kwargs)
+
+                ctx.save_result(experiment)
+                return experiment
+
+        wrapper.sweep = self.sweep
+        self._wrapper = wrapper
 
         return wrapper
+
+    def sweep(self, grid_or_sampler, n_workers: int = None, start_method: str = None):
+        """
+        Run the decorated function once per set of hyperparameters on a pool of processes.
+
+        Each run is a new experiment with its own context, the hyperparameters are given
+        to the function as keyword arguments and logged. Also available as `func.sweep`
+        on the decorated function, which must be defined at the top level of a module.
+
+        :param grid_or_sampler: dictionary of the values of each hyperparameter (grid search),
+            `sweep.RandomSampler`, or any iterable of dictionaries of hyperparameters
+        :param n_workers: number of processes, capped to the number of cores
+        :param start_method: multiprocessing start method, e.g. "fork", "spawn" or "forkserver".
+            Defaults to the platform default
+        :return: `SweepSummary` of the runs, in the order of the sampler
+        """
+        if self._wrapper is None:
+            raise RuntimeError("sweep can only be used on a decorated function")
+
+        runs = list(as_sampler(grid_or_sampler))
+        if not runs:
+            return SweepSummary([])
+
+        context = multiprocessing.get_context(start_method)
+        n_workers = default_workers(len(runs), n_workers)
+
+        with concurrent.futures.ProcessPoolExecutor(n_workers, mp_context=context) as executor:
+            futures = [
+                executor.submit(_run_sweep_experiment, self._wrapper, self._options, hyperparameters)
+                for hyperparameters in runs
+            ]
+            rows = [future.result() for future in futures]
+
+        return SweepSummary(rows)
+
+
+def _run_sweep_experiment(wrapper, options: dict, hyperparameters: dict):
+    """
+    Run one experiment of a sweep in a worker process.
+
+    The decorated function is sent to the worker by reference, the undecorated
+    function is wrapped in a new `remember` context. Its name is reserved when the
+    run starts, so the contexts created by importing the module in a spawned worker
+    take no name.
+    """
+    try:
+        experiment = remember(**options)
+    except Exception as e:
+        # A run that cannot even create its context fails alone, the sweep goes on
+        return {
+            "experiment": None,
+            "uuid": None,
+            "status": "failed",
+            "error": repr(e),
+            "hyperparameters": dict(hyperparameters),
+            "metrics": {},
+        }
+
+    for name, value in hyperparameters.items():
+        experiment.log_hyperparameter(name, value)
+
+    error = None
+    try:
+        experiment(wrapper.__wrapped__)(**hyperparameters)
+    except Exception as e:
+        error = repr(e)
+
+    return {
+        "experiment": experiment.experiment.name,
+        "uuid": experiment.experiment.uuid,
+        "status": experiment.experiment.status,
+        "error": error,
+        "hyperparameters": dict(experiment.hyperparameters),
+        "metrics": dict(experiment.metrics),
+    }
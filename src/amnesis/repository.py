@@ -1,18 +1,66 @@
+import concurrent.futures
+import heapq
+import json
+import math
 import os
 import pathlib
+import shutil
+import time
+import warnings
+from typing import Iterable, List, Union
 
+from .cache import RESULT_NAME, load_result
+from .catalog import Catalog
 from .experiment import Experiment
+from .export import export_experiments
+from .metadata_codec import FILE_NAMES, get_codec
+from .metric_series import read_series, series_name, series_path
+from .model import ModelSerializer
+from .model_cache import MODEL_CACHE
+from .name_registry import NameRegistry
+from .object_store import ObjectStore
+from .pack import PackStore, remove_loose_metadata
+from .query import Query
+from .retention import GCReport, RetentionPolicy, directory_size, select_experiments
+from .serializers import get_serializer
+from .utils import FileLock, MtimeCache, atomic_write
 
 
 class Repository:
+    # Directories of the repository that are not models
+    RESERVED_DIRS = {"objects"}
+
+    DEFAULT_CONFIG = {"metadata_codec": "json", "layout": "flat"}
+
+    # Layouts of the experiment directories: `<model>/<uuid>` or `<model>/<uuid[:2]>/<uuid>`
+    LAYOUTS = ("flat", "sharded")
+
     def __init__(self):
         self.root = None
         self.dir_name = ".amnesis"
+        self.catalog_name = "catalog.db"
+        self.config_name = "config.json"
+        self.artifacts_manifest_name = "artifacts.json"
+        self.lock_name = "lock"
+        # Session caching the listings of the repository, set by `RepositorySession`
+        self.session = None
+        self._config = MtimeCache(self._read_config, lambda: [self._get_config_path()])
 
-    def init(self, path: pathlib.Path = None):
+    def init(
+        self, path: pathlib.Path = None, metadata_codec: str = "json", layout: str = "flat"
+    ):
+        """
+        :param path: directory of the repository, defaults to the current directory
+        :param metadata_codec: codec of the metadata files of new experiments, see `metadata_codec.CODECS`
+        :param layout: layout of the experiment directories, one of `LAYOUTS`
+        """
         if path is None:
             path = pathlib.Path.cwd()
 
+        # Raise before creating the repository if the codec or the layout is unknown
+        get_codec(metadata_codec)
+        self._check_layout(layout)
+
         repository_dir = path / self.dir_name
 
         if repository_dir.exists():
@@ -21,6 +69,9 @@ class Repository:
         self.root = path
         repository_dir.mkdir(parents=True, exist_ok=True)
 
+        self.set_config(metadata_codec=metadata_codec, layout=layout)
+        self.get_catalog().create()
+
     def in_repository(self):
         path = pathlib.Path.cwd()
         return self._get_root_path(path) is not None
@@ -38,51 +89,903 @@ class Repository:
 
         raise FileNotFoundError("Cannot find `.amnesis` directory")
 
+    def lock(self, shared: bool = False):
+        """
+        Advisory lock of the repository, held around mutations shared by several processes.
+
+        :param shared: if True, other processes can hold a shared lock at the same time
+        """
+        return FileLock(self.get_amnesis_dir() / self.lock_name, shared=shared)
+
+    def get_config(self):
+        """
+        Get the configuration of the repository, stored in `.amnesis/config.json`.
+        Repositories created before the configuration use the defaults. The
+        configuration is cached until the file changes.
+        """
+        return dict(self._config.get())
+
+    def set_config(self, **values):
+        with self.lock():
+            self._config.invalidate()
+            config = self.get_config()
+            config.update(values)
+
+            with atomic_write(self._get_config_path()) as file:
+                json.dump(config, file, indent=4)
+
+            self._config.invalidate()
+
+    def _get_config_path(self):
+        return self.get_amnesis_dir() / self.config_name
+
+    def _read_config(self):
+        config = dict(self.DEFAULT_CONFIG)
+
+        config_path = self._get_config_path()
+        if config_path.exists():
+            with config_path.open() as file:
+                config.update(json.load(file))
+
+        return config
+
+    def get_metadata_codec(self):
+        return get_codec(self.get_config()["metadata_codec"])
+
+    def get_metadata_path(self, model_name: str, uuid: str):
+        """
+        Path of the metadata file written for a new experiment, named after the codec
+        of the repository.
+        """
+        return self.get_experiment_dir(model_name, uuid) / self.get_metadata_codec().file_name
+
+    def get_pack_store(self, model_name: str):
+        return PackStore(self.get_model_dir(model_name) / ".packs")
+
+    def get_catalog(self):
+        return Catalog(self.get_amnesis_dir() / self.catalog_name)
+
+    def get_object_store(self):
+        return ObjectStore(self.get_amnesis_dir() / "objects")
+
+    def get_model_dir(self, model_name: str):
+        return self.get_amnesis_dir() / model_name
+
+    def get_experiment_dir(self, model_name: str, uuid: str):
+        """
+        Directory of an experiment in the layout of the repository. Experiments not
+        migrated yet are found in the other layout.
+        """
+        model_dir = self.get_model_dir(model_name)
+        paths = {"flat": model_dir / uuid, "sharded": model_dir / uuid[:2] / uuid}
+
+        layout = self.get_config()["layout"]
+        path = paths[layout]
+        if not path.exists():
+            other = paths["flat" if layout == "sharded" else "sharded"]
+            if other.exists():
+                return other
+
+        return path
+
+    def migrate_layout(self, layout: str):
+        """
+        Move the experiment directories to another layout.
+
+        New experiments use the new layout as soon as the migration starts. Readers
+        find the experiments in either layout during the migration. Running
+        experiments are not moved, migrating again once they are finished moves them.
+
+        :param layout: one of `LAYOUTS`
+        :return: number of moved experiments
+        """
+        self._check_layout(layout)
+
+        count = 0
+        with self.lock():
+            self.set_config(layout=layout)
+            models = [model.name for model in self._scan_models()]
+
+            for model in models:
+                packed = self.get_pack_store(model).uuids()
+                movable = [
+                    experiment_dir
+                    for experiment_dir, _, experiment in self._iter_loose_metadata([model])
+                    if experiment is not None and experiment.status != "running"
+                ]
+                # Directories without metadata are running experiments, unless packed
+                movable += [
+                    experiment_dir
+                    for experiment_dir in self._iter_experiment_dirs([model])
+                    if experiment_dir.name in packed
+                ]
+
+                for experiment_dir in set(movable):
+                    if self._move_experiment_dir(model, experiment_dir, layout):
+                        count += 1
+
+                if layout == "flat":
+                    self._remove_empty_shards(self.get_model_dir(model))
+
+        return count
+
+    def _move_experiment_dir(self, model_name: str, experiment_dir: pathlib.Path, layout: str):
+        model_dir = self.get_model_dir(model_name)
+        uuid = experiment_dir.name
+        destination = model_dir / uuid[:2] / uuid if layout == "sharded" else model_dir / uuid
+
+        if destination == experiment_dir or destination.exists():
+            return False
+
+        destination.parent.mkdir(exist_ok=True)
+        # A rename within the filesystem, readers never see a partially moved experiment
+        os.rename(experiment_dir, destination)
+        return True
+
+    @staticmethod
+    def _remove_empty_shards(model_dir: pathlib.Path):
+        with os.scandir(model_dir) as entries:
+            for entry in entries:
+                if entry.is_dir() and len(entry.name) == 2:
+                    try:
+                        os.rmdir(entry.path)
+                    except OSError:
+                        pass
+
+    def _check_layout(self, layout: str):
+        if layout not in self.LAYOUTS:
+            raise ValueError(
+                f"Unknown layout {layout}. Available layouts are: {', '.join(self.LAYOUTS)}"
+            )
+
+    def create_model_dir(self, model_name: str):
+        if model_name in self.RESERVED_DIRS:
+            raise ValueError(f"{model_name} is a reserved name and cannot be used as a model name")
+
+        model_dir = self.get_model_dir(model_name)
+
+        with self.lock():
+            model_dir.mkdir(parents=True, exist_ok=True)
+
+            catalog = self.get_catalog()
+            if catalog.exists():
+                catalog.add_model(model_name)
+
+        self._invalidate_session()
+        return model_dir
+
+    def get_name_registry(self, model_name: str):
+        """
+        Get the registry of the experiment names taken by a model.
+
+        The registry is created from the existing experiments the first time it is used.
+        """
+        registry = NameRegistry(self.get_model_dir(model_name))
+
+        def existing():
+            experiments = self.get_experiments(model_name) or []
+            return [(experiment.name, experiment.uuid) for experiment in experiments]
+
+        registry.initialize(existing)
+        return registry
+
     def get_models(self):
+        if self.session is not None:
+            return self.session.get_models()
+
+        return self._list_models()
+
+    def get_experiments(self, model_name: str):
+        if self.session is not None:
+            return self.session.get_experiments(model_name)
+
+        return self._list_experiments(model_name)
+
+    def _list_models(self):
         amnesis_dir = self.get_amnesis_dir()
 
-        models = []
-        for model in amnesis_dir.iterdir():
-            if model.is_dir():
-                models.append(model)
+        catalog = self.get_catalog()
+        if catalog.exists():
+            models = [amnesis_dir / model for model in catalog.get_models()]
+        else:
+            models = self._scan_models()
 
         if models:
             return models
 
         return None
 
-    def get_experiments(self, model_name: str):
-        models = self.get_models()
+    def _list_experiments(self, model_name: str):
+        catalog = self.get_catalog()
+        if catalog.exists():
+            return catalog.get_experiments(model_name)
+
+        return self._scan_experiments(model_name)
+
+    def iter_experiments(
+        self,
+        models: Union[str, Iterable[str]] = None,
+        workers: int = None,
+        use_catalog: bool = True,
+        where: Union[str, Query] = None,
+    ):
+        """
+        Stream the experiments of the repository.
+
+        Without a catalog, the metadata files are found with `os.scandir` and parsed on a
+        pool of threads. Experiments are yielded as soon as they are parsed, in no
+        particular order, and at most a few files per thread are pending at a time.
+
+        :param models: name or names of the models, defaults to every model
+        :param workers: number of threads parsing metadata files, defaults to `min(32, cpu_count + 4)`
+        :param use_catalog: if False, the metadata files are read even if the repository has a catalog
+        :param where: filter expression or `Query`, see `query`. With a catalog, the filter is
+            evaluated by SQLite, otherwise while the metadata files are parsed
+        """
+        if isinstance(where, str):
+            where = Query(where)
 
         if models is None:
-            return None
+            models = [model.name for model in self.get_models() or []]
+        elif isinstance(models, str):
+            models = [models]
+
+        catalog = self.get_catalog()
+        if use_catalog and catalog.exists():
+            for model in models:
+                for experiment in catalog.iter_experiments(model, where):
+                    # SQLite compares like Python, the check is only a safeguard
+                    if where is None or where(experiment):
+                        yield experiment
+            return
+
+        # Loose metadata files take precedence over packed copies of the same experiment
+        loose = set()
+        for experiment_dir, _, experiment in self._iter_loose_metadata(models, workers, where):
+            loose.add(experiment_dir.name)
+            if experiment is not None:
+                yield experiment
+
+        for model in models:
+            for experiment in self.get_pack_store(model).iter_experiments(exclude=loose):
+                if where is None or where(experiment):
+                    yield experiment
+
+    def top_k(
+        self,
+        metric: str,
+        k: int = 10,
+        maximize: bool = False,
+        models: Union[str, Iterable[str]] = None,
+        where: Union[str, Query] = None,
+    ):
+        """
+        Best experiments on a metric, best first. Experiments without a numeric value of
+        the metric are ignored.
+
+        With a catalog, SQLite sorts and limits the experiments. Otherwise the experiments
+        are streamed through a heap of k experiments, memory does not depend on the
+        number of experiments.
+
+        :param metric: name of the metric
+        :param k: number of experiments
+        :param maximize: if True, the best experiments have the largest values
+        :param models: name or names of the models, defaults to every model
+        :param where: filter expression or `Query`, see `query`
+        """
+        if isinstance(where, str):
+            where = Query(where)
+
+        if models is None:
+            models = [model.name for model in self.get_models() or []]
+        elif isinstance(models, str):
+            models = [models]
+
+        catalog = self.get_catalog()
+        if catalog.exists():
+            return catalog.top_k(list(models), metric, k, maximize, where)
+
+        def rank(experiment: Experiment):
+            value = experiment.metrics[metric]
+            # Ties are broken by date, as in the catalog
+            return -value if maximize else value, experiment.date
+
+        experiments = (
+            experiment
+            for experiment in self.iter_experiments(models, where=where)
+            if _is_number(experiment.metrics.get(metric))
+        )
+
+        return heapq.nsmallest(k, experiments, key=rank)
+
+    def export(
+        self,
+        path: pathlib.Path,
+        format: str = None,
+        models: Union[str, Iterable[str]] = None,
+        where: Union[str, Query] = None,
+        batch_size: int = 10000,
+    ):
+        """
+        Export experiments to a Parquet, Arrow, CSV or JSON lines file, see `export_experiments`.
+
+        :param path: path of the file
+        :param format: one of "parquet", "arrow", "csv" or "jsonl", defaults to the extension of the path
+        :param models: name or names of the models, defaults to every model
+        :param where: filter expression or `Query`, see `query`
+        :param batch_size: number of rows written at a time
+        :return: number of exported experiments
+        """
+        if isinstance(where, str):
+            where = Query(where)
+
+        return export_experiments(
+            self.iter_experiments(models, where=where),
+            path,
+            format=format,
+            batch_size=batch_size,
+        )
+
+    def get_experiment(self, model_name: str, experiment: str):
+        """
+        Find an experiment of a model by uuid or by name.
+        """
+        for candidate in self.get_experiments(model_name) or []:
+            if experiment in (candidate.uuid, candidate.name):
+                return candidate
+
+        raise FileNotFoundError(f"Experiment {experiment} not found for model {model_name}")
+
+    def get_model_path(self, experiment: Experiment):
+        """
+        Path given to the serializer of the model of an experiment
+        """
+        return self.get_experiment_dir(experiment.model_name, experiment.uuid) / "model"
+
+    def load_model(
+        self,
+        model_name: str,
+        experiment,
+        serializer: Union[ModelSerializer, str],
+        mmap: bool = None,
+        cache: bool = True,
+    ):
+        """
+        Load the model logged by an experiment.
+
+        Loaded models are kept in a process-wide LRU cache, see `model_cache.MODEL_CACHE`,
+        so loading the same model twice returns the same object.
+
+        :param model_name: name of the model
+        :param experiment: `Experiment`, uuid or name of the experiment
+        :param serializer: serializer used to log the model, or name of a built-in serializer
+        :param mmap: if True, the model is memory-mapped with `serializer.load_mmap`.
+            Defaults to `serializer.supports_mmap`
+        :param cache: if False, the model is loaded without using the cache
+        """
+        if not isinstance(experiment, Experiment):
+            experiment = self.get_experiment(model_name, experiment)
+
+        serializer = get_serializer(serializer)
+        if mmap is None:
+            mmap = serializer.supports_mmap
+
+        model_path = self.get_model_path(experiment)
+        files = self._get_model_files(model_path)
+
+        if not files:
+            raise FileNotFoundError(f"No model logged by experiment {experiment.name}")
+
+        def load():
+            if mmap:
+                return serializer.load_mmap(model_path)
+            return serializer.load(model_path)
+
+        if not cache:
+            return load()
+
+        stats = [path.stat() for path in files]
+        size = sum(stat.st_size for stat in stats)
+        key = (
+            str(model_path),
+            type(serializer).__module__,
+            type(serializer).__qualname__,
+            mmap,
+            size,
+            max(stat.st_mtime_ns for stat in stats),
+        )
+
+        return MODEL_CACHE.get_or_load(key, load, 0 if mmap else size)
+
+    def find_cached_experiment(self, model_name: str, fingerprint: str):
+        """
+        Find the most recent finished experiment whose inputs have a fingerprint and
+        whose result was saved.
+
+        :return: the experiment, or None if the inputs were never recorded
+        """
+        catalog = self.get_catalog()
+        if catalog.exists():
+            candidates = catalog.find_by_fingerprint(model_name, fingerprint)
+        else:
+            candidates = [
+                experiment
+                for experiment in self.get_experiments(model_name) or []
+                if experiment.cache.get("fingerprint") == fingerprint
+                and experiment.cache.get("hit") is None
+                and experiment.status == "finished"
+            ]
+            candidates.sort(key=lambda experiment: experiment.date, reverse=True)
+
+        for candidate in candidates:
+            experiment_dir = self.get_experiment_dir(candidate.model_name, candidate.uuid)
+            if (experiment_dir / RESULT_NAME).exists():
+                return candidate
+
+        return None
+
+    def load_result(self, experiment: Experiment):
+        """
+        Load the result saved by an experiment run with the cache enabled.
+        """
+        return load_result(self.get_experiment_dir(experiment.model_name, experiment.uuid))
+
+    def clear_cache(self, model_name: str, fingerprint: str = None):
+        """
+        Invalidate the cached results of a model. The experiments are kept, only their
+        saved results are deleted.
+
+        :param model_name: name of the model
+        :param fingerprint: if given, only the results with this fingerprint are deleted
+        :return: number of deleted results
+        """
+        count = 0
+        for experiment in self.get_experiments(model_name) or []:
+            if fingerprint is not None and experiment.cache.get("fingerprint") != fingerprint:
+                continue
 
-        models_names = [model.name for model in models]
+            result_path = self.get_experiment_dir(model_name, experiment.uuid) / RESULT_NAME
+            if result_path.exists():
+                result_path.unlink()
+                count += 1
 
-        if model_name not in models_names:
+        return count
+
+    def get_metric_series_names(self, experiment: Experiment):
+        series_dir = self.get_experiment_dir(experiment.model_name, experiment.uuid) / "metrics"
+
+        if not series_dir.exists():
+            return []
+
+        return sorted(series_name(path) for path in series_dir.glob("*.bin"))
+
+    def get_metric_series(self, experiment: Experiment, name: str):
+        """
+        Read the time series of a metric logged with a step or a timestamp.
+
+        :return: NumPy structured array with the fields `step`, `timestamp` and `value`
+        """
+        series_dir = self.get_experiment_dir(experiment.model_name, experiment.uuid) / "metrics"
+        path = series_path(series_dir, name)
+
+        if not path.exists():
+            raise FileNotFoundError(f"No series for metric {name} in experiment {experiment.name}")
+
+        return read_series(path)
+
+    def get_artifact_manifest(self, experiment: Experiment):
+        """
+        Get the deduplicated artifacts of an experiment.
+
+        :return: mapping of the artifact paths, relative to the artifacts directory, to their hash
+        """
+        experiment_dir = self.get_experiment_dir(experiment.model_name, experiment.uuid)
+        manifest_path = experiment_dir / self.artifacts_manifest_name
+
+        if not manifest_path.exists():
+            return {}
+
+        with manifest_path.open() as file:
+            return json.load(file)
+
+    def update_artifact_manifest(self, experiment: Experiment, entries: dict):
+        manifest = self.get_artifact_manifest(experiment)
+        manifest.update(entries)
+
+        experiment_dir = self.get_experiment_dir(experiment.model_name, experiment.uuid)
+        with atomic_write(experiment_dir / self.artifacts_manifest_name) as file:
+            json.dump(manifest, file, indent=4)
+
+    def get_artifacts(self, experiment: Experiment):
+        """
+        Get the files logged as artifacts of an experiment.
+
+        :return: mapping of the artifact paths, relative to the artifacts directory, to the
+            path of their content
+        """
+        artifact_dir = self.get_experiment_dir(experiment.model_name, experiment.uuid) / "artifacts"
+
+        artifacts = {}
+        if artifact_dir.exists():
+            for path in artifact_dir.rglob("*"):
+                if path.is_file():
+                    artifacts[path.relative_to(artifact_dir).as_posix()] = path
+
+        store = self.get_object_store()
+        for name, digest in self.get_artifact_manifest(experiment).items():
+            artifacts.setdefault(name, store.object_path(digest))
+
+        return artifacts
+
+    def resolve_artifact(self, experiment: Experiment, name: str):
+        """
+        Get the path of the content of an artifact.
+
+        :param name: path of the artifact relative to the artifacts directory, e.g. `folder/file.txt`
+        """
+        artifact_path = self.get_experiment_dir(experiment.model_name, experiment.uuid) / "artifacts" / name
+        if artifact_path.exists():
+            return artifact_path
+
+        artifact = self.get_artifacts(experiment).get(name)
+        if artifact is None or not artifact.exists():
+            raise FileNotFoundError(f"Artifact {name} not found in experiment {experiment.name}")
+
+        return artifact
+
+    def pack(self, models: Union[str, Iterable[str]] = None):
+        """
+        Fold the metadata files of the finished and failed experiments into a new segment
+        per model, see `pack`. Running experiments stay loose. Experiment directories
+        left empty are removed.
+
+        :param models: name or names of the models, defaults to every model
+        :return: number of packed experiments
+        """
+        if models is None:
+            models = [model.name for model in self.get_models() or []]
+        elif isinstance(models, str):
+            models = [models]
+
+        codec = self.get_metadata_codec()
+        count = 0
+
+        with self.lock():
+            for model in models:
+                packed = []
+
+                def experiments():
+                    for experiment_dir, file_name, experiment in self._iter_loose_metadata([model]):
+                        if experiment is not None and experiment.status != "running":
+                            packed.append((experiment_dir, file_name))
+                            yield experiment
+
+                self.get_pack_store(model).write(experiments(), codec)
+
+                # The segment is published, the loose copies can be removed
+                for experiment_dir, file_name in packed:
+                    remove_loose_metadata(experiment_dir, file_name)
+                count += len(packed)
+
+        return count
+
+    def gc(
+        self,
+        policy: RetentionPolicy,
+        models: Union[str, Iterable[str]] = None,
+        dry_run: bool = False,
+        workers: int = None,
+    ):
+        """
+        Delete the experiments that are not kept by a retention policy, see `retention`.
+
+        Experiments are deleted with their files, name, catalog entry and packed
+        metadata, or only their files if the policy keeps the metadata. Objects of the
+        store no longer used by any experiment are removed afterwards.
+
+        :param policy: rules selecting the experiments to keep
+        :param models: name or names of the models, defaults to every model
+        :param dry_run: if True, only report what would be deleted
+        :param workers: number of threads measuring and deleting the experiments
+        :return: `GCReport` of the deleted experiments
+        """
+        if models is None:
+            models = [model.name for model in self.get_models() or []]
+        elif isinstance(models, str):
+            models = [models]
+
+        workers = workers or min(32, (os.cpu_count() or 1) + 4)
+        # Metadata files are not freed when the metadata is kept
+        exclude = set(FILE_NAMES) if policy.keep_metadata else ()
+
+        with self.lock(), concurrent.futures.ThreadPoolExecutor(workers) as executor:
+            experiments = {model: [] for model in models}
+            for experiment in self.iter_experiments(models):
+                experiments[experiment.model_name].append(experiment)
+
+            experiment_dirs = {
+                experiment.uuid: self.get_experiment_dir(experiment.model_name, experiment.uuid)
+                for model_experiments in experiments.values()
+                for experiment in model_experiments
+            }
+            sizes = dict(
+                zip(
+                    experiment_dirs,
+                    executor.map(
+                        lambda path: directory_size(path, exclude=exclude),
+                        experiment_dirs.values(),
+                    ),
+                )
+            )
+            total_bytes = sum(sizes.values()) + directory_size(
+                self.get_object_store().path, shared=True
+            )
+
+            selected = select_experiments(experiments, sizes, total_bytes, policy)
+            report = GCReport(
+                experiments=selected,
+                freed_bytes=sum(sizes[experiment.uuid] for experiment in selected),
+                total_bytes=total_bytes,
+                dry_run=dry_run,
+            )
+            if dry_run or not selected:
+                return report
+
+            def delete(experiment: Experiment):
+                experiment_dir = experiment_dirs[experiment.uuid]
+                if not policy.keep_metadata:
+                    shutil.rmtree(experiment_dir, ignore_errors=True)
+                    return
+
+                try:
+                    paths = list(experiment_dir.iterdir())
+                except FileNotFoundError:
+                    # Packed experiments without files have no directory left
+                    return
+
+                for path in paths:
+                    if path.name in exclude:
+                        continue
+                    if path.is_dir() and not path.is_symlink():
+                        shutil.rmtree(path, ignore_errors=True)
+                    else:
+                        path.unlink()
+
+            for _ in executor.map(delete, selected):
+                pass
+
+            if not policy.keep_metadata:
+                uuids = {experiment.uuid for experiment in selected}
+                for model in models:
+                    names = self.get_name_registry(model)
+                    for experiment in selected:
+                        if experiment.model_name == model:
+                            names.release(experiment.name)
+                    self.get_pack_store(model).remove(uuids)
+
+                catalog = self.get_catalog()
+                if catalog.exists():
+                    catalog.delete(uuids)
+
+                self._invalidate_session()
+
+            report.objects, freed_bytes = self._prune_objects()
+            report.freed_bytes += freed_bytes
+
+        return report
+
+    def _prune_objects(self, grace_period: float = 3600.0):
+        """
+        Remove the objects of the store that are neither hardlinked by an experiment nor
+        listed in the artifact manifest of an experiment.
+
+        :param grace_period: seconds during which new objects are kept, a running
+            experiment may not have linked or listed them yet
+        :return: number of removed objects and bytes freed
+        """
+        store = self.get_object_store()
+        if not store.path.is_dir():
+            return 0, 0
+
+        referenced = set()
+        for experiment in self.iter_experiments():
+            referenced.update(self.get_artifact_manifest(experiment).values())
+
+        count = 0
+        freed_bytes = 0
+        deadline = time.time() - grace_period
+        for path in store.path.glob("*/*"):
+            # Temporary files of objects being added have a suffix
+            if "." in path.name:
+                continue
+
+            stat = path.stat()
+            if (
+                stat.st_nlink == 1
+                and stat.st_ctime < deadline
+                and path.parent.name + path.name not in referenced
+            ):
+                path.unlink()
+                count += 1
+                freed_bytes += stat.st_size
+
+        return count, freed_bytes
+
+    def index_experiment(self, experiment: Experiment):
+        """
+        Update the catalog entry of an experiment, if the repository has a catalog.
+        """
+        catalog = self.get_catalog()
+        if catalog.exists():
+            # Shared lock, a rebuild of the catalog cannot miss this update
+            with self.lock(shared=True):
+                catalog.upsert(experiment)
+
+        self._invalidate_session(experiment.model_name)
+
+    def reindex(self):
+        """
+        Rebuild the catalog from the metadata files of every experiment.
+
+        :return: number of indexed experiments
+        """
+        models = [model.name for model in self._scan_models()]
+
+        def experiments():
+            for model in models:
+                yield from self.iter_experiments(model, use_catalog=False)
+
+        with self.lock():
+            count = self.get_catalog().rebuild(models, experiments())
+
+        self._invalidate_session()
+        return count
+
+    @staticmethod
+    def _get_model_files(model_path: pathlib.Path):
+        # Serializers may add a suffix to the path, e.g. `model.npy`, or save a directory
+        files = []
+        for path in model_path.parent.glob(f"{model_path.name}*"):
+            if path.is_dir():
+                files += [file for file in path.rglob("*") if file.is_file()]
+            elif path.is_file():
+                files.append(path)
+
+        return files
+
+    def _scan_models(self):
+        amnesis_dir = self.get_amnesis_dir()
+
+        models = []
+        for model in amnesis_dir.iterdir():
+            if model.is_dir() and model.name not in self.RESERVED_DIRS:
+                models.append(model)
+
+        return models
+
+    def _scan_experiments(self, model_name: str):
+        if model_name in self.RESERVED_DIRS or not self.get_model_dir(model_name).is_dir():
             return None
 
-        experiments = []
-        model_dir = self.get_amnesis_dir() / model_name
+        return list(self.iter_experiments(model_name, use_catalog=False))
+
+    def _iter_loose_metadata(
+        self, models: Iterable[str], workers: int = None, where: Query = None
+    ):
+        """
+        Parse the metadata files of the experiments that are not packed, on a pool of threads.
 
-        for experiment in model_dir.iterdir():
-            experiment_metadata = experiment / "metadata.json"
-            if experiment.is_dir() and experiment_metadata.exists():
-                experiments.append(Experiment.load(experiment_metadata))
+        :return: iterator of the directory, metadata file name and experiment of each
+            metadata file found. The experiment is None if it cannot be read or does not match `where`
+        """
+        workers = workers or min(32, (os.cpu_count() or 1) + 4)
+        max_pending = workers * 4
 
-        return experiments
+        # Metadata files of the repository codec are tried first
+        codec = self.get_metadata_codec()
+        file_names = [codec.file_name] + [name for name in FILE_NAMES if name != codec.file_name]
+
+        with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+            pending = set()
+            for experiment_dir in self._iter_experiment_dirs(models):
+                pending.add(
+                    executor.submit(self._load_metadata, experiment_dir, file_names, where=where)
+                )
+
+                if len(pending) >= max_pending:
+                    done, pending = concurrent.futures.wait(
+                        pending, return_when=concurrent.futures.FIRST_COMPLETED
+                    )
+                    for future in done:
+                        if future.result() is not None:
+                            yield future.result()
+
+            for future in concurrent.futures.as_completed(pending):
+                if future.result() is not None:
+                    yield future.result()
+
+    def _iter_experiment_dirs(self, models: Iterable[str]):
+        for model in models:
+            model_dir = self.get_model_dir(model)
+            if not model_dir.is_dir():
+                continue
+
+            with os.scandir(model_dir) as entries:
+                for entry in entries:
+                    if not entry.is_dir() or entry.name.startswith("."):
+                        continue
+
+                    # Shard directories of the sharded layout, experiment uuids are longer
+                    if len(entry.name) == 2:
+                        with os.scandir(entry.path) as shard_entries:
+                            for shard_entry in shard_entries:
+                                if shard_entry.is_dir():
+                                    yield model_dir / entry.name / shard_entry.name
+                    else:
+                        yield model_dir / entry.name
+
+    @classmethod
+    def _load_metadata(
+        cls,
+        experiment_dir: pathlib.Path,
+        file_names: List[str],
+        where: Query = None,
+    ):
+        """
+        Load the metadata of an experiment from the first of `file_names` found.
+
+        :return: the directory, the name of the metadata file and the experiment, which is
+            None if it cannot be read or does not match `where`. None if there is no metadata file
+        """
+        for file_name in file_names:
+            # Missing metadata files are skipped when opened, without an extra stat
+            try:
+                experiment = cls._load_metadata_file(experiment_dir / file_name)
+            except FileNotFoundError:
+                continue
+
+            if experiment is not None and where is not None and not where(experiment):
+                experiment = None
+            return experiment_dir, file_name, experiment
+
+        return None
+
+    @staticmethod
+    def _load_metadata_file(path: pathlib.Path, attempts: int = 3, delay: float = 0.05):
+        """
+        Load a metadata file, retrying if the file is being written.
+
+        :return: the experiment, or None if the metadata cannot be read
+        :raise FileNotFoundError: if the file does not exist
+        """
+        for attempt in range(attempts):
+            try:
+                return Experiment.load(path)
+            except (ValueError, TypeError) as error:
+                if attempt + 1 < attempts:
+                    time.sleep(delay)
+                    continue
+
+                warnings.warn(f"Skipping unreadable experiment metadata {path}: {error}")
+
+        return None
+
+    def _invalidate_session(self, model_name: str = None):
+        if self.session is not None:
+            self.session.invalidate_listings(model_name)
 
     def _get_root_path(self, path: pathlib.Path):
         if self.root:
             return self.root
 
-        repository_dir = path / self.dir_name
-        if repository_dir.exists():
-            self.root = path
-            return path
+        path = pathlib.Path(os.path.abspath(path))
+        for directory in (path, *path.parents):
+            if (directory / self.dir_name).exists():
+                self.root = directory
+                return directory
 
-        path = path.parent
-        if os.path.abspath(path) == os.path.abspath(os.sep):
-            return None
+        return None
 
-        return self._get_root_path(path)
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and not math.isnan(value)
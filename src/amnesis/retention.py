@@ -0,0 +1,212 @@
+"""
+Retention policies deciding which experiments are garbage collected, see `Repository.gc`.
+
+An experiment is kept if any keep rule matches it: best on a metric, most recent or
+newer than an age. Running experiments are always kept. Without a budget, every
+other experiment is deleted. With a budget, the oldest other experiments are deleted
+until the repository fits in the budget.
+"""
+
+import dataclasses
+import datetime
+import heapq
+import math
+import os
+import pathlib
+import re
+from typing import Dict, Iterable, List
+
+from .experiment import Experiment
+
+DATE_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+
+SIZE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+AGE_UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+
+
+@dataclasses.dataclass
+class RetentionPolicy:
+    """
+    Rules of a garbage collection
+    """
+
+    keep_top_k: int = None
+    metric: str = None
+    maximize: bool = False
+    keep_last: int = None
+    keep_newer_than: datetime.timedelta = None
+    budget: int = None
+    keep_metadata: bool = False
+
+    def __post_init__(self):
+        if self.keep_top_k is not None and self.metric is None:
+            raise ValueError("A metric is required to keep the top k experiments")
+
+        rules = (self.keep_top_k, self.keep_last, self.keep_newer_than, self.budget)
+        if all(rule is None for rule in rules):
+            raise ValueError(
+                "At least one of keep top k, keep last, keep newer than or budget is required"
+            )
+
+
+@dataclasses.dataclass
+class GCReport:
+    """
+    Summary of a garbage collection
+    """
+
+    experiments: List[Experiment] = dataclasses.field(default_factory=list)
+    freed_bytes: int = 0
+    total_bytes: int = 0
+    objects: int = 0
+    dry_run: bool = False
+
+
+def parse_size(size: str) -> int:
+    """
+    Parse a number of bytes with an optional unit, e.g. "500M" or "10G"
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*", size, re.IGNORECASE)
+    if match is None:
+        raise ValueError(f"Invalid size {size}, expected e.g. 500M or 10G")
+
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).upper()])
+
+
+def parse_age(age: str) -> datetime.timedelta:
+    """
+    Parse a duration with a unit, e.g. "30m", "12h" or "7d"
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smhdw])\s*", age)
+    if match is None:
+        raise ValueError(f"Invalid age {age}, expected e.g. 12h or 7d")
+
+    return datetime.timedelta(**{AGE_UNITS[match.group(2)]: float(match.group(1))})
+
+
+def format_size(size: int) -> str:
+    for unit in ("", "K", "M", "G"):
+        if size < 1024:
+            return f"{size:.0f}{unit}B" if unit == "" else f"{size:.1f}{unit}B"
+        size /= 1024
+
+    return f"{size:.1f}TB"
+
+
+def directory_size(
+    path: pathlib.Path, shared: bool = False, exclude: Iterable[str] = ()
+) -> int:
+    """
+    Bytes used by the files of a directory.
+
+    :param shared: if False, files hardlinked elsewhere, e.g. to the object store, are
+        not counted as deleting the directory does not free them
+    :param exclude: names of the files and directories ignored at the top of the directory
+    """
+    size = 0
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.name in exclude:
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    size += directory_size(entry.path, shared)
+                elif entry.is_file(follow_symlinks=False):
+                    stat = entry.stat(follow_symlinks=False)
+                    if shared or stat.st_nlink == 1:
+                        size += stat.st_size
+    except FileNotFoundError:
+        pass
+
+    return size
+
+
+def select_experiments(
+    experiments: Dict[str, List[Experiment]],
+    sizes: Dict[str, int],
+    total_bytes: int,
+    policy: RetentionPolicy,
+    now: datetime.datetime = None,
+) -> List[Experiment]:
+    """
+    Select the experiments to delete.
+
+    :param experiments: experiments of each model
+    :param sizes: bytes freed by deleting each experiment, by uuid
+    :param total_bytes: bytes used by the repository
+    :return: experiments to delete, oldest first
+    """
+    now = now or datetime.datetime.now()
+    candidates = []
+
+    for model_experiments in experiments.values():
+        kept = {
+            experiment.uuid for experiment in model_experiments if experiment.status == "running"
+        }
+
+        if policy.keep_newer_than is not None:
+            kept.update(
+                experiment.uuid
+                for experiment in model_experiments
+                if now - _date(experiment) < policy.keep_newer_than
+            )
+
+        if policy.keep_last is not None:
+            recent = heapq.nlargest(policy.keep_last, model_experiments, key=_date_key)
+            kept.update(experiment.uuid for experiment in recent)
+
+        if policy.keep_top_k is not None:
+            kept.update(experiment.uuid for experiment in _top_k(model_experiments, policy))
+
+        candidates += [
+            experiment for experiment in model_experiments if experiment.uuid not in kept
+        ]
+
+    candidates.sort(key=_date_key)
+    if policy.budget is None:
+        return candidates
+
+    selected = []
+    for experiment in candidates:
+        if total_bytes <= policy.budget:
+            break
+        if sizes.get(experiment.uuid, 0) == 0:
+            # Nothing to free, e.g. a packed experiment or an experiment without files
+            continue
+
+        selected.append(experiment)
+        total_bytes -= sizes[experiment.uuid]
+
+    return selected
+
+
+def _top_k(experiments: List[Experiment], policy: RetentionPolicy):
+    def rank(experiment: Experiment):
+        value = experiment.metrics[policy.metric]
+        return -value if policy.maximize else value
+
+    def is_number(value):
+        return (
+            isinstance(value, (int, float))
+            and not isinstance(value, bool)
+            and not math.isnan(value)
+        )
+
+    scored = [
+        experiment
+        for experiment in experiments
+        if is_number(experiment.metrics.get(policy.metric))
+    ]
+    return heapq.nsmallest(policy.keep_top_k, scored, key=rank)
+
+
+def _date_key(experiment: Experiment):
+    return experiment.date or ""
+
+
+def _date(experiment: Experiment):
+    try:
+        return datetime.datetime.strptime(experiment.date, DATE_FORMAT)
+    except (TypeError, ValueError):
+        # Experiments without a date are considered new and kept
+        return datetime.datetime.max
@@ -0,0 +1,179 @@
+"""
+Built-in model serializers.
+
+The serializers write the model straight to disk without intermediate in-memory
+copies and can map it back from disk with `load_mmap`. NumPy is only required by
+the serializers that store arrays.
+"""
+
+import json
+import mmap
+import pathlib
+import pickle
+import urllib.parse
+from typing import Union
+
+from .model import ModelSerializer
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError as error:
+        raise ImportError("NumPy is required by this serializer") from error
+
+    return numpy
+
+
+class NumpySerializer(ModelSerializer):
+    """
+    Save a NumPy array in a `.npy` file
+    """
+
+    supports_mmap = True
+
+    def save(self, model, path: pathlib.Path):
+        with self._path(path).open("wb") as file:
+            _numpy().save(file, model, allow_pickle=False)
+
+    def load(self, path: pathlib.Path):
+        return _numpy().load(self._path(path), allow_pickle=False)
+
+    def load_mmap(self, path: pathlib.Path):
+        return _numpy().load(self._path(path), mmap_mode="r", allow_pickle=False)
+
+    @staticmethod
+    def _path(path: pathlib.Path):
+        return path.with_name(path.name + ".npy")
+
+
+class ArrayDictSerializer(ModelSerializer):
+    """
+    Save a dictionary of NumPy arrays, e.g. the weights of a network, in a directory
+    with one `.npy` file per array
+    """
+
+    supports_mmap = True
+
+    INDEX = "index.json"
+
+    def save(self, model: dict, path: pathlib.Path):
+        path.mkdir(parents=True, exist_ok=True)
+
+        numpy = _numpy()
+        index = {}
+        for key, array in model.items():
+            file_name = urllib.parse.quote(str(key), safe="") + ".npy"
+            with (path / file_name).open("wb") as file:
+                numpy.save(file, array, allow_pickle=False)
+            index[key] = file_name
+
+        with (path / self.INDEX).open("w") as file:
+            json.dump(index, file, indent=4)
+
+    def load(self, path: pathlib.Path):
+        return self._load(path, None)
+
+    def load_mmap(self, path: pathlib.Path):
+        return self._load(path, "r")
+
+    def _load(self, path: pathlib.Path, mmap_mode):
+        with (path / self.INDEX).open() as file:
+            index = json.load(file)
+
+        numpy = _numpy()
+        return {
+            key: numpy.load(path / file_name, mmap_mode=mmap_mode, allow_pickle=False)
+            for key, file_name in index.items()
+        }
+
+
+class PickleSerializer(ModelSerializer):
+    """
+    Pickle any model with protocol 5.
+
+    Objects exposing their data as out-of-band buffers (NumPy arrays, `PickleBuffer`,
+    ...) have each buffer written straight to its own file instead of being copied
+    in the pickle stream. Memory-mapped loading maps the buffers copy-on-write.
+    """
+
+    supports_mmap = True
+
+    STREAM = "model.pkl"
+
+    def save(self, model, path: pathlib.Path):
+        path.mkdir(parents=True, exist_ok=True)
+        count = 0
+
+        def write_buffer(buffer: pickle.PickleBuffer):
+            nonlocal count
+            try:
+                data = buffer.raw()
+            except BufferError:
+                # Non-contiguous buffers are serialized in the pickle stream
+                return True
+
+            with self._buffer_path(path, count).open("wb") as file:
+                file.write(data)
+            count += 1
+            return False
+
+        with (path / self.STREAM).open("wb") as file:
+            pickle.dump(model, file, protocol=5, buffer_callback=write_buffer)
+
+    def load(self, path: pathlib.Path):
+        buffers = []
+        for buffer_path in self._buffer_paths(path):
+            buffer = bytearray(buffer_path.stat().st_size)
+            with buffer_path.open("rb", buffering=0) as file:
+                file.readinto(buffer)
+            buffers.append(buffer)
+
+        with (path / self.STREAM).open("rb") as file:
+            return pickle.load(file, buffers=buffers)
+
+    def load_mmap(self, path: pathlib.Path):
+        buffers = []
+        for buffer_path in self._buffer_paths(path):
+            if buffer_path.stat().st_size == 0:
+                buffers.append(bytearray())
+                continue
+
+            with buffer_path.open("rb") as file:
+                buffers.append(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY))
+
+        with (path / self.STREAM).open("rb") as file:
+            return pickle.load(file, buffers=buffers)
+
+    @staticmethod
+    def _buffer_path(path: pathlib.Path, index: int):
+        return path / f"buffer-{index}.bin"
+
+    def _buffer_paths(self, path: pathlib.Path):
+        index = 0
+        while self._buffer_path(path, index).exists():
+            yield self._buffer_path(path, index)
+            index += 1
+
+
+SERIALIZERS = {
+    "numpy": NumpySerializer,
+    "arrays": ArrayDictSerializer,
+    "pickle": PickleSerializer,
+}
+
+
+def get_serializer(serializer: Union[str, ModelSerializer]):
+    """
+    Get a serializer instance from its name in `SERIALIZERS`, serializer instances
+    are returned as is.
+    """
+    if isinstance(serializer, ModelSerializer):
+        return serializer
+
+    if serializer not in SERIALIZERS:
+        raise ValueError(
+            f"Unknown serializer {serializer}. Available serializers are: {', '.join(SERIALIZERS)}"
+        )
+
+    return SERIALIZERS[serializer]()
@@ -0,0 +1,157 @@
+"""
+Process-wide sessions sharing a repository between the experiments of a process.
+
+A session holds a `Repository` whose root is found once, and caches the list of
+models and the experiments of each model. The repository answers `get_models` and
+`get_experiments` from these caches. The caches are invalidated when the repository
+changes them in the process, or when the modification time of the repository
+directory or of the catalog changes, polled at most every `poll_interval` seconds.
+Creating many experiment contexts in a process then does almost no redundant
+filesystem work.
+"""
+
+import os
+import pathlib
+import threading
+from typing import Dict
+
+from .name_registry import NameRegistry
+from .repository import Repository
+from .utils import MtimeCache
+
+
+class RepositorySession:
+    """
+    Repository shared by a process, with cached listings
+    """
+
+    def __init__(self, repository: Repository, poll_interval: float = 1.0):
+        """
+        :param repository: repository with a known root
+        :param poll_interval: minimum number of seconds between two checks of the files
+            the cached listings are read from
+        """
+        self.repository = repository
+        self.repository.session = self
+        self.poll_interval = poll_interval
+
+        self._models = MtimeCache(
+            repository._list_models,
+            lambda: [repository.get_amnesis_dir(), self._catalog_path()],
+            poll_interval,
+        )
+        self._experiments: Dict[str, MtimeCache] = {}
+        self._registries: Dict[str, NameRegistry] = {}
+        self._created = set()
+        self._lock = threading.Lock()
+
+    def get_models(self):
+        models = self._models.get()
+        return None if models is None else list(models)
+
+    def get_experiments(self, model_name: str):
+        """
+        Get the experiments of a model. The experiments are cached when the repository
+        has a catalog, whose modification time changes with every experiment saved.
+        """
+        if not self._catalog_path().exists():
+            return self.repository._list_experiments(model_name)
+
+        with self._lock:
+            cache = self._experiments.get(model_name)
+            if cache is None:
+                cache = MtimeCache(
+                    lambda: self.repository._list_experiments(model_name),
+                    lambda: [self._catalog_path()],
+                    self.poll_interval,
+                )
+                self._experiments[model_name] = cache
+
+        experiments = cache.get()
+        return None if experiments is None else list(experiments)
+
+    def create_model_dir(self, model_name: str):
+        """
+        Create the directory of a model, only once per process.
+        """
+        model_dir = self.repository.get_model_dir(model_name)
+        if model_name in self._created and model_dir.is_dir():
+            return model_dir
+
+        model_dir = self.repository.create_model_dir(model_name)
+        self._created.add(model_name)
+
+        return model_dir
+
+    def get_name_registry(self, model_name: str):
+        with self._lock:
+            registry = self._registries.get(model_name)
+
+        if registry is None or not registry.path.exists():
+            registry = self.repository.get_name_registry(model_name)
+            with self._lock:
+                self._registries[model_name] = registry
+
+        return registry
+
+    def invalidate_listings(self, model_name: str = None):
+        """
+        Drop the cached listings after a change made by the process.
+
+        :param model_name: if given, only the experiments of this model are dropped
+        """
+        with self._lock:
+            if model_name is not None:
+                cache = self._experiments.get(model_name)
+            else:
+                cache = None
+                self._models.invalidate()
+                self._experiments.clear()
+
+        if cache is not None:
+            cache.invalidate()
+
+    def invalidate(self):
+        self.invalidate_listings()
+        with self._lock:
+            self._registries.clear()
+            self._created.clear()
+
+    def _catalog_path(self):
+        return self.repository.get_amnesis_dir() / self.repository.catalog_name
+
+
+_sessions: Dict[pathlib.Path, RepositorySession] = {}
+_roots: Dict[str, pathlib.Path] = {}
+_lock = threading.Lock()
+
+
+def get_session(path: pathlib.Path = None):
+    """
+    Get the session of the repository containing a directory.
+
+    The root of the repository is found once per directory, sessions are shared by
+    every caller of the process.
+
+    :param path: directory inside the repository, defaults to the current directory
+    :return: the session, with a repository without root if the directory is not in a repository
+    """
+    path = os.path.abspath(path or os.getcwd())
+
+    with _lock:
+        root = _roots.get(path)
+        # A single stat checks that the cached repository was not removed
+        if root is None or not (root / Repository().dir_name).is_dir():
+            root = Repository()._get_root_path(pathlib.Path(path))
+            if root is None:
+                return RepositorySession(Repository())
+            _roots[path] = root
+
+        session = _sessions.get(root)
+        if session is None:
+            repository = Repository()
+            repository.root = root
+            session = RepositorySession(repository)
+            _sessions[root] = session
+
+        return session
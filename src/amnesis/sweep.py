@@ -0,0 +1,136 @@
+"""
+Samplers of hyperparameters and summary of the runs of a sweep, see `remember.sweep`.
+"""
+
+import itertools
+import os
+import random
+from typing import Any, Dict, Iterable, List
+
+from .utils import Table, display_names
+
+
+class GridSampler:
+    """
+    Every combination of the values of the hyperparameters
+    """
+
+    def __init__(self, grid: Dict[str, Iterable]):
+        """
+        :param grid: values taken by each hyperparameter
+        """
+        self.grid = {name: list(values) for name, values in grid.items()}
+
+    def __iter__(self):
+        names = list(self.grid)
+        for values in itertools.product(*self.grid.values()):
+            yield dict(zip(names, values))
+
+    def __len__(self):
+        count = 1
+        for values in self.grid.values():
+            count *= len(values)
+        return count
+
+
+class RandomSampler:
+    """
+    Random combinations of the values of the hyperparameters
+    """
+
+    def __init__(self, space: Dict[str, Any], n_samples: int, seed: int = None):
+        """
+        :param space: distribution of each hyperparameter. Lists and tuples are sampled
+            uniformly, callables are called with a `random.Random` and other values are
+            used as is.
+        :param n_samples: number of combinations
+        :param seed: seed of the random generator
+        """
+        self.space = space
+        self.n_samples = n_samples
+        self.seed = seed
+
+    def __iter__(self):
+        generator = random.Random(self.seed)
+        for _ in range(self.n_samples):
+            yield {
+                name: self._sample(distribution, generator)
+                for name, distribution in self.space.items()
+            }
+
+    def __len__(self):
+        return self.n_samples
+
+    @staticmethod
+    def _sample(distribution, generator: random.Random):
+        if isinstance(distribution, (list, tuple)):
+            return generator.choice(distribution)
+        if callable(distribution):
+            return distribution(generator)
+        return distribution
+
+
+def as_sampler(grid_or_sampler):
+    """
+    A dictionary is a grid, any other iterable yields the hyperparameters of each run.
+    """
+    if isinstance(grid_or_sampler, dict):
+        return GridSampler(grid_or_sampler)
+
+    return grid_or_sampler
+
+
+def default_workers(n_runs: int, n_workers: int = None):
+    """
+    Number of processes of a sweep, capped to the number of cores and runs
+    """
+    cores = os.cpu_count() or 1
+    if n_workers is None:
+        n_workers = cores
+
+    return max(1, min(n_workers, cores, n_runs))
+
+
+class SweepSummary:
+    """
+    Results of the runs of a sweep, in the order of the sampler
+    """
+
+    def __init__(self, rows: List[dict]):
+        """
+        :param rows: one dictionary per run with the keys experiment, uuid, status,
+            error, hyperparameters and metrics
+        """
+        self.rows = rows
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        return self.rows[index]
+
+    def __str__(self):
+        info = ["experiment", "status"]
+        groups = {
+            group: {name for row in self.rows for name in row[group]}
+            for group in ("hyperparameters", "metrics")
+        }
+        names = display_names(groups, info)
+
+        # Hyperparameters and metrics are namespaced, they never replace each other
+        rows = (
+            {
+                **{name: row[name] for name in info},
+                **{
+                    f"{group}.{name}": value
+                    for group in groups
+                    for name, value in row[group].items()
+                },
+            }
+            for row in self.rows
+        )
+
+        return str(Table.from_rows(rows, info + list(names)).rename(names))
@@ -1,7 +1,23 @@
+from .atomic_write import atomic_write
+from .file_lock import FileLock
+from .file_transfer import TRANSFER_MODES, transfer_file, transfer_tree
+from .mtime_cache import MtimeCache
 from .name_generator import generate_name
+from .parallel_copy import CopyReport, copy_tree
+from .table import Table, display_names
 from .temp_dir import TempDir
 
 __all__ = [
+    "atomic_write",
+    "FileLock",
+    "CopyReport",
+    "copy_tree",
+    "display_names",
+    "TRANSFER_MODES",
+    "transfer_file",
+    "transfer_tree",
     "generate_name",
+    "MtimeCache",
+    "Table",
     "TempDir",
 ]
@@ -0,0 +1,61 @@
+"""
+Atomic replacement of files.
+"""
+
+import contextlib
+import functools
+import os
+import pathlib
+import stat
+import tempfile
+
+
+@contextlib.contextmanager
+def atomic_write(path: pathlib.Path, mode: str = "w", fsync: bool = True, **kwargs):
+    """
+    Context manager writing a file atomically.
+
+    The content is written to a temporary file in the same directory, which then
+    replaces the destination with a rename. Readers see either the previous or the
+    new content, never a partially written file. The file keeps the permissions of
+    the file it replaces, new files follow the umask.
+
+    :param path: path of the file
+    :param mode: mode of the temporary file, "w" or "wb"
+    :param fsync: if True, the content is flushed to disk before the rename
+    :param kwargs: keyword arguments given to `open`
+    """
+    path = pathlib.Path(path)
+    file_descriptor, tmp_path = tempfile.mkstemp(
+        prefix=f".{path.name}.", suffix=".tmp", dir=path.parent
+    )
+
+    try:
+        with open(file_descriptor, mode, **kwargs) as file:
+            yield file
+
+            file.flush()
+            if fsync:
+                os.fsync(file.fileno())
+
+        # Temporary files are only readable by their owner
+        os.chmod(tmp_path, _file_mode(path))
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def _file_mode(path: pathlib.Path):
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_umask()
+
+
+@functools.lru_cache(maxsize=None)
+def _umask():
+    # The umask can only be read by setting it, it is read once per process
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
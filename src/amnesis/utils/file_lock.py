@@ -0,0 +1,69 @@
+"""
+Advisory file lock shared by the processes using a repository.
+"""
+
+import os
+import pathlib
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows, locking is not supported
+    fcntl = None
+
+
+class FileLock:
+    """
+    Advisory lock based on `fcntl.flock`.
+
+    The lock is reentrant within a thread, a thread already holding the lock does not
+    lock the file again. On platforms without `fcntl` the lock does nothing.
+    """
+
+    _held = threading.local()
+
+    def __init__(self, path: pathlib.Path, shared: bool = False):
+        """
+        :param path: path of the lock file, created if it does not exist
+        :param shared: if True, the lock can be held by several processes at the same time
+        """
+        self.path = pathlib.Path(path)
+        self.shared = shared
+        self._file_descriptor = None
+
+    def __enter__(self):
+        held = self._held_locks()
+        key = os.path.abspath(self.path)
+
+        if key in held:
+            held[key] += 1
+            return self
+
+        if fcntl is not None:
+            self._file_descriptor = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            fcntl.flock(
+                self._file_descriptor, fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX
+            )
+
+        held[key] = 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        held = self._held_locks()
+        key = os.path.abspath(self.path)
+
+        held[key] -= 1
+        if held[key]:
+            return
+
+        del held[key]
+        if self._file_descriptor is not None:
+            fcntl.flock(self._file_descriptor, fcntl.LOCK_UN)
+            os.close(self._file_descriptor)
+            self._file_descriptor = None
+
+    @classmethod
+    def _held_locks(cls):
+        if not hasattr(cls._held, "locks"):
+            cls._held.locks = {}
+        return cls._held.locks
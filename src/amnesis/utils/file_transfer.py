@@ -0,0 +1,151 @@
+"""
+Transfer of files with the cheapest strategy supported by the filesystem.
+"""
+
+import os
+import pathlib
+import shutil
+import time
+from typing import Callable, Optional
+
+from .parallel_copy import CopyReport, copy_file, copy_tree
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+TRANSFER_MODES = ("copy", "move", "hardlink", "symlink", "reflink")
+
+# ioctl request cloning a whole file on Linux (btrfs, XFS, ...)
+FICLONE = 0x40049409
+
+
+def transfer_file(source: pathlib.Path, destination: pathlib.Path, mode: str = "copy"):
+    """
+    Transfer a file to a destination. Every mode falls back to a copy when the
+    filesystem does not support it.
+
+    :param source: path of the file
+    :param destination: path of the transferred file
+    :param mode: one of `TRANSFER_MODES`
+        - "copy": copy the content and the metadata of the file
+        - "move": rename the file, the source is removed
+        - "hardlink": hardlink the destination to the source
+        - "symlink": create a symbolic link to the absolute path of the source
+        - "reflink": clone the file with a copy-on-write reflink
+
+    :return: strategy used, one of "copy", "move", "hardlink", "symlink", "reflink",
+        "copy_file_range" or "sendfile"
+    """
+    if mode not in TRANSFER_MODES:
+        raise ValueError(f"Unknown transfer mode {mode}. Available modes are: {', '.join(TRANSFER_MODES)}")
+
+    match mode:
+        case "move":
+            try:
+                os.rename(source, destination)
+                return "move"
+            except OSError:
+                strategy = copy_file(source, destination)
+                os.unlink(source)
+                return strategy
+        case "hardlink":
+            try:
+                os.link(source, destination)
+                return "hardlink"
+            except OSError:
+                pass
+        case "symlink":
+            try:
+                os.symlink(pathlib.Path(source).resolve(), destination)
+                return "symlink"
+            except OSError:
+                pass
+        case "reflink":
+            try:
+                _reflink(source, destination)
+                shutil.copystat(source, destination)
+                return "reflink"
+            except OSError:
+                if os.path.lexists(destination):
+                    os.unlink(destination)
+
+    return copy_file(source, destination)
+
+
+def _reflink(source: pathlib.Path, destination: pathlib.Path):
+    if fcntl is None:
+        raise OSError("Reflinks are not supported on this platform")
+
+    with open(source, "rb") as src, open(destination, "wb") as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+
+
+def transfer_tree(
+    source: pathlib.Path,
+    destination: pathlib.Path,
+    mode: str = "copy",
+    workers: int = None,
+    progress: Optional[Callable[[CopyReport], None]] = None,
+):
+    """
+    Transfer a directory to a destination, see `transfer_file`.
+
+    "move" and "symlink" apply to the whole directory, the other modes transfer the
+    files concurrently on a pool of threads, see `copy_tree`. The report of a renamed
+    or linked directory counts the files and bytes of the tree.
+
+    :return: `CopyReport` of the transfer, its strategy joins the strategies used with "+"
+        when files were transferred differently
+    """
+    if mode not in TRANSFER_MODES:
+        raise ValueError(f"Unknown transfer mode {mode}. Available modes are: {', '.join(TRANSFER_MODES)}")
+
+    start = time.perf_counter()
+
+    if mode == "move":
+        try:
+            os.rename(source, destination)
+            return _tree_report(destination, "move", start, progress)
+        except OSError:
+            report = copy_tree(source, destination, workers=workers, progress=progress)
+            shutil.rmtree(source)
+            return report
+
+    if mode == "symlink":
+        try:
+            os.symlink(pathlib.Path(source).resolve(), destination, target_is_directory=True)
+            return _tree_report(source, "symlink", start, progress)
+        except OSError:
+            mode = "copy"
+
+    def copy_function(src, dst):
+        return transfer_file(src, dst, mode)
+
+    return copy_tree(source, destination, copy_function, workers, progress)
+
+
+def _tree_report(
+    path: pathlib.Path,
+    strategy: str,
+    start: float,
+    progress: Optional[Callable[[CopyReport], None]] = None,
+):
+    report = CopyReport(strategy=strategy)
+
+    pending = [path]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                else:
+                    report.files += 1
+                    report.bytes += entry.stat(follow_symlinks=False).st_size
+
+    report.seconds = time.perf_counter() - start
+    if progress is not None:
+        progress(report)
+
+    return report
@@ -0,0 +1,74 @@
+"""
+Values read from files and cached until the files change.
+"""
+
+import os
+import pathlib
+import threading
+import time
+from typing import Callable, Generic, Iterable, TypeVar
+
+T = TypeVar("T")
+
+_MISSING = object()
+
+
+def file_signature(path: pathlib.Path):
+    """
+    :return: modification time and size of a file or directory, None if it does not exist
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+
+    return stat.st_mtime_ns, stat.st_size
+
+
+class MtimeCache(Generic[T]):
+    """
+    Cached value invalidated when the modification time of one of its files changes.
+
+    The files are polled at most every `poll_interval` seconds, in between the cached
+    value is returned without touching the filesystem.
+    """
+
+    def __init__(
+        self,
+        load: Callable[[], T],
+        paths: Callable[[], Iterable[pathlib.Path]],
+        poll_interval: float = 1.0,
+    ):
+        """
+        :param load: function computing the value
+        :param paths: function returning the files the value is computed from
+        :param poll_interval: minimum number of seconds between two checks of the files
+        """
+        self.load = load
+        self.paths = paths
+        self.poll_interval = poll_interval
+
+        self._value = _MISSING
+        self._signature = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> T:
+        with self._lock:
+            now = time.monotonic()
+            if self._value is not _MISSING and now - self._checked < self.poll_interval:
+                return self._value
+
+            # The signature is taken before loading, a change during the load is seen next time
+            signature = tuple(file_signature(path) for path in self.paths())
+            if self._value is _MISSING or signature != self._signature:
+                self._value = self.load()
+                self._signature = signature
+
+            self._checked = now
+            return self._value
+
+    def invalidate(self):
+        with self._lock:
+            self._value = _MISSING
+            self._signature = None
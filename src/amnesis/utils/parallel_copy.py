@@ -0,0 +1,160 @@
+"""
+Copy of directory trees on a pool of threads.
+"""
+
+import concurrent.futures
+import dataclasses
+import os
+import pathlib
+import shutil
+import time
+from typing import Callable, Optional
+
+# Files larger than a chunk are copied in the kernel, chunk by chunk
+CHUNK_SIZE = 8 * 1024 * 1024
+
+
+@dataclasses.dataclass
+class CopyReport:
+    """
+    Summary of a transfer
+    """
+
+    strategy: str = ""
+    files: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+
+    @property
+    def throughput(self):
+        """
+        Bytes transferred per second
+        """
+        if not self.seconds:
+            return 0.0
+        return self.bytes / self.seconds
+
+    def to_dict(self):
+        return {
+            "strategy": self.strategy,
+            "files": self.files,
+            "bytes": self.bytes,
+            "seconds": round(self.seconds, 6),
+            "throughput": round(self.throughput, 2),
+        }
+
+
+def default_workers():
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+def copy_file(source: pathlib.Path, destination: pathlib.Path, chunk_size: int = CHUNK_SIZE):
+    """
+    Copy a file and its metadata like `shutil.copy2`. Large files are copied chunk by
+    chunk with `os.copy_file_range`, or `os.sendfile` when it is not supported.
+
+    :return: strategy used, one of "copy", "copy_file_range" or "sendfile"
+    """
+    size = os.stat(source).st_size
+
+    if size < chunk_size:
+        shutil.copyfile(source, destination)
+        strategy = "copy"
+    else:
+        with open(source, "rb") as src, open(destination, "wb") as dst:
+            strategy = _copy_chunks(src.fileno(), dst.fileno(), size, chunk_size)
+
+    shutil.copystat(source, destination)
+    return strategy
+
+
+def _copy_chunks(src: int, dst: int, size: int, chunk_size: int):
+    def copy_range(offset, count):
+        return os.copy_file_range(src, dst, count, offset, offset)
+
+    def sendfile(offset, count):
+        return os.sendfile(dst, src, offset, count)
+
+    offset = 0
+    for strategy, copy in (("copy_file_range", copy_range), ("sendfile", sendfile)):
+        try:
+            while offset < size:
+                copied = copy(offset, min(chunk_size, size - offset))
+                if copied == 0:
+                    break
+                offset += copied
+            return strategy
+        except (OSError, AttributeError):
+            # Continue from the last copied byte with the next strategy
+            os.lseek(dst, offset, os.SEEK_SET)
+
+    os.lseek(src, offset, os.SEEK_SET)
+    os.lseek(dst, offset, os.SEEK_SET)
+    while True:
+        buffer = os.read(src, chunk_size)
+        if not buffer:
+            break
+        os.write(dst, buffer)
+
+    return "copy"
+
+
+def copy_tree(
+    source: pathlib.Path,
+    destination: pathlib.Path,
+    copy_function: Callable[[pathlib.Path, pathlib.Path], str] = copy_file,
+    workers: int = None,
+    progress: Optional[Callable[[CopyReport], None]] = None,
+):
+    """
+    Copy a directory tree, the files are copied concurrently on a pool of threads.
+
+    :param source: directory to copy
+    :param destination: path of the copy, must not exist
+    :param copy_function: function copying one file and returning the strategy it used
+    :param workers: number of threads, defaults to `min(32, cpu_count + 4)`
+    :param progress: callable receiving the report each time a file is copied
+    :return: `CopyReport` of the copy
+    """
+    start = time.perf_counter()
+    report = CopyReport()
+    strategies = set()
+
+    directories = []
+    futures = {}
+
+    with concurrent.futures.ThreadPoolExecutor(workers or default_workers()) as executor:
+        pending = [(pathlib.Path(source), pathlib.Path(destination))]
+        while pending:
+            src_dir, dst_dir = pending.pop()
+            dst_dir.mkdir(parents=True)
+            directories.append((src_dir, dst_dir))
+
+            with os.scandir(src_dir) as entries:
+                for entry in entries:
+                    src = src_dir / entry.name
+                    dst = dst_dir / entry.name
+
+                    if entry.is_dir():
+                        pending.append((src, dst))
+                    else:
+                        future = executor.submit(copy_function, src, dst)
+                        futures[future] = entry.stat().st_size
+
+        for future in concurrent.futures.as_completed(futures):
+            strategies.add(future.result())
+            report.files += 1
+            report.bytes += futures[future]
+            report.seconds = time.perf_counter() - start
+
+            if progress is not None:
+                progress(report)
+
+    # Directories are updated last, copying their files changes their modification time
+    for src_dir, dst_dir in reversed(directories):
+        shutil.copystat(src_dir, dst_dir)
+
+    report.strategy = "+".join(sorted(strategies)) or "copy"
+    report.seconds = time.perf_counter() - start
+
+    return report
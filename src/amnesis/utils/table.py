@@ -0,0 +1,212 @@
+"""
+Column-oriented table used to display experiments.
+
+Numeric columns are stored in typed arrays and other columns as lists of strings,
+each with a mask of the missing values. Missing values are displayed empty and
+sorted last.
+"""
+
+import array
+import copy
+import numbers
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+
+class Column:
+    """
+    Typed column of a table
+    """
+
+    def __init__(self, name: str, values: Sequence):
+        """
+        :param name: name of the column
+        :param values: values of the column, None and NaN for missing values. Integers are
+            stored in an `array("q")`, real numbers in an `array("d")` and any other
+            values as strings.
+        """
+        self.name = name
+        # NaN is the only value not equal to itself
+        self.missing = bytearray(value is None or value != value for value in values)
+        self.kind = self._infer_kind(values)
+
+        match self.kind:
+            case "int" | "float":
+                typecode = "q" if self.kind == "int" else "d"
+                self.values = array.array(
+                    typecode, (0 if value is None else value for value in values)
+                )
+            case _:
+                self.values = [
+                    "" if self.missing[i] else str(value) for i, value in enumerate(values)
+                ]
+
+    def __len__(self):
+        return len(self.values)
+
+    def take(self, indices: Sequence[int]):
+        """
+        :param indices: index of each value of the new column, None for a missing value
+        """
+        values = self.values
+        missing = self.missing
+        return Column(
+            self.name,
+            [None if index is None or missing[index] else values[index] for index in indices],
+        )
+
+    def render(self) -> List[str]:
+        if self.kind == "str":
+            return self.values
+
+        missing = self.missing
+        return ["" if missing[i] else str(value) for i, value in enumerate(self.values)]
+
+    @staticmethod
+    def _infer_kind(values: Sequence):
+        kind = "int"
+        for value in values:
+            if value is None:
+                continue
+            if isinstance(value, bool) or not isinstance(value, numbers.Real):
+                return "str"
+            if kind == "int" and not isinstance(value, numbers.Integral):
+                kind = "float"
+            elif kind == "int" and not -(2**63) <= value < 2**63:
+                return "str"
+
+        return kind
+
+
+class Table:
+    """
+    Table of named columns of the same length
+    """
+
+    def __init__(self, columns: List[Column]):
+        self.columns = {column.name: column for column in columns}
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict], columns: List[str] = None):
+        """
+        Build a table in a single pass over the rows.
+
+        :param rows: mapping of column names to values, missing keys are missing values
+        :param columns: names of the columns, defaults to every key in order of appearance
+        """
+        values = {name: [] for name in columns or []}
+        count = 0
+        for row in rows:
+            if columns is None:
+                for name in row:
+                    if name not in values:
+                        values[name] = [None] * count
+            for name, column in values.items():
+                column.append(row.get(name))
+            count += 1
+
+        return cls([Column(name, column) for name, column in values.items()])
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.columns)
+
+    def __len__(self):
+        for column in self.columns.values():
+            return len(column)
+        return 0
+
+    def __contains__(self, name: str):
+        return name in self.columns
+
+    def __getitem__(self, name: str) -> Column:
+        return self.columns[name]
+
+    def rename(self, names: Dict[str, str]):
+        """
+        :param names: new name of the renamed columns
+        """
+        columns = []
+        for name, column in self.columns.items():
+            # The values are shared with this table
+            column = copy.copy(column)
+            column.name = names.get(name, name)
+            columns.append(column)
+
+        return Table(columns)
+
+    def sort(self, keys: List[Tuple[str, bool]]):
+        """
+        Stable sort on several columns, missing values last.
+
+        :param keys: name of each column and whether it is sorted in descending order,
+            by decreasing priority
+        """
+        order = list(range(len(self)))
+        for name, descending in reversed(keys):
+            column = self.columns[name]
+            values = column.values
+            missing = column.missing
+
+            present = [i for i in order if not missing[i]]
+            present.sort(key=values.__getitem__, reverse=descending)
+            order = present + [i for i in order if missing[i]]
+
+        return Table([column.take(order) for column in self.columns.values()])
+
+    def __str__(self):
+        names = list(self.columns)
+        cells = [column.render() for column in self.columns.values()]
+        widths = [max(map(len, column), default=0) for column in cells]
+        widths = [max(width, len(name)) for width, name in zip(widths, names)]
+
+        header = " | ".join(f"{name:<{width}}" for name, width in zip(names, widths))
+        separator = "-+-".join("-" * width for width in widths)
+
+        lines = [header, separator]
+        for row in zip(*cells):
+            lines.append(" | ".join(f"{cell:<{width}}" for cell, width in zip(row, widths)))
+
+        return "\n".join(lines)
+
+
+def display_names(
+    groups: Dict[str, Iterable[str]], reserved: Iterable[str] = ()
+) -> Dict[str, str]:
+    """
+    Displayed names of grouped columns, e.g. the hyperparameters and metrics of
+    experiments: the name of the column, or `<group>.<name>` if the name is reserved or
+    is in several groups.
+
+    :param groups: names of the columns of each group
+    :param reserved: names of the other columns of the table
+    :return: displayed name of each column by its namespaced name `<group>.<name>`,
+        sorted by name within each group
+    """
+    groups = {group: set(names) for group, names in groups.items()}
+
+    seen = set()
+    ambiguous = set(reserved)
+    for names in groups.values():
+        ambiguous |= seen & names
+        seen |= names
+
+    return {
+        f"{group}.{name}": f"{group}.{name}" if name in ambiguous else name
+        for group, names in groups.items()
+        for name in sorted(names)
+    }
+
+
+def parse_sort_keys(sort: str) -> List[Tuple[str, bool]]:
+    """
+    Parse comma separated column names, prefixed by `-` for a descending order
+    """
+    keys = []
+    for name in sort.split(","):
+        name = name.strip()
+        if name.startswith("-"):
+            keys.append((name[1:], True))
+        elif name:
+            keys.append((name, False))
+
+    return keys
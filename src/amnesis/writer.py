@@ -0,0 +1,102 @@
+"""
+Background thread persisting experiment data without blocking the training loop.
+"""
+
+import queue
+import threading
+import time
+from typing import Callable
+
+_STOP = object()
+
+
+class BackgroundWriter:
+    """
+    Run write jobs on a background thread and checkpoint periodically.
+
+    Jobs are kept in a bounded queue and submitting a job never blocks: when
+    `max_pending` jobs are already waiting, the job is refused and the caller keeps its
+    data to merge it into its next job, see `MetricSeries.flush`. Checkpoint requests
+    are coalesced, no matter how many times `mark_dirty` is called between two
+    checkpoints, a single checkpoint is written.
+    """
+
+    def __init__(
+        self,
+        checkpoint: Callable[[], None],
+        interval: float = 30.0,
+        max_pending: int = 64,
+    ):
+        """
+        :param checkpoint: callable writing a checkpoint, called from the background thread
+        :param interval: minimum number of seconds between two checkpoints
+        :param max_pending: maximum number of jobs waiting to be written
+        """
+        self._checkpoint = checkpoint
+        self._interval = interval
+
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._dirty = False
+        self._error = None
+
+        self._thread = threading.Thread(
+            target=self._run, name="amnesis-writer", daemon=True
+        )
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def mark_dirty(self):
+        self._dirty = True
+
+    def submit(self, job: Callable[[], None]):
+        """
+        :return: False if the queue is full and the job was not submitted
+        """
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            return False
+
+        return True
+
+    def close(self):
+        """
+        Write the pending jobs, stop the thread and re-raise its first error, if any.
+        """
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+        if self._error is not None:
+            raise self._error
+
+    def _run(self):
+        next_checkpoint = time.monotonic() + self._interval
+
+        while True:
+            timeout = max(0.0, next_checkpoint - time.monotonic())
+            try:
+                job = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                job = None
+
+            if job is _STOP:
+                return
+
+            if job is not None:
+                self._call(job)
+
+            if time.monotonic() >= next_checkpoint:
+                if self._dirty:
+                    self._dirty = False
+                    self._call(self._checkpoint)
+                next_checkpoint = time.monotonic() + self._interval
+
+    def _call(self, job: Callable[[], None]):
+        try:
+            job()
+        except Exception as error:  # Re-raised in the caller thread by `close`
+            if self._error is None:
+                self._error = error
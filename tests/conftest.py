@@ -0,0 +1,14 @@
+import pytest
+
+from amnesis.repository import Repository
+
+
+@pytest.fixture
+def repository(tmp_path, monkeypatch):
+    """
+    New repository in a temporary directory, which is the current directory of the test
+    """
+    monkeypatch.chdir(tmp_path)
+    repository = Repository()
+    repository.init(tmp_path)
+    return repository
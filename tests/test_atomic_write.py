@@ -0,0 +1,57 @@
+import os
+import stat
+
+from amnesis.experiment_context import ExperimentContext
+from amnesis.utils.atomic_write import atomic_write
+
+
+def file_mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def current_umask():
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+
+def test_new_file_follows_umask(tmp_path):
+    path = tmp_path / "file.txt"
+    with atomic_write(path) as file:
+        file.write("content")
+
+    assert file_mode(path) == 0o666 & ~current_umask()
+
+
+def test_replaced_file_keeps_its_mode(tmp_path):
+    path = tmp_path / "file.txt"
+    path.write_text("old")
+    os.chmod(path, 0o640)
+
+    with atomic_write(path) as file:
+        file.write("new")
+
+    assert path.read_text() == "new"
+    assert file_mode(path) == 0o640
+
+
+def test_failed_write_keeps_the_file(tmp_path):
+    path = tmp_path / "file.txt"
+    path.write_text("old")
+
+    try:
+        with atomic_write(path) as file:
+            file.write("new")
+            raise RuntimeError
+    except RuntimeError:
+        pass
+
+    assert path.read_text() == "old"
+    assert os.listdir(tmp_path) == ["file.txt"]
+
+
+def test_metadata_file_mode(repository):
+    with ExperimentContext("model") as context:
+        context.log_metric("accuracy", 0.5)
+
+    assert file_mode(context.metadata_path) == 0o666 & ~current_umask()
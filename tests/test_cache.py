@@ -0,0 +1,87 @@
+import functools
+import subprocess
+import sys
+import textwrap
+
+import numpy as np
+import pytest
+
+from amnesis.cache import code_fingerprint, fingerprint
+
+
+def add(ctx, x, y):
+    return x + y
+
+
+class AddOne:
+    def __call__(self, ctx, x):
+        return x + 1
+
+
+def test_code_fingerprint_of_functions():
+    def first(ctx, x):
+        return x + 1
+
+    def second(ctx, x):
+        return x + 2
+
+    assert code_fingerprint(first) != code_fingerprint(second)
+    assert code_fingerprint(AddOne()) == code_fingerprint(AddOne())
+    assert code_fingerprint(len) is None
+
+
+def test_code_fingerprint_of_partials():
+    assert code_fingerprint(functools.partial(add, y=1)) == code_fingerprint(
+        functools.partial(add, y=1)
+    )
+    assert code_fingerprint(functools.partial(add, y=1)) != code_fingerprint(
+        functools.partial(add, y=2)
+    )
+    assert code_fingerprint(functools.partial(add, y=object())) is None
+
+
+def test_code_fingerprint_is_the_same_in_every_process(tmp_path):
+    (tmp_path / "module.py").write_text(
+        textwrap.dedent(
+            """
+            def choose(ctx, optimizer):
+                def nested():
+                    return frozenset({"a", "b", "c", "d", "e"})
+
+                if optimizer in {"adam", "sgd", "rmsprop", "adagrad", "lion"}:
+                    return (1, nested)
+                return None
+            """
+        )
+    )
+    script = (
+        f"import sys; sys.path.insert(0, {str(tmp_path)!r}); import module; "
+        "from amnesis.cache import code_fingerprint; print(code_fingerprint(module.choose))"
+    )
+
+    fingerprints = {
+        subprocess.run(
+            [sys.executable, "-c", script],
+            env={"PYTHONHASHSEED": str(seed), "PYTHONPATH": ":".join(sys.path)},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        for seed in range(4)
+    }
+
+    assert len(fingerprints) == 1
+
+
+def test_fingerprint_of_arrays_uses_their_content():
+    array = np.arange(10)
+
+    assert fingerprint(x=array) == fingerprint(x=array.copy())
+    assert fingerprint(x=array) != fingerprint(x=array[::-1].copy())
+    assert fingerprint(x=array) != fingerprint(x=array.astype(float))
+    assert fingerprint(x=b"data") == fingerprint(x=bytearray(b"data"))
+
+
+def test_fingerprint_of_unsupported_objects():
+    with pytest.raises(TypeError):
+        fingerprint(x=object())
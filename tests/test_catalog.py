@@ -0,0 +1,128 @@
+import json
+import sqlite3
+
+import pytest
+
+from amnesis.catalog import SCHEMA_VERSION, Catalog
+from amnesis.experiment import Experiment
+from amnesis.experiment_context import ExperimentContext
+from amnesis.query import parse_query
+
+
+def make_experiment(name, model_name="model", uuid=None, **metrics):
+    return Experiment(
+        git={},
+        model_name=model_name,
+        name=name,
+        uuid=uuid or f"uuid-{name}",
+        date="2024-01-01T00:00:00.000000Z",
+        time=1.0,
+        hyperparameters={},
+        metrics=metrics,
+    )
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    catalog = Catalog(tmp_path / "catalog.db")
+    catalog.create()
+    return catalog
+
+
+def test_upsert_replaces_the_entry(catalog):
+    catalog.upsert(make_experiment("a", accuracy=0.5))
+    catalog.upsert(make_experiment("a", accuracy=0.9))
+
+    assert catalog.get_models() == ["model"]
+    assert catalog.get_experiments("model") == [make_experiment("a", accuracy=0.9)]
+    assert catalog.get_experiments("unknown") is None
+
+
+def test_delete(catalog):
+    catalog.upsert(make_experiment("a"))
+    catalog.upsert(make_experiment("b"))
+    catalog.delete(["uuid-a"])
+
+    assert [experiment.name for experiment in catalog.get_experiments("model")] == ["b"]
+
+
+def test_query_on_fields(catalog):
+    catalog.upsert(make_experiment("a", accuracy=0.5))
+    catalog.upsert(make_experiment("b", accuracy=0.9))
+    catalog.upsert(make_experiment("c", accuracy=float("nan")))
+
+    experiments = catalog.iter_experiments("model", parse_query("metrics.accuracy > 0.7"))
+    assert [experiment.name for experiment in experiments] == ["b"]
+
+    # NaN is stored as null in the JSON fields, the metadata keeps it
+    nan = list(catalog.iter_experiments("model", parse_query("name == 'c'")))[0]
+    assert nan.metrics["accuracy"] != nan.metrics["accuracy"]
+
+
+def test_rebuild(catalog):
+    catalog.upsert(make_experiment("a"))
+
+    count = catalog.rebuild(["model", "empty"], [make_experiment("b")])
+
+    assert count == 1
+    assert catalog.get_models() == ["empty", "model"]
+    assert [experiment.name for experiment in catalog.get_experiments("model")] == ["b"]
+
+
+def test_migrate_catalog_without_fields(tmp_path):
+    path = tmp_path / "catalog.db"
+    experiment = make_experiment("a", accuracy=0.9)
+
+    # Catalog written before the fields column existed
+    connection = sqlite3.connect(path)
+    connection.executescript(
+        """
+        CREATE TABLE models (name TEXT PRIMARY KEY);
+        CREATE TABLE experiments (
+            uuid TEXT PRIMARY KEY,
+            model_name TEXT NOT NULL,
+            name TEXT,
+            date TEXT,
+            metadata TEXT NOT NULL
+        );
+        """
+    )
+    connection.execute("INSERT INTO models VALUES ('model')")
+    connection.execute(
+        "INSERT INTO experiments VALUES (?, ?, ?, ?, ?)",
+        ("uuid-a", "model", "a", experiment.date, json.dumps(experiment.to_dict())),
+    )
+    connection.commit()
+    connection.close()
+
+    catalog = Catalog(path)
+    experiments = catalog.iter_experiments("model", parse_query("metrics.accuracy > 0.5"))
+
+    assert list(experiments) == [experiment]
+    connection = sqlite3.connect(path)
+    assert connection.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    connection.close()
+
+
+def test_saved_experiments_are_indexed(repository):
+    with ExperimentContext("model", experiment_name="a") as context:
+        context.log_metric("accuracy", 0.5)
+
+    catalog = repository.get_catalog()
+    assert catalog.get_experiments("model") == [context.experiment]
+
+
+def test_reindex(repository):
+    with ExperimentContext("model", experiment_name="a"):
+        pass
+    with ExperimentContext("model", experiment_name="b"):
+        pass
+
+    catalog = repository.get_catalog()
+    catalog.path.unlink()
+
+    assert repository.reindex() == 2
+    assert sorted(experiment.name for experiment in catalog.get_experiments("model")) == [
+        "a",
+        "b",
+    ]
@@ -0,0 +1,91 @@
+import csv
+import json
+
+import pyarrow.ipc
+import pyarrow.parquet
+import pytest
+
+from amnesis.command.export import export
+from amnesis.experiment_context import ExperimentContext
+from amnesis.export import export_experiments
+
+
+@pytest.fixture
+def repository(repository):
+    values = [
+        {"lr": 0.1, "epochs": 1, "layers": [1, 2], "mixed": 1, "flag": True},
+        {"lr": 1, "epochs": 2, "layers": [3], "mixed": "a", "flag": False},
+        {"lr": 0.3, "epochs": 3},
+    ]
+    for index, hyperparameters in enumerate(values):
+        with ExperimentContext("model", experiment_name=f"e{index}") as context:
+            for name, value in hyperparameters.items():
+                context.log_hyperparameter(name, value)
+            context.log_metric("accuracy", index / 10)
+
+    return repository
+
+
+def read(path, format):
+    if format == "jsonl":
+        return [json.loads(line) for line in path.read_text().splitlines()]
+    if format == "csv":
+        with open(path, newline="") as file:
+            return list(csv.DictReader(file))
+    if format == "parquet":
+        return pyarrow.parquet.read_table(path).to_pylist()
+
+    with pyarrow.ipc.open_file(path) as reader:
+        return reader.read_all().to_pylist()
+
+
+@pytest.mark.parametrize("format", ["parquet", "arrow", "csv", "jsonl"])
+def test_export(repository, tmp_path, format):
+    path = tmp_path / f"experiments.{format}"
+
+    assert repository.export(path, batch_size=2) == 3
+
+    rows = sorted(read(path, format), key=lambda row: row["experiment"])
+    assert [row["experiment"] for row in rows] == ["e0", "e1", "e2"]
+    assert {"model", "uuid", "date", "time", "status", "metrics.accuracy"} <= rows[0].keys()
+    assert json.loads(rows[0]["hyperparameters.layers"]) == [1, 2]
+
+    if format in ("parquet", "arrow"):
+        # Integers and reals are widened, other mixed types are strings
+        assert [row["hyperparameters.lr"] for row in rows] == [0.1, 1.0, 0.3]
+        assert [row["hyperparameters.epochs"] for row in rows] == [1, 2, 3]
+        assert [row["hyperparameters.mixed"] for row in rows] == ["1", "a", None]
+        assert [row["hyperparameters.flag"] for row in rows] == [True, False, None]
+    if format == "csv":
+        assert [row["hyperparameters.layers"] for row in rows] == ["[1, 2]", "[3]", ""]
+
+
+def test_experiments_are_read_once(repository, tmp_path):
+    experiments = (experiment for experiment in repository.iter_experiments())
+
+    assert export_experiments(experiments, tmp_path / "experiments.csv") == 3
+    assert len(read(tmp_path / "experiments.csv", "csv")) == 3
+
+
+def test_where(repository, tmp_path):
+    path = tmp_path / "experiments.jsonl"
+
+    assert repository.export(path, where="metrics.accuracy > 0") == 2
+
+
+def test_unknown_format(repository, tmp_path):
+    with pytest.raises(ValueError):
+        repository.export(tmp_path / "experiments.xlsx")
+
+    assert not (tmp_path / "experiments.xlsx").exists()
+
+
+def test_export_command(repository, tmp_path, capsys):
+    export(repository, str(tmp_path / "experiments.csv"))
+    assert "Exported 3 experiments" in capsys.readouterr().out
+
+    export(repository, str(tmp_path / "experiments.csv"), model_name="unknown")
+    assert "Model unknown not found" in capsys.readouterr().out
+
+    export(repository, str(tmp_path / "experiments.txt"))
+    assert "Unknown format txt" in capsys.readouterr().out
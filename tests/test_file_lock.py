@@ -0,0 +1,75 @@
+import multiprocessing
+import os
+import sys
+
+import pytest
+
+from amnesis.experiment_context import ExperimentContext
+from amnesis.utils import FileLock
+
+fcntl = pytest.importorskip("fcntl")
+
+
+def can_lock(path, operation):
+    file_descriptor = os.open(path, os.O_RDWR)
+    try:
+        fcntl.flock(file_descriptor, operation | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    finally:
+        os.close(file_descriptor)
+
+    return True
+
+
+def test_exclusive_lock(tmp_path):
+    path = tmp_path / "lock"
+    with FileLock(path):
+        assert not can_lock(path, fcntl.LOCK_SH)
+
+    assert can_lock(path, fcntl.LOCK_EX)
+
+
+def test_shared_lock(tmp_path):
+    path = tmp_path / "lock"
+    with FileLock(path, shared=True):
+        assert can_lock(path, fcntl.LOCK_SH)
+        assert not can_lock(path, fcntl.LOCK_EX)
+
+
+def test_lock_is_reentrant(tmp_path):
+    path = tmp_path / "lock"
+    with FileLock(path):
+        with FileLock(path):
+            pass
+        assert not can_lock(path, fcntl.LOCK_EX)
+
+    assert can_lock(path, fcntl.LOCK_EX)
+
+
+def run_experiments(count):
+    for index in range(count):
+        with ExperimentContext("model") as context:
+            context.log_metric("index", index)
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="the workers are forked")
+def test_experiments_of_several_processes(repository):
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=run_experiments, args=(10,)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    assert all(process.exitcode == 0 for process in processes)
+
+    experiments = repository.get_catalog().get_experiments("model")
+    assert len(experiments) == 40
+    assert len({experiment.name for experiment in experiments}) == 40
+
+    def by_uuid(experiment):
+        return experiment.uuid
+
+    scanned = repository._scan_experiments("model")
+    assert sorted(experiments, key=by_uuid) == sorted(scanned, key=by_uuid)
@@ -0,0 +1,78 @@
+import os
+
+import pytest
+
+from amnesis.experiment_context import ExperimentContext
+from amnesis.utils import transfer_file
+
+
+@pytest.fixture
+def source(tmp_path):
+    source = tmp_path / "source.txt"
+    source.write_text("content")
+    return source
+
+
+def test_copy(source, tmp_path):
+    destination = tmp_path / "copy.txt"
+
+    assert transfer_file(source, destination, "copy") == "copy"
+    assert destination.read_text() == "content"
+    assert not os.path.samefile(source, destination)
+
+
+def test_move(source, tmp_path):
+    destination = tmp_path / "moved.txt"
+
+    assert transfer_file(source, destination, "move") == "move"
+    assert destination.read_text() == "content"
+    assert not source.exists()
+
+
+def test_hardlink(source, tmp_path):
+    destination = tmp_path / "link.txt"
+
+    assert transfer_file(source, destination, "hardlink") == "hardlink"
+    assert os.path.samefile(source, destination)
+
+
+def test_symlink(source, tmp_path):
+    destination = tmp_path / "link.txt"
+
+    assert transfer_file(source, destination, "symlink") == "symlink"
+    assert destination.is_symlink()
+    assert destination.resolve() == source.resolve()
+
+
+def test_reflink_falls_back_to_a_copy(source, tmp_path):
+    destination = tmp_path / "clone.txt"
+
+    assert transfer_file(source, destination, "reflink") in ("reflink", "copy")
+    assert destination.read_text() == "content"
+    assert not os.path.samefile(source, destination)
+
+
+def test_unknown_mode(source, tmp_path):
+    with pytest.raises(ValueError):
+        transfer_file(source, tmp_path / "destination.txt", "teleport")
+
+
+@pytest.mark.parametrize("mode", ["copy", "move", "hardlink", "symlink", "reflink"])
+def test_log_artifact_modes(repository, source, mode):
+    with ExperimentContext("model") as context:
+        strategy = context.log_artifact(source, mode=mode)
+
+    artifact = repository.resolve_artifact(context.experiment, "source.txt")
+    report = context.experiment.artifacts["source.txt"]
+
+    assert artifact.read_text() == "content"
+    assert report["strategy"] == strategy
+    assert report["files"] == 1
+    assert report["bytes"] == len("content")
+    assert source.exists() == (mode != "move")
+
+
+def test_log_artifact_unknown_mode(repository, source):
+    with ExperimentContext("model") as context:
+        with pytest.raises(ValueError):
+            context.log_artifact(source, mode="teleport")
@@ -0,0 +1,123 @@
+import datetime
+import shutil
+
+import pytest
+
+from amnesis.command.gc import gc
+from amnesis.experiment_context import ExperimentContext
+from amnesis.name_registry import NameRegistry
+from amnesis.retention import (
+    RetentionPolicy,
+    directory_size,
+    format_size,
+    parse_age,
+    parse_size,
+)
+
+
+@pytest.fixture
+def repository(repository, tmp_path):
+    for index, loss in enumerate([0.1, 0.5, 0.9, 0.3]):
+        artifact = tmp_path / "artifact.bin"
+        artifact.write_bytes(b"0" * 1000 * (index + 1))
+        with ExperimentContext("model", experiment_name=f"e{index}") as context:
+            context.log_metric("loss", loss)
+            context.log_artifact(artifact)
+
+    return repository
+
+
+def names(experiments):
+    return sorted(experiment.name for experiment in experiments)
+
+
+def registered_names(repository):
+    registry = NameRegistry(repository.get_model_dir("model"))
+    return sorted({path.name for path in registry.path.iterdir()} - {NameRegistry.READY_MARKER})
+
+
+def test_parse():
+    assert parse_size("500M") == 500 * 1024**2
+    assert parse_size("1.5 GiB") == int(1.5 * 1024**3)
+    assert parse_age("12h") == datetime.timedelta(hours=12)
+    assert format_size(1536) == "1.5KB"
+    with pytest.raises(ValueError):
+        parse_size("big")
+    with pytest.raises(ValueError):
+        parse_age("7")
+
+
+def test_policy_requires_a_rule():
+    with pytest.raises(ValueError):
+        RetentionPolicy()
+    with pytest.raises(ValueError):
+        RetentionPolicy(keep_top_k=1)
+
+
+def test_directory_size(tmp_path):
+    (tmp_path / "a").write_bytes(b"0" * 10)
+    (tmp_path / "dir").mkdir()
+    (tmp_path / "dir" / "b").write_bytes(b"0" * 5)
+
+    assert directory_size(tmp_path) == 15
+    assert directory_size(tmp_path, exclude=["dir"]) == 10
+    assert directory_size(tmp_path / "missing") == 0
+
+
+def test_gc(repository):
+    report = repository.gc(RetentionPolicy(keep_last=1, keep_top_k=1, metric="loss"))
+
+    assert names(report.experiments) == ["e1", "e2"]
+    assert report.freed_bytes >= 5000
+    assert names(repository.iter_experiments()) == ["e0", "e3"]
+    assert names(repository.iter_experiments(use_catalog=False)) == ["e0", "e3"]
+    assert registered_names(repository) == ["e0", "e3"]
+
+
+def test_dry_run(repository):
+    report = repository.gc(RetentionPolicy(keep_last=1), dry_run=True)
+
+    assert names(report.experiments) == ["e0", "e1", "e2"]
+    assert len(list(repository.iter_experiments())) == 4
+
+
+def test_budget_deletes_the_oldest_experiments(repository):
+    total = repository.gc(RetentionPolicy(keep_last=4), dry_run=True).total_bytes
+    report = repository.gc(RetentionPolicy(budget=total - 3000))
+
+    assert names(report.experiments) == ["e0", "e1"]
+
+
+def test_keep_metadata(repository):
+    report = repository.gc(RetentionPolicy(keep_last=1, keep_metadata=True))
+
+    assert names(report.experiments) == ["e0", "e1", "e2"]
+    assert len(list(repository.iter_experiments(use_catalog=False))) == 4
+    for experiment in report.experiments:
+        experiment_dir = repository.get_experiment_dir("model", experiment.uuid)
+        assert [path.name for path in experiment_dir.iterdir()] == ["metadata.json"]
+
+
+@pytest.mark.parametrize("keep_metadata", [False, True])
+def test_gc_of_packed_experiments(repository, keep_metadata):
+    assert repository.pack() == 4
+    # The directories left have an artifact, remove one to leave only packed metadata
+    first = next(e for e in repository.iter_experiments() if e.name == "e0")
+    shutil.rmtree(repository.get_experiment_dir("model", first.uuid))
+
+    report = repository.gc(RetentionPolicy(keep_last=1, keep_metadata=keep_metadata))
+
+    assert names(report.experiments) == ["e0", "e1", "e2"]
+    expected = ["e0", "e1", "e2", "e3"] if keep_metadata else ["e3"]
+    assert names(repository.iter_experiments(use_catalog=False)) == expected
+
+
+def test_gc_command(repository, capsys):
+    gc(repository)
+    assert "At least one of" in capsys.readouterr().out
+
+    gc(repository, keep_last=3, dry_run=True)
+    assert "Would delete 1 experiments" in capsys.readouterr().out
+
+    gc(repository, keep_last=3, keep_metadata=True)
+    assert "Deleted the files of 1 experiments" in capsys.readouterr().out
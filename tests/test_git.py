@@ -0,0 +1,167 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from amnesis import git
+from amnesis.experiment_context import ExperimentContext
+from amnesis.repository import Repository
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+
+def run_git(root, *args):
+    command = ["git", "-c", "user.name=amnesis", "-c", "user.email=amnesis@example.com", *args]
+    return subprocess.run(command, cwd=root, check=True, capture_output=True).stdout.decode()
+
+
+@pytest.fixture
+def root(tmp_path):
+    root = tmp_path / "project"
+    (root / "src" / "package").mkdir(parents=True)
+    (root / "a.txt").write_text("a")
+    (root / "a-b").write_text("executable")
+    (root / "a-b").chmod(0o755)
+    (root / "src" / "package" / "module.py").write_text("module")
+    (root / "src" / "main.py").write_text("main")
+    os.symlink("a.txt", root / "link")
+
+    run_git(root, "init", "-q", "-b", "main")
+    run_git(root, "add", ".")
+    run_git(root, "commit", "-q", "-m", "initial")
+    return root
+
+
+def repository(root):
+    return git.GitRepository(root, root / ".git", poll_interval=0)
+
+
+def head(root):
+    return run_git(root, "rev-parse", "HEAD").strip()
+
+
+def test_resolve_head(root):
+    commit = head(root)
+
+    assert git.resolve_head(root / ".git") == (commit, "main")
+
+    run_git(root, "pack-refs", "--all")
+    assert git.resolve_head(root / ".git") == (commit, "main")
+
+    run_git(root, "checkout", "-q", "--detach")
+    assert git.resolve_head(root / ".git") == (commit, None)
+
+    run_git(root, "checkout", "-q", "--orphan", "empty")
+    assert git.resolve_head(root / ".git") == (None, "empty")
+
+
+def test_find_git_dir(root):
+    assert git.find_git_dir(root / "src" / "package") == (root, root / ".git")
+    assert git.find_git_dir(root.parent) is None
+
+
+@pytest.mark.parametrize("version", [2, 3, 4])
+def test_index_tree_id(root, version):
+    run_git(root, "update-index", "--index-version", str(version))
+    entries = git.read_index(root / ".git" / "index")
+
+    assert [entry.path for entry in entries] == [
+        b"a-b",
+        b"a.txt",
+        b"link",
+        b"src/main.py",
+        b"src/package/module.py",
+    ]
+    assert git.index_tree_id(entries).hex() == run_git(root, "write-tree").strip()
+
+
+def test_read_object(root):
+    for index in range(3):
+        (root / "a.txt").write_text("a" * 1000 + str(index))
+        run_git(root, "commit", "-q", "-am", f"commit {index}")
+
+    def check_objects():
+        objects = run_git(root, "rev-list", "--all", "--objects").split()
+        for object_id in (object_id for object_id in objects if len(object_id) == 40):
+            kind, content = git.read_object(root / ".git", bytes.fromhex(object_id))
+            assert content == subprocess.run(
+                ["git", "cat-file", kind.decode(), object_id], cwd=root, capture_output=True
+            ).stdout
+
+    check_objects()
+    # Packed objects are stored as deltas of each other
+    run_git(root, "gc", "-q", "--aggressive")
+    check_objects()
+
+    assert git.read_tree_id(root / ".git", head(root)).hex() == run_git(root, "write-tree").strip()
+    with pytest.raises(KeyError):
+        git.read_object(root / ".git", bytes(20))
+
+
+def test_get_info(root):
+    info = repository(root).get_info()
+
+    assert info == {"commit": head(root), "branch": "main", "dirty": False}
+
+
+def test_modified_and_removed_files_are_dirty(root):
+    repo = repository(root)
+    (root / "a.txt").write_text("modified")
+    assert repo.get_info()["dirty"] is True
+
+    run_git(root, "checkout", "--", "a.txt")
+    assert repo.get_info()["dirty"] is False
+
+    (root / "src" / "main.py").unlink()
+    assert repo.get_info()["dirty"] is True
+
+
+def test_staged_changes_are_dirty(root):
+    repo = repository(root)
+    (root / "a.txt").write_text("staged")
+    (root / "new.txt").write_text("new")
+    run_git(root, "add", "a.txt")
+
+    # The working tree matches the index
+    assert git.is_dirty(root, git.read_index(root / ".git" / "index")) is False
+    assert repo.get_info()["dirty"] is True
+
+    run_git(root, "commit", "-q", "-m", "staged")
+    assert repo.get_info() == {"commit": head(root), "branch": "main", "dirty": False}
+
+    # Untracked files are ignored, new staged files are not
+    run_git(root, "add", "new.txt")
+    assert repo.get_info()["dirty"] is True
+
+
+def test_the_working_tree_scan_is_reused(root, monkeypatch):
+    scans = []
+    is_dirty = git.is_dirty
+    monkeypatch.setattr(git, "is_dirty", lambda *args: scans.append(1) or is_dirty(*args))
+
+    repo = git.GitRepository(root, root / ".git", poll_interval=3600)
+    repo.get_info()
+    (root / "a.txt").write_text("modified")
+
+    assert repo.get_info()["dirty"] is False
+    assert len(scans) == 1
+
+    repo.poll_interval = 0
+    assert repo.get_info()["dirty"] is True
+    assert len(scans) == 2
+
+
+def test_get_git_info(root, tmp_path):
+    assert git.get_git_info(root / "src")["commit"] == head(root)
+    assert git.get_git_info(tmp_path) == {}
+
+
+def test_experiments_record_git_info(root, monkeypatch):
+    monkeypatch.chdir(root)
+    Repository().init(root)
+    with ExperimentContext("model") as context:
+        pass
+
+    # The repository is untracked, the working tree is clean
+    assert context.experiment.git == {"commit": head(root), "branch": "main", "dirty": False}
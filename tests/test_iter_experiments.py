@@ -0,0 +1,52 @@
+import pytest
+
+from amnesis.experiment_context import ExperimentContext
+
+
+@pytest.fixture
+def repository(repository):
+    # Experiments are read from their metadata files
+    repository.get_catalog().path.unlink()
+
+    for index in range(50):
+        with ExperimentContext(f"model{index % 2}") as context:
+            context.log_metric("index", index)
+
+    return repository
+
+
+def indices(experiments):
+    return sorted(experiment.metrics["index"] for experiment in experiments)
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_every_experiment_is_streamed(repository, workers):
+    experiments = repository.iter_experiments(workers=workers)
+
+    assert indices(experiments) == list(range(50))
+
+
+def test_models(repository):
+    assert indices(repository.iter_experiments("model1")) == list(range(1, 50, 2))
+    assert indices(repository.get_experiments("model0")) == list(range(0, 50, 2))
+    assert repository.get_experiments("unknown") is None
+
+
+def test_where(repository):
+    experiments = repository.iter_experiments(where="metrics.index >= 45")
+
+    assert indices(experiments) == [45, 46, 47, 48, 49]
+
+
+def test_unreadable_and_running_experiments_are_skipped(repository):
+    experiment = next(iter(repository.get_experiments("model0")))
+    experiment_dir = repository.get_experiment_dir("model0", experiment.uuid)
+    (experiment_dir / "metadata.json").write_text("{")
+    (repository.get_model_dir("model0") / "running").mkdir()
+
+    with pytest.warns(UserWarning, match="unreadable"):
+        experiments = list(repository.iter_experiments("model0", workers=2))
+
+    assert len(experiments) == 24
+    assert experiment.uuid not in {experiment.uuid for experiment in experiments}
+
@@ -0,0 +1,101 @@
+import dataclasses
+
+import pytest
+
+from amnesis.command.migrate_layout import migrate_layout
+from amnesis.experiment import Experiment
+from amnesis.experiment_context import ExperimentContext
+from amnesis.repository import Repository
+from amnesis.session import get_session
+
+
+def run(tmp_path, name):
+    artifact = tmp_path / "artifact.txt"
+    artifact.write_text(name)
+    with ExperimentContext("model", experiment_name=name) as context:
+        context.log_artifact(artifact)
+
+    return context.experiment
+
+
+def save_running(repository):
+    experiment = Experiment(
+        git={},
+        model_name="model",
+        name="running",
+        uuid="ff" * 16,
+        date="",
+        time=0.0,
+        hyperparameters={},
+        metrics={},
+        status="running",
+    )
+    experiment.save(repository.get_metadata_path("model", experiment.uuid))
+    return experiment
+
+
+def relative_dir(repository, experiment):
+    path = repository.get_experiment_dir("model", experiment.uuid)
+    return path.relative_to(repository.get_model_dir("model")).as_posix()
+
+
+def test_sharded_layout(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    repository = Repository()
+    repository.init(tmp_path, layout="sharded")
+
+    experiment = run(tmp_path, "e0")
+
+    uuid = experiment.uuid
+    assert relative_dir(repository, experiment) == f"{uuid[:2]}/{uuid}"
+    assert [e.name for e in repository.iter_experiments(use_catalog=False)] == ["e0"]
+    assert repository.resolve_artifact(experiment, "artifact.txt").read_text() == "e0"
+
+
+def test_migrate_layout(repository, tmp_path):
+    # The contexts share the repository of the session, whose configuration is polled
+    repository = get_session().repository
+    experiments = [run(tmp_path, f"e{index}") for index in range(3)]
+    running = save_running(repository)
+    repository.pack()
+
+    assert repository.migrate_layout("sharded") == 3
+    for experiment in experiments:
+        assert relative_dir(repository, experiment) == f"{experiment.uuid[:2]}/{experiment.uuid}"
+        artifact = repository.resolve_artifact(experiment, "artifact.txt")
+        assert artifact.read_text() == experiment.name
+    assert relative_dir(repository, running) == running.uuid
+
+    # New experiments use the new layout
+    new = run(tmp_path, "new")
+    assert relative_dir(repository, new) == f"{new.uuid[:2]}/{new.uuid}"
+
+    # Running experiments are moved once finished
+    dataclasses.replace(running, status="finished").save(
+        repository.get_metadata_path("model", running.uuid)
+    )
+    assert repository.migrate_layout("sharded") == 1
+
+    assert repository.migrate_layout("flat") == 5
+    model_dir = repository.get_model_dir("model")
+    assert all(len(path.name) == 32 for path in model_dir.iterdir() if path.name[0] != ".")
+
+    names = sorted(e.name for e in repository.iter_experiments(use_catalog=False))
+    assert names == ["e0", "e1", "e2", "new", "running"]
+
+
+def test_unknown_layout(repository, tmp_path):
+    with pytest.raises(ValueError):
+        repository.migrate_layout("nested")
+    with pytest.raises(ValueError):
+        Repository().init(tmp_path / "other", layout="nested")
+
+    assert repository.get_config()["layout"] == "flat"
+
+
+def test_migrate_layout_command(repository, tmp_path, capsys):
+    run(tmp_path, "e0")
+
+    migrate_layout(get_session().repository, "sharded")
+
+    assert "Moved 1 experiments to the sharded layout" in capsys.readouterr().out
@@ -0,0 +1,76 @@
+import pytest
+
+from amnesis.command.list_experiments import list_experiments
+from amnesis.experiment_context import ExperimentContext
+
+
+@pytest.fixture
+def repository(repository):
+    for name, lr, accuracy in (("a", 0.1, 0.5), ("b", 0.2, 0.9), ("c", 0.3, None)):
+        with ExperimentContext("model", experiment_name=name) as context:
+            context.log_hyperparameter("lr", lr)
+            context.log_hyperparameter("model", "resnet")
+            if accuracy is not None:
+                context.log_metric("accuracy", accuracy)
+                context.log_metric("lr", lr / 10)
+
+    return repository
+
+
+def rows(output):
+    return [[cell.strip() for cell in line.split(" | ")] for line in output.splitlines()]
+
+
+def test_list_experiments(repository, capsys):
+    list_experiments(repository)
+
+    table = rows(capsys.readouterr().out)
+    assert table[0] == ["model", "experiment", "date", "uuid"]
+    assert sorted(row[1] for row in table[2:]) == ["a", "b", "c"]
+
+
+def test_clashing_columns_are_namespaced(repository, capsys):
+    list_experiments(repository, hyperparameters=True, metrics=True, sort="experiment")
+
+    table = rows(capsys.readouterr().out)
+    assert table[0] == [
+        "model",
+        "experiment",
+        "hyperparameters.lr",
+        "hyperparameters.model",
+        "accuracy",
+        "metrics.lr",
+    ]
+    assert table[2] == ["model", "a", "0.1", "resnet", "0.5", "0.01"]
+
+
+@pytest.mark.parametrize(
+    "sort, desc, order",
+    [
+        ("accuracy", False, ["a", "b", "c"]),
+        ("-accuracy", False, ["b", "a", "c"]),
+        ("accuracy", True, ["b", "a", "c"]),
+        ("hyperparameters.lr", True, ["c", "b", "a"]),
+    ],
+)
+def test_sort(repository, capsys, sort, desc, order):
+    list_experiments(repository, hyperparameters=True, metrics=True, sort=sort, desc=desc)
+
+    assert [row[1] for row in rows(capsys.readouterr().out)[2:]] == order
+
+
+def test_where(repository, capsys):
+    list_experiments(repository, where="metrics.accuracy > 0.6")
+
+    assert [row[1] for row in rows(capsys.readouterr().out)[2:]] == ["b"]
+
+
+def test_errors(repository, capsys):
+    list_experiments(repository, model_name="unknown")
+    assert "Model unknown not found" in capsys.readouterr().out
+
+    list_experiments(repository, metrics=True, sort="unknown")
+    assert "Column unknown not found" in capsys.readouterr().out
+
+    list_experiments(repository, where="metrics.accuracy >")
+    assert "Invalid expression" in capsys.readouterr().out
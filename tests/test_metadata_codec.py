@@ -0,0 +1,88 @@
+import pathlib
+
+import pytest
+
+from amnesis.experiment import SCHEMA_VERSION, Experiment
+from amnesis.experiment_context import ExperimentContext
+from amnesis.metadata_codec import JsonCodec, MsgpackCodec, get_codec, get_path_codec
+from amnesis.repository import Repository
+from amnesis.session import get_session
+
+METADATA = {
+    "git": {"commit": "abc"},
+    "model_name": "model",
+    "name": "experiment",
+    "uuid": "0123",
+    "date": "2024-01-01 00:00:00",
+    "time": 1.5,
+    "hyperparameters": {"lr": 0.1, "layers": [1, 2]},
+    "metrics": {"accuracy": 0.9},
+}
+
+
+@pytest.mark.parametrize("codec", [JsonCodec(), MsgpackCodec()])
+def test_round_trip(codec):
+    assert codec.decode(codec.encode(METADATA)) == METADATA
+
+    with pytest.raises(ValueError):
+        codec.decode(b"\xc1")
+
+
+def test_get_codec():
+    codec = MsgpackCodec()
+
+    assert get_codec(codec) is codec
+    assert isinstance(get_codec("json"), JsonCodec)
+    assert isinstance(get_path_codec(pathlib.Path("metadata.msgpack")), MsgpackCodec)
+    with pytest.raises(ValueError):
+        get_codec("yaml")
+
+
+def test_metadata_is_upgraded():
+    experiment = Experiment.from_dict({**METADATA, "git": "abc"})
+
+    assert experiment.git == {"commit": "abc"}
+    assert experiment.status == "finished"
+    assert experiment.profile == {}
+    assert Experiment.from_dict({**METADATA, "git": "self.git.head"}).git == {}
+    assert experiment.to_dict()["schema_version"] == SCHEMA_VERSION
+
+
+def test_newer_metadata_is_refused():
+    with pytest.raises(ValueError, match="Upgrade amnesis"):
+        Experiment.from_dict({**METADATA, "schema_version": SCHEMA_VERSION + 1})
+
+
+@pytest.mark.parametrize("codec", ["json", "msgpack"])
+def test_save_and_load(tmp_path, codec):
+    path = tmp_path / get_codec(codec).file_name
+    experiment = Experiment.from_dict(METADATA)
+    experiment.save(path)
+
+    assert Experiment.load(path) == experiment
+
+
+def test_repository_mixing_codecs(repository):
+    with ExperimentContext("model", experiment_name="json") as first:
+        pass
+    # Contexts share the repository of the session, whose configuration is polled
+    get_session().repository.set_config(metadata_codec="msgpack")
+    with ExperimentContext("model", experiment_name="msgpack") as second:
+        pass
+
+    first_dir = repository.get_experiment_dir("model", first.experiment.uuid)
+    second_dir = repository.get_experiment_dir("model", second.experiment.uuid)
+    assert (first_dir / "metadata.json").exists()
+    assert (second_dir / "metadata.msgpack").exists()
+
+    # The experiments are read back from their files
+    repository.get_catalog().path.unlink()
+    names = sorted(experiment.name for experiment in repository.iter_experiments())
+    assert names == ["json", "msgpack"]
+
+
+def test_init_with_an_unknown_codec(tmp_path):
+    with pytest.raises(ValueError):
+        Repository().init(tmp_path, metadata_codec="yaml")
+
+    assert not (tmp_path / ".amnesis").exists()
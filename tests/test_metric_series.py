@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from amnesis.experiment_context import ExperimentContext
+from amnesis.metric_series import MetricSeries, read_series, series_name, series_path
+
+
+def test_append_and_read(tmp_path):
+    series = MetricSeries(tmp_path / "loss.bin", buffer_size=2)
+    series.append(1.0)
+    series.append(0.5, timestamp=10.0)
+    series.append(0.25, step=10)
+    series.flush()
+
+    points = read_series(tmp_path / "loss.bin")
+    assert points["step"].tolist() == [0, 1, 10]
+    assert points["value"].tolist() == [1.0, 0.5, 0.25]
+    assert points["timestamp"][1] == 10.0
+
+
+def test_reopened_series_continues_the_steps(tmp_path):
+    series = MetricSeries(tmp_path / "loss.bin")
+    series.append(1.0, step=5)
+    series.flush()
+
+    series = MetricSeries(tmp_path / "loss.bin")
+    series.append(0.5)
+    series.flush()
+
+    assert read_series(tmp_path / "loss.bin")["step"].tolist() == [5, 6]
+
+
+def test_buffered_points_are_not_written(tmp_path):
+    series = MetricSeries(tmp_path / "loss.bin", buffer_size=10)
+    series.append(1.0)
+
+    assert not (tmp_path / "loss.bin").exists()
+
+
+@pytest.mark.parametrize("name", ["loss", "train/loss", "accuracy@1", "é"])
+def test_series_names(tmp_path, name):
+    path = series_path(tmp_path, name)
+
+    assert path.parent == tmp_path
+    assert series_name(path) == name
+
+
+@pytest.mark.parametrize("asynchronous", [False, True])
+def test_logged_series(repository, asynchronous):
+    with ExperimentContext("model", asynchronous=asynchronous) as context:
+        for step in range(100):
+            context.log_metric("train/loss", 1 / (step + 1), step=step)
+        context.log_metric("accuracy", 0.9)
+
+    experiment = context.experiment
+    assert experiment.metrics == {"train/loss": 0.01, "accuracy": 0.9}
+    assert repository.get_metric_series_names(experiment) == ["train/loss"]
+
+    points = repository.get_metric_series(experiment, "train/loss")
+    assert points["step"].tolist() == list(range(100))
+    np.testing.assert_allclose(points["value"], 1 / np.arange(1, 101))
+
+    with pytest.raises(FileNotFoundError):
+        repository.get_metric_series(experiment, "accuracy")
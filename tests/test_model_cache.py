@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+from amnesis.experiment_context import ExperimentContext
+from amnesis.model_cache import MODEL_CACHE, ModelCache
+
+
+@pytest.fixture(autouse=True)
+def clear_model_cache():
+    MODEL_CACHE.clear()
+    yield
+    MODEL_CACHE.clear()
+
+
+def test_least_recently_used_is_evicted():
+    cache = ModelCache(max_bytes=100)
+    cache.put("a", "model a", 40)
+    cache.put("b", "model b", 40)
+    cache.get("a")
+    cache.put("c", "model c", 40)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert cache.size == 80
+
+
+def test_max_entries():
+    cache = ModelCache(max_entries=2)
+    for key in "abc":
+        cache.put(key, key, 0)
+
+    assert len(cache) == 2
+    assert "a" not in cache
+
+
+def test_models_larger_than_the_cache_are_not_cached():
+    cache = ModelCache(max_bytes=10)
+    cache.put("a", "model", 11)
+
+    assert "a" not in cache
+    assert cache.size == 0
+
+
+def test_get_or_load_loads_once():
+    cache = ModelCache()
+    loads = []
+
+    def load():
+        loads.append(1)
+        return object()
+
+    first = cache.get_or_load("a", load, 1)
+
+    assert cache.get_or_load("a", load, 1) is first
+    assert len(loads) == 1
+
+
+def test_load_model(repository):
+    weights = np.arange(12, dtype=np.float32).reshape(3, 4)
+    with ExperimentContext("model", experiment_name="trained") as context:
+        context.log_model(weights, "numpy")
+
+    model = repository.load_model("model", "trained", "numpy")
+
+    np.testing.assert_array_equal(model, weights)
+    assert isinstance(model, np.memmap)
+    assert repository.load_model("model", context.experiment.uuid, "numpy") is model
+    assert repository.load_model("model", "trained", "numpy", cache=False) is not model
+
+
+def test_load_model_without_mmap(repository):
+    weights = {"w": np.ones(3), "b": np.zeros(2)}
+    with ExperimentContext("model", experiment_name="trained") as context:
+        context.log_model(weights, "arrays")
+
+    model = repository.load_model("model", "trained", "arrays", mmap=False)
+
+    assert sorted(model) == ["b", "w"]
+    assert not isinstance(model["w"], np.memmap)
+    np.testing.assert_array_equal(model["w"], weights["w"])
+
+
+def test_load_missing_model(repository):
+    with ExperimentContext("model", experiment_name="empty"):
+        pass
+
+    with pytest.raises(FileNotFoundError):
+        repository.load_model("model", "empty", "numpy")
+    with pytest.raises(FileNotFoundError):
+        repository.load_model("model", "unknown", "numpy")
@@ -0,0 +1,83 @@
+import concurrent.futures
+import os
+import shutil
+
+import pytest
+
+from amnesis.experiment_context import ExperimentContext
+from amnesis.name_registry import NameRegistry
+
+
+def test_reserve(tmp_path):
+    registry = NameRegistry(tmp_path)
+    registry.initialize(lambda: [])
+
+    assert registry.reserve("a", "1")
+    assert not registry.reserve("a", "2")
+    assert registry.exists("a")
+
+    registry.release("a")
+    assert not registry.exists("a")
+
+
+def test_concurrent_reservations_take_the_name_once(tmp_path):
+    registry = NameRegistry(tmp_path)
+    registry.initialize(lambda: [])
+
+    with concurrent.futures.ThreadPoolExecutor(8) as executor:
+        reserved = list(executor.map(lambda uuid: registry.reserve("a", str(uuid)), range(32)))
+
+    assert reserved.count(True) == 1
+
+
+@pytest.mark.parametrize("name", ["..", ".ready", "a/b", "é"])
+def test_names_are_escaped(tmp_path, name):
+    registry = NameRegistry(tmp_path)
+    registry.initialize(lambda: [])
+
+    assert registry.reserve(name, "1")
+    assert registry.exists(name)
+    assert sorted(os.listdir(tmp_path)) == [".names"]
+
+
+def test_initialize_with_duplicate_names(tmp_path):
+    registry = NameRegistry(tmp_path)
+
+    with pytest.warns(UserWarning, match="used by several experiments"):
+        registry.initialize(lambda: [("a", "1"), ("a", "2")])
+
+    assert registry.exists("a")
+    assert sorted(os.listdir(tmp_path)) == [".names"]
+
+    shutil.rmtree(registry.path)
+    registry.initialize(lambda: [])
+    assert not registry.exists("a")
+
+
+def test_name_reserved_on_enter(repository):
+    context = ExperimentContext("model", experiment_name="fixed")
+    registry = NameRegistry(repository.get_model_dir("model"))
+    assert not registry.exists("fixed")
+
+    with context:
+        assert registry.exists("fixed")
+
+    with pytest.raises(ValueError):
+        ExperimentContext("model", experiment_name="fixed")
+
+
+def test_unused_context_takes_no_name(repository):
+    ExperimentContext("model")
+    registry = NameRegistry(repository.get_model_dir("model"))
+
+    assert os.listdir(registry.path) == [NameRegistry.READY_MARKER]
+
+
+def test_registry_created_from_existing_experiments(repository):
+    with ExperimentContext("model", experiment_name="first"):
+        pass
+
+    registry = NameRegistry(repository.get_model_dir("model"))
+    shutil.rmtree(registry.path)
+
+    assert repository.get_name_registry("model").exists("first")
@@ -0,0 +1,99 @@
+import hashlib
+import os
+import stat
+
+import pytest
+
+from amnesis.experiment_context import ExperimentContext
+from amnesis.object_store import ObjectStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ObjectStore(tmp_path / "objects")
+
+
+def test_put_is_content_addressed(store, tmp_path):
+    source = tmp_path / "weights.bin"
+    source.write_bytes(b"weights")
+
+    digest, strategy = store.put(source)
+
+    assert digest == hashlib.sha256(b"weights").hexdigest()
+    assert strategy == "copy"
+    assert store.object_path(digest).read_bytes() == b"weights"
+    assert source.exists()
+
+
+def test_put_stored_content_is_deduplicated(store, tmp_path):
+    first = tmp_path / "first.bin"
+    second = tmp_path / "second.bin"
+    first.write_bytes(b"weights")
+    second.write_bytes(b"weights")
+
+    digest, _ = store.put(first)
+
+    assert store.put(second) == (digest, "dedup")
+    assert len(list(store.path.glob("*/*"))) == 1
+
+
+def test_objects_are_read_only_copies(store, tmp_path):
+    source = tmp_path / "weights.bin"
+    source.write_bytes(b"weights")
+
+    digest, _ = store.put(source, mode="hardlink")
+    path = store.object_path(digest)
+
+    assert not os.path.samefile(source, path)
+    assert stat.S_IMODE(path.stat().st_mode) & 0o222 == 0
+
+    # Editing the source never changes the stored object
+    source.write_bytes(b"edited")
+    assert path.read_bytes() == b"weights"
+
+
+def test_put_move_removes_the_source(store, tmp_path):
+    first = tmp_path / "first.bin"
+    second = tmp_path / "second.bin"
+    first.write_bytes(b"weights")
+    second.write_bytes(b"weights")
+
+    digest, _ = store.put(first, mode="move")
+    assert store.put(second, mode="move") == (digest, "dedup")
+
+    assert not first.exists()
+    assert not second.exists()
+    assert store.contains(digest)
+
+
+def test_link(store, tmp_path):
+    source = tmp_path / "weights.bin"
+    source.write_bytes(b"weights")
+    digest, _ = store.put(source)
+
+    destination = tmp_path / "experiment" / "weights.bin"
+    assert store.link(digest, destination)
+    assert os.path.samefile(destination, store.object_path(digest))
+
+
+def test_deduplicated_artifacts(repository, tmp_path):
+    artifact = tmp_path / "data"
+    artifact.mkdir()
+    (artifact / "a.txt").write_text("same")
+    (artifact / "b.txt").write_text("same")
+    (artifact / "c.txt").write_text("other")
+
+    with ExperimentContext("model") as first:
+        first.log_artifact(artifact, dedup=True)
+    with ExperimentContext("model") as second:
+        second.log_artifact(artifact, dedup=True)
+
+    store = repository.get_object_store()
+    assert len(list(store.path.glob("*/*"))) == 2
+
+    manifest = repository.get_artifact_manifest(second.experiment)
+    assert sorted(manifest) == ["data/a.txt", "data/b.txt", "data/c.txt"]
+    assert manifest["data/a.txt"] == manifest["data/b.txt"]
+
+    assert repository.resolve_artifact(second.experiment, "data/c.txt").read_text() == "other"
+    assert first.experiment.artifacts["data"]["files"] == 3
@@ -0,0 +1,115 @@
+import dataclasses
+
+import pytest
+
+from amnesis.command.pack import pack
+from amnesis.experiment import Experiment
+from amnesis.experiment_context import ExperimentContext
+from amnesis.metadata_codec import JsonCodec, MsgpackCodec
+from amnesis.pack import PackStore, Segment
+
+
+def make_experiment(index):
+    return Experiment(
+        git={},
+        model_name="model",
+        name=f"e{index}",
+        uuid=f"{index:032x}",
+        date="2024-01-01 00:00:00",
+        time=float(index),
+        hyperparameters={"index": index},
+        metrics={},
+    )
+
+
+@pytest.mark.parametrize("codec", [JsonCodec(), MsgpackCodec()])
+def test_segment_round_trip(tmp_path, codec):
+    store = PackStore(tmp_path)
+    experiments = [make_experiment(index) for index in (3, 1, 2)]
+    segment = store.write(experiments, codec)
+
+    assert segment.uuids() == sorted(experiment.uuid for experiment in experiments)
+    assert segment.codec_name() == codec.name
+    assert list(store.iter_experiments()) == experiments
+    assert [e.name for e in store.iter_experiments(exclude={experiments[0].uuid})] == ["e1", "e2"]
+
+
+def test_empty_segments_are_not_written(tmp_path):
+    store = PackStore(tmp_path)
+
+    assert store.write([], JsonCodec()) is None
+    assert store.segments() == []
+
+
+def test_segments_without_index_are_ignored(tmp_path):
+    store = PackStore(tmp_path)
+    segment = store.write([make_experiment(1)], JsonCodec())
+    segment.index_path.unlink()
+
+    assert list(store.iter_experiments()) == []
+
+
+def test_invalid_segment(tmp_path):
+    store = PackStore(tmp_path)
+    segment = store.write([make_experiment(1)], JsonCodec())
+    segment.path.write_bytes(b"garbage" * 10)
+
+    with pytest.raises(ValueError):
+        list(Segment(segment.path).iter_experiments())
+
+
+def test_remove_rewrites_the_segments(tmp_path):
+    store = PackStore(tmp_path)
+    store.write([make_experiment(1), make_experiment(2)], JsonCodec())
+    store.write([make_experiment(3)], MsgpackCodec())
+
+    assert store.remove({make_experiment(2).uuid, "unknown"}) == 1
+    assert sorted(experiment.name for experiment in store.iter_experiments()) == ["e1", "e3"]
+    assert len(store.segments()) == 2
+    assert sorted(segment.codec_name() for segment in store.segments()) == ["json", "msgpack"]
+
+
+@pytest.fixture
+def repository(repository, tmp_path):
+    artifact = tmp_path / "artifact.txt"
+    artifact.write_text("content")
+
+    for index in range(4):
+        with ExperimentContext("model", experiment_name=f"e{index}") as context:
+            context.log_metric("index", index)
+            if index == 0:
+                context.log_artifact(artifact)
+
+    # Experiments still running stay loose
+    running = dataclasses.replace(make_experiment(9), status="running")
+    running.save(repository.get_metadata_path("model", running.uuid))
+
+    return repository
+
+
+def test_pack(repository):
+    model_dir = repository.get_model_dir("model")
+    experiments = {e.name: e for e in repository.iter_experiments(use_catalog=False)}
+
+    assert repository.pack() == 4
+
+    # Only the directories of the running experiment and of the artifact are left
+    experiment_dirs = {path.name for path in model_dir.iterdir()} - {".packs", ".names"}
+    assert experiment_dirs == {experiments["e0"].uuid, experiments["e9"].uuid}
+    assert not (model_dir / experiments["e0"].uuid / "metadata.json").exists()
+
+    unpacked = sorted(repository.iter_experiments(use_catalog=False), key=lambda e: e.name)
+    assert unpacked == sorted(experiments.values(), key=lambda e: e.name)
+    assert repository.resolve_artifact(experiments["e0"], "artifact.txt").read_text() == "content"
+
+    # Packing again only packs the new experiments
+    assert repository.pack() == 0
+    assert repository.reindex() == 5
+
+
+def test_pack_command(repository, capsys):
+    pack(repository, model_name="unknown")
+    assert "Model unknown not found" in capsys.readouterr().out
+
+    pack(repository, model_name="model")
+    assert "Packed 4 experiments" in capsys.readouterr().out
@@ -0,0 +1,77 @@
+import os
+
+import pytest
+
+from amnesis.experiment_context import ExperimentContext
+from amnesis.utils import copy_tree, transfer_tree
+from amnesis.utils.parallel_copy import copy_file
+
+
+@pytest.fixture
+def tree(tmp_path):
+    tree = tmp_path / "tree"
+    for index in range(20):
+        directory = tree / f"part{index % 3}" / "nested"
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"file{index}.bin").write_bytes(os.urandom(1000 + index))
+    (tree / "empty").mkdir()
+    return tree
+
+
+def tree_content(path):
+    return {
+        file.relative_to(path).as_posix(): file.read_bytes()
+        for file in path.rglob("*")
+        if file.is_file()
+    }
+
+
+def tree_size(path):
+    return sum(file.stat().st_size for file in path.rglob("*") if file.is_file())
+
+
+def test_copy_file_in_chunks(tmp_path):
+    source = tmp_path / "large.bin"
+    source.write_bytes(os.urandom(10_000))
+
+    strategy = copy_file(source, tmp_path / "copy.bin", chunk_size=1024)
+
+    assert strategy in ("copy_file_range", "sendfile", "copy")
+    assert (tmp_path / "copy.bin").read_bytes() == source.read_bytes()
+
+
+def test_copy_tree(tree, tmp_path):
+    reports = []
+    report = copy_tree(tree, tmp_path / "copy", workers=4, progress=reports.append)
+
+    assert tree_content(tmp_path / "copy") == tree_content(tree)
+    assert (tmp_path / "copy" / "empty").is_dir()
+    assert report.files == 20
+    assert report.bytes == tree_size(tree)
+    assert len(reports) == 20
+
+
+@pytest.mark.parametrize("mode", ["copy", "move", "hardlink", "symlink", "reflink"])
+def test_transfer_tree_reports_the_tree(tree, tmp_path, mode):
+    content = tree_content(tree)
+    size = tree_size(tree)
+
+    reports = []
+    report = transfer_tree(tree, tmp_path / "destination", mode, progress=reports.append)
+
+    assert tree_content(tmp_path / "destination") == content
+    assert report.files == 20
+    assert report.bytes == size
+    assert reports[-1].files == 20
+    assert tree.exists() == (mode != "move")
+
+
+def test_log_artifact_directory(repository, tree):
+    with ExperimentContext("model") as context:
+        context.log_artifact(tree, mode="move", workers=2)
+
+    report = context.experiment.artifacts["tree"]
+    assert report["strategy"] == "move"
+    assert report["files"] == 20
+    assert report["bytes"] > 0
+    assert len(repository.get_artifacts(context.experiment)) == 20
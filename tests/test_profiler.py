@@ -0,0 +1,147 @@
+import threading
+import time
+import tracemalloc
+
+import pytest
+
+from amnesis.command.profile import profile
+from amnesis.experiment_context import ExperimentContext
+from amnesis.profiler import SAMPLE_SIZE, Profiler, SpanStats
+
+
+def test_nested_and_repeated_spans():
+    profiler = Profiler()
+    with profiler.span("train"):
+        for _ in range(3):
+            with profiler.span("epoch"):
+                time.sleep(0.01)
+    with profiler.span("evaluate"):
+        pass
+
+    summary = profiler.summary()
+
+    assert list(summary) == ["train", "train/epoch", "evaluate"]
+    assert summary["train/epoch"]["count"] == 3
+    assert summary["train/epoch"]["wall"] >= 0.03
+    assert summary["train"]["wall"] >= summary["train/epoch"]["wall"]
+    assert summary["train/epoch"]["p50"] <= summary["train/epoch"]["p99"]
+    assert "memory_peak" not in summary["train"]
+
+
+def test_spans_of_threads_are_not_nested():
+    profiler = Profiler()
+
+    def work():
+        with profiler.span("work"):
+            pass
+
+    with profiler.span("main"):
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+
+    assert sorted(profiler.summary()) == ["main", "work"]
+
+
+def test_spans_of_exceptions_are_recorded():
+    profiler = Profiler()
+
+    with pytest.raises(RuntimeError):
+        with profiler.span("failing"):
+            raise RuntimeError()
+
+    assert profiler.summary()["failing"]["count"] == 1
+
+
+def test_timed():
+    profiler = Profiler()
+
+    @profiler.timed
+    def step(value):
+        return value * 2
+
+    @profiler.timed(name="named")
+    def other():
+        return None
+
+    assert step(2) == 4
+    other()
+
+    assert profiler.summary()[step.__qualname__]["count"] == 1
+    assert profiler.summary()["named"]["count"] == 1
+
+
+def test_percentiles_of_a_bounded_sample():
+    stats = SpanStats()
+    for value in range(1, 3 * SAMPLE_SIZE + 1):
+        stats.add(float(value), 0.0)
+
+    assert stats.count == 3 * SAMPLE_SIZE
+    assert len(stats.samples) == SAMPLE_SIZE
+    assert stats.percentile(50) == pytest.approx(1.5 * SAMPLE_SIZE, rel=0.2)
+
+    exact = SpanStats()
+    for value in range(1, 101):
+        exact.add(float(value), 0.0)
+    assert exact.percentile(50) == 50.0
+    assert exact.percentile(99) == 99.0
+    assert SpanStats().percentile(50) is None
+
+
+def test_tracemalloc_memory():
+    was_tracing = tracemalloc.is_tracing()
+    profiler = Profiler(memory="tracemalloc")
+    with profiler.span("outer"):
+        with profiler.span("allocate"):
+            data = bytearray(10 * 1024 * 1024)
+            del data
+        with profiler.span("small"):
+            pass
+    profiler.close()
+
+    summary = profiler.summary()
+    assert summary["outer/allocate"]["memory_peak"] >= 10 * 1024 * 1024
+    assert summary["outer/small"]["memory_peak"] < 1024 * 1024
+    # The peak of a child is the peak of its parent
+    assert summary["outer"]["memory_peak"] >= summary["outer/allocate"]["memory_peak"]
+    assert tracemalloc.is_tracing() == was_tracing
+
+
+def test_rss_memory():
+    profiler = Profiler(memory="rss")
+    with profiler.span("allocate"):
+        data = bytearray(64 * 1024 * 1024)
+        data[::4096] = b"x" * len(data[::4096])
+
+    assert profiler.summary()["allocate"]["rss_peak"] >= 32 * 1024 * 1024
+    del data
+
+
+def test_unknown_memory_mode():
+    with pytest.raises(ValueError):
+        Profiler(memory="gpu")
+
+
+def test_experiments_record_their_profile(repository, capsys):
+    context = ExperimentContext("model", experiment_name="profiled", profile_memory="tracemalloc")
+    with context as ctx:
+        with ctx.span("train"):
+            with ctx.span("epoch"):
+                pass
+    with ExperimentContext("model", experiment_name="empty"):
+        pass
+
+    experiment = repository.get_experiment("model", "profiled")
+    assert list(experiment.profile) == ["train", "train/epoch"]
+
+    profile(repository, "model", "profiled")
+    lines = capsys.readouterr().out.splitlines()
+    assert [cell.strip() for cell in lines[0].split("|")][0] == "span"
+    assert "memory_peak" in lines[0]
+    assert [line.split("|")[0].rstrip() for line in lines[2:]] == ["train", "  epoch"]
+
+    profile(repository, "model", "empty")
+    assert "No spans recorded" in capsys.readouterr().out
+
+    profile(repository, "model", "unknown")
+    assert "Experiment unknown not found" in capsys.readouterr().out
@@ -0,0 +1,101 @@
+import pytest
+
+from amnesis.experiment_context import ExperimentContext
+from amnesis.query import QueryError, parse_query
+
+# Hyperparameters and metrics of each experiment, with values of every JSON type
+EXPERIMENTS = {
+    "a": (
+        {"lr": 0.1, "tags": ["x", "y"], "optimizer": "adam", "layers": {"k": 1}},
+        {"accuracy": 0.95},
+    ),
+    "b": ({"lr": 0.2, "tags": ["y"], "optimizer": "sgd", "flag": True}, {"accuracy": 0.9}),
+    "c": ({"lr": "0.1", "tags": [1, 2], "optimizer": "adamw"}, {"accuracy": float("nan")}),
+    "d": ({"lr": 1, "tags": "x,y"}, {"accuracy": "0.95"}),
+}
+
+QUERIES = [
+    "metrics.accuracy == 0.95",
+    "metrics.accuracy != 0.95",
+    "metrics.accuracy > 0.5",
+    "not metrics.accuracy < 0.92",
+    "'a' in name",
+    "name in ('a', 'b')",
+    "'x' in hyperparameters.tags",
+    "'x' not in hyperparameters.tags",
+    "1 in hyperparameters.tags",
+    "True in hyperparameters.tags",
+    "'adam' in hyperparameters.optimizer",
+    "'k' in hyperparameters.layers",
+    "'k' not in hyperparameters.layers",
+    "hyperparameters.lr in (0.1, 1)",
+    "hyperparameters.lr not in (0.1, 1)",
+    "hyperparameters.lr < metrics.accuracy",
+    "hyperparameters.tags == 'x,y'",
+    "hyperparameters.flag == 1",
+    "hyperparameters.flag == True",
+    "'y' in hyperparameters.tags and hyperparameters.lr >= 0.2",
+]
+
+
+def names(experiments):
+    return {experiment.name for experiment in experiments}
+
+
+@pytest.fixture
+def repository(repository):
+    for name, (hyperparameters, metrics) in EXPERIMENTS.items():
+        with ExperimentContext("model", experiment_name=name) as context:
+            for key, value in hyperparameters.items():
+                context.log_hyperparameter(key, value)
+            for key, value in metrics.items():
+                context.log_metric(key, value)
+
+    assert repository.get_catalog().exists()
+    return repository
+
+
+@pytest.mark.parametrize("where", QUERIES)
+def test_catalog_and_scan_agree(repository, where):
+    query = parse_query(where)
+    catalog = repository.iter_experiments("model", where=query)
+    scan = repository.iter_experiments("model", where=query, use_catalog=False)
+
+    assert names(catalog) == names(scan)
+
+
+def test_membership_in_list_and_text(repository):
+    query = parse_query("'x' in hyperparameters.tags")
+    experiments = repository.iter_experiments("model", where=query)
+
+    # A list contains the element, a text contains the substring
+    assert names(experiments) == {"a", "d"}
+
+
+@pytest.mark.parametrize("where", ["(1, 2) in hyperparameters.tags", "'a' in 'abc'"])
+def test_invalid_membership(where):
+    with pytest.raises(QueryError):
+        parse_query(where)
+
+
+@pytest.mark.parametrize(
+    "where",
+    [
+        "metrics.accuracy >",
+        "metrics.accuracy + 1 > 0",
+        "__import__('os').system('true')",
+        "metrics",
+        "unknown == 1",
+        "metrics[0] == 1",
+    ],
+)
+def test_invalid_expressions(where):
+    with pytest.raises(QueryError):
+        parse_query(where)
+
+
+def test_query_keys_and_chains(repository):
+    query = parse_query("0.5 < metrics['accuracy'] <= 0.95 and model == 'model'")
+    experiments = repository.iter_experiments("model", where=query)
+
+    assert names(experiments) == {"a", "b"}
@@ -0,0 +1,121 @@
+import functools
+
+import numpy as np
+import pytest
+
+from amnesis.remember import remember
+
+
+class AddOne:
+    def __call__(self, ctx, x):
+        return x + 1
+
+
+def add(ctx, x, y):
+    return x + y
+
+
+def test_each_call_is_an_experiment(repository):
+    calls = []
+
+    @remember("model", log={"hyperparams": ["x"], "metrics": ["y"]})
+    def run(ctx, x):
+        calls.append(x)
+        y = x * 2
+        return y
+
+    assert [run(1), run(2), run(3)] == [2, 4, 6]
+
+    experiments = repository.get_experiments("model")
+    assert len(experiments) == 3
+    assert len({experiment.name for experiment in experiments}) == 3
+    assert sorted(experiment.metrics["y"] for experiment in experiments) == [2, 4, 6]
+    assert sorted(experiment.hyperparameters["x"] for experiment in experiments) == [1, 2, 3]
+
+
+def test_named_experiment_runs_once(repository):
+    @remember("model", experiment_name="baseline")
+    def run(ctx):
+        return 1
+
+    assert run() == 1
+    with pytest.raises(ValueError):
+        run()
+
+
+def test_repeated_calls_hit_the_cache(repository):
+    calls = []
+
+    @remember("model", cache=True)
+    def run(ctx, x):
+        calls.append(x)
+        return x * 2
+
+    assert [run(1), run(2), run(1), run(2)] == [2, 4, 2, 4]
+    assert calls == [1, 2]
+
+    experiments = repository.get_experiments("model")
+    hits = [experiment for experiment in experiments if experiment.cache["hit"]]
+    computed = {experiment.uuid for experiment in experiments if not experiment.cache["hit"]}
+    assert len(experiments) == 4
+    assert {experiment.cache["hit"] for experiment in hits} == computed
+
+
+def test_refresh_recomputes(repository):
+    calls = []
+
+    def run(ctx, x):
+        calls.append(x)
+        return x
+
+    remember("model", cache=True)(run)(1)
+    remember("model", cache="refresh")(run)(1)
+    remember("model", cache=True)(run)(1)
+
+    assert calls == [1, 1]
+
+
+@pytest.mark.parametrize("cache", [False, True])
+def test_callable_object(repository, cache):
+    assert remember("model", cache=cache)(AddOne())(1) == 2
+
+
+@pytest.mark.parametrize("cache", [False, True])
+def test_partial(repository, cache):
+    assert remember("model", cache=cache)(functools.partial(add, y=2))(1) == 3
+
+
+def test_partial_arguments_are_fingerprinted(repository):
+    assert remember("model", cache=True)(functools.partial(add, y=2))(1) == 3
+    assert remember("model", cache=True)(functools.partial(add, y=3))(1) == 4
+
+
+def test_cache_hit_on_array_content(repository):
+    calls = []
+
+    @remember("model", cache=True)
+    def total(ctx, array):
+        calls.append(array)
+        return float(array.sum())
+
+    array = np.zeros(5000)
+    changed = array.copy()
+    changed[2500] = 1
+
+    assert [total(array), total(changed), total(array.copy())] == [0.0, 1.0, 0.0]
+    assert len(calls) == 2
+
+
+def test_unhashable_input_is_not_cached(repository):
+    calls = []
+
+    @remember("model", cache=True)
+    def run(ctx, value):
+        calls.append(value)
+        return 1
+
+    with pytest.warns(UserWarning, match="not cached"):
+        assert run(object()) == 1
+        assert run(object()) == 1
+
+    assert len(calls) == 2
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from amnesis.serializers import (
+    ArrayDictSerializer,
+    NumpySerializer,
+    PickleSerializer,
+    get_serializer,
+)
+
+
+@pytest.mark.parametrize("mmap", [False, True])
+def test_numpy(tmp_path, mmap):
+    serializer = NumpySerializer()
+    array = np.random.default_rng(0).normal(size=(4, 5))
+    serializer.save(array, tmp_path / "model")
+
+    path = tmp_path / "model"
+    loaded = serializer.load_mmap(path) if mmap else serializer.load(path)
+
+    np.testing.assert_array_equal(loaded, array)
+    assert isinstance(loaded, np.memmap) == mmap
+
+
+@pytest.mark.parametrize("mmap", [False, True])
+def test_array_dict(tmp_path, mmap):
+    serializer = ArrayDictSerializer()
+    model = {"layer/weights": np.ones((2, 3)), "bias": np.arange(3)}
+    serializer.save(model, tmp_path / "model")
+
+    path = tmp_path / "model"
+    loaded = serializer.load_mmap(path) if mmap else serializer.load(path)
+
+    assert sorted(loaded) == ["bias", "layer/weights"]
+    for key, array in model.items():
+        np.testing.assert_array_equal(loaded[key], array)
+
+
+@pytest.mark.parametrize("mmap", [False, True])
+def test_pickle_out_of_band_buffers(tmp_path, mmap):
+    serializer = PickleSerializer()
+    model = {
+        "weights": np.arange(1000, dtype=np.float64),
+        "strided": np.arange(20)[::2],
+        "empty": np.zeros(0),
+        "name": "model",
+    }
+    serializer.save(model, tmp_path / "model")
+
+    # Contiguous arrays are written next to the pickle stream
+    assert (tmp_path / "model" / "buffer-0.bin").stat().st_size == 8000
+
+    path = tmp_path / "model"
+    loaded = serializer.load_mmap(path) if mmap else serializer.load(path)
+
+    assert loaded["name"] == "model"
+    for key in ("weights", "strided", "empty"):
+        np.testing.assert_array_equal(loaded[key], model[key])
+
+    # Buffers are writable, memory-mapped ones are copy-on-write
+    loaded["weights"][0] = -1
+    assert serializer.load(path)["weights"][0] == 0
+
+
+def test_get_serializer():
+    serializer = PickleSerializer()
+
+    assert get_serializer(serializer) is serializer
+    assert isinstance(get_serializer("numpy"), NumpySerializer)
+    with pytest.raises(ValueError):
+        get_serializer("unknown")
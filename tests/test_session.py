@@ -0,0 +1,105 @@
+import pytest
+
+from amnesis.experiment_context import ExperimentContext
+from amnesis.repository import Repository
+from amnesis.session import RepositorySession, get_session
+
+
+def run(name, model_name="model"):
+    with ExperimentContext(model_name, experiment_name=name):
+        pass
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    # Number of times the experiments of a model are listed from the repository
+    loads = []
+    list_experiments = Repository._list_experiments
+
+    def counting(self, model_name):
+        loads.append(model_name)
+        return list_experiments(self, model_name)
+
+    monkeypatch.setattr(Repository, "_list_experiments", counting)
+    return loads
+
+
+def names(experiments):
+    return sorted(experiment.name for experiment in experiments)
+
+
+def test_sessions_are_shared(repository, tmp_path):
+    (tmp_path / "sub").mkdir()
+    session = get_session()
+
+    assert get_session(tmp_path / "sub") is session
+    assert session.repository.root == tmp_path
+    assert session.repository.session is session
+
+
+def test_outside_of_a_repository(tmp_path):
+    session = get_session(tmp_path)
+
+    assert session.repository.root is None
+    assert get_session(tmp_path) is not session
+
+
+def test_listings_are_cached(repository, loads):
+    run("e0")
+    repository = get_session().repository
+    loads.clear()
+
+    assert names(repository.get_experiments("model")) == ["e0"]
+    assert names(repository.get_experiments("model")) == ["e0"]
+    assert loads == ["model"]
+    assert [model.name for model in repository.get_models()] == ["model"]
+
+
+def test_saved_experiments_invalidate_the_listings(repository, loads):
+    run("e0")
+    repository = get_session().repository
+    repository.get_experiments("model")
+
+    run("e1")
+    run("e0", model_name="other")
+
+    assert names(repository.get_experiments("model")) == ["e0", "e1"]
+    assert sorted(model.name for model in repository.get_models()) == ["model", "other"]
+
+
+def test_changes_of_other_processes_are_polled(repository, loads):
+    run("e0")
+    session_repository = Repository()
+    session_repository.root = repository.root
+    session = RepositorySession(session_repository, poll_interval=0)
+    session_repository.get_experiments("model")
+
+    # The contexts save through the shared session, which stands for another process
+    loads.clear()
+    run("e1")
+
+    assert names(session_repository.get_experiments("model")) == ["e0", "e1"]
+    assert loads == ["model"]
+    assert session.get_experiments("unknown") is None
+
+
+def test_without_a_catalog_nothing_is_cached(repository, loads):
+    run("e0")
+    repository.get_catalog().path.unlink()
+    session = get_session()
+    loads.clear()
+
+    session.get_experiments("model")
+    session.get_experiments("model")
+
+    assert loads == ["model", "model"]
+
+
+def test_model_directories_are_created_once(repository):
+    session = get_session()
+    model_dir = session.create_model_dir("model")
+
+    assert model_dir.is_dir()
+    model_dir.rmdir()
+    assert session.create_model_dir("model").is_dir()
+    assert session.get_name_registry("model") is session.get_name_registry("model")
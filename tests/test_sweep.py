@@ -0,0 +1,96 @@
+import os
+import sys
+
+import pytest
+
+from amnesis.name_registry import NameRegistry
+from amnesis.remember import _run_sweep_experiment, remember
+from amnesis.sweep import GridSampler, RandomSampler, SweepSummary, as_sampler, default_workers
+
+
+def train(ctx, lr, epochs):
+    ctx.log_metric("score", lr * epochs)
+    return lr * epochs
+
+
+def test_grid_sampler():
+    sampler = GridSampler({"lr": [0.1, 0.2], "epochs": (1, 2, 3)})
+
+    assert len(sampler) == 6
+    assert list(sampler)[:2] == [{"lr": 0.1, "epochs": 1}, {"lr": 0.1, "epochs": 2}]
+    assert isinstance(as_sampler({"lr": [0.1]}), GridSampler)
+
+
+def test_random_sampler():
+    space = {"lr": [0.1, 0.2], "seed": lambda generator: generator.randrange(100), "fixed": 1}
+    runs = list(RandomSampler(space, n_samples=5, seed=0))
+
+    assert runs == list(RandomSampler(space, n_samples=5, seed=0))
+    assert len(runs) == 5
+    assert all(run["lr"] in (0.1, 0.2) and run["fixed"] == 1 for run in runs)
+
+
+def test_default_workers():
+    assert default_workers(1) == 1
+    assert default_workers(100, n_workers=0) == 1
+    assert default_workers(100) == min(100, os.cpu_count() or 1)
+
+
+def test_summary_namespaces_clashing_columns():
+    summary = SweepSummary(
+        [
+            {
+                "experiment": "a",
+                "status": "finished",
+                "error": None,
+                "hyperparameters": {"lr": 0.1, "score": 1, "status": "x"},
+                "metrics": {"score": 0.5, "accuracy": 0.9},
+            }
+        ]
+    )
+    header = str(summary).splitlines()[0].split(" | ")
+
+    assert [name.strip() for name in header] == [
+        "experiment",
+        "status",
+        "lr",
+        "hyperparameters.score",
+        "hyperparameters.status",
+        "accuracy",
+        "metrics.score",
+    ]
+    assert "finished" in str(summary)
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="the workers are forked")
+def test_sweep_takes_a_name_per_experiment(repository, monkeypatch):
+    # The workers find the decorated function by reference in this module
+    decorated = remember("sweep")(train)
+    monkeypatch.setattr(sys.modules[__name__], "train", decorated)
+
+    grid = {"lr": [0.1, 0.2], "epochs": [1, 2]}
+    summary = decorated.sweep(grid, n_workers=2, start_method="fork")
+
+    registry = NameRegistry(repository.get_model_dir("sweep"))
+    names = sorted(set(os.listdir(registry.path)) - {NameRegistry.READY_MARKER})
+    experiments = repository.get_experiments("sweep")
+
+    assert [row["status"] for row in summary] == ["finished"] * 4
+    assert [row["metrics"]["score"] for row in summary] == [0.1, 0.2, 0.2, 0.4]
+    assert names == sorted(experiment.name for experiment in experiments)
+    assert len(experiments) == 4
+    assert all(experiment.hyperparameters.keys() == grid.keys() for experiment in experiments)
+
+
+def test_sweep_run_with_invalid_options_fails_alone(repository):
+    options = {"model_name": "sweep", "capture_mode": "unknown"}
+    row = _run_sweep_experiment(train, options, {"lr": 1})
+
+    assert row["status"] == "failed"
+    assert row["experiment"] is None
+    assert "capture mode" in row["error"]
+
+
+def test_sweep_requires_a_decorated_function(repository):
+    with pytest.raises(RuntimeError):
+        remember("sweep").sweep({"lr": [0.1]})
@@ -0,0 +1,93 @@
+import pytest
+
+from amnesis.utils.table import Column, Table, display_names, parse_sort_keys
+
+
+def test_column_kinds():
+    assert Column("a", [1, None, 3]).kind == "int"
+    assert Column("a", [1, 2.5]).kind == "float"
+    assert Column("a", [1, "x"]).kind == "str"
+    assert Column("a", [True, False]).kind == "str"
+    assert Column("a", [2**70]).kind == "str"
+
+
+def test_missing_values():
+    column = Column("a", [1.0, None, float("nan")])
+
+    assert list(column.missing) == [0, 1, 1]
+    assert column.render() == ["1.0", "", ""]
+
+
+def test_from_rows():
+    table = Table.from_rows([{"a": 1}, {"b": "x"}, {"a": 3, "b": "y"}])
+
+    assert table.names == ["a", "b"]
+    assert len(table) == 3
+    assert table["a"].render() == ["1", "", "3"]
+    assert table["b"].render() == ["", "x", "y"]
+
+
+def test_sort_is_stable_with_missing_values_last():
+    table = Table.from_rows(
+        [
+            {"name": "a", "score": 2, "group": "x"},
+            {"name": "b", "score": None, "group": "x"},
+            {"name": "c", "score": 1, "group": "y"},
+            {"name": "d", "score": 2, "group": "y"},
+        ]
+    )
+
+    assert table.sort([("score", False)])["name"].render() == ["c", "a", "d", "b"]
+    assert table.sort([("score", True)])["name"].render() == ["a", "d", "c", "b"]
+    assert table.sort([("group", True), ("score", False)])["name"].render() == [
+        "c",
+        "d",
+        "a",
+        "b",
+    ]
+
+
+def test_rename_keeps_the_original():
+    table = Table.from_rows([{"a": 1}])
+    renamed = table.rename({"a": "b"})
+
+    assert renamed.names == ["b"]
+    assert table.names == ["a"]
+
+
+def test_str():
+    table = Table.from_rows([{"name": "a", "score": 10}, {"name": "bb"}])
+
+    assert str(table).splitlines() == [
+        "name | score",
+        "-----+------",
+        "a    | 10   ",
+        "bb   |      ",
+    ]
+
+
+@pytest.mark.parametrize(
+    "sort, keys",
+    [
+        ("accuracy", [("accuracy", False)]),
+        ("-accuracy, lr", [("accuracy", True), ("lr", False)]),
+        ("a,,b", [("a", False), ("b", False)]),
+    ],
+)
+def test_parse_sort_keys(sort, keys):
+    assert parse_sort_keys(sort) == keys
+
+
+def test_display_names():
+    names = display_names(
+        {"hyperparameters": ["lr", "score", "name"], "metrics": ["score", "accuracy"]},
+        reserved=["name"],
+    )
+
+    assert names == {
+        "hyperparameters.lr": "lr",
+        "hyperparameters.name": "hyperparameters.name",
+        "hyperparameters.score": "hyperparameters.score",
+        "metrics.accuracy": "accuracy",
+        "metrics.score": "metrics.score",
+    }
@@ -0,0 +1,64 @@
+import pytest
+
+from amnesis.command.best import best
+from amnesis.experiment_context import ExperimentContext
+
+LOSSES = {"a": 0.5, "b": 0.1, "c": 0.9, "d": 0.3, "e": "diverged", "f": None}
+
+
+@pytest.fixture(params=["catalog", "metadata"])
+def repository(request, repository):
+    if request.param == "metadata":
+        repository.get_catalog().path.unlink()
+
+    for index, (name, loss) in enumerate(LOSSES.items()):
+        with ExperimentContext(f"model{index % 2}", experiment_name=name) as context:
+            context.log_hyperparameter("index", index)
+            if loss is not None:
+                context.log_metric("loss", loss)
+
+    return repository
+
+
+def names(experiments):
+    return [experiment.name for experiment in experiments]
+
+
+def test_minimize(repository):
+    assert names(repository.top_k("loss", k=3)) == ["b", "d", "a"]
+
+
+def test_maximize(repository):
+    assert names(repository.top_k("loss", k=2, maximize=True)) == ["c", "a"]
+
+
+def test_non_numeric_and_missing_values_are_ignored(repository):
+    assert names(repository.top_k("loss", k=10)) == ["b", "d", "a", "c"]
+    assert repository.top_k("unknown") == []
+    assert repository.top_k("loss", k=0) == []
+
+
+def test_models_and_where(repository):
+    assert names(repository.top_k("loss", models="model0")) == ["a", "c"]
+    assert names(repository.top_k("loss", models=["model1"])) == ["b", "d"]
+    assert names(repository.top_k("loss", where="hyperparameters.index >= 2")) == ["d", "c"]
+
+
+def test_best(repository, capsys):
+    best(repository, "loss", k=2)
+
+    lines = capsys.readouterr().out.splitlines()
+    rows = [[cell.strip() for cell in line.split(" | ")] for line in lines]
+    assert rows[0] == ["rank", "model", "experiment", "loss", "date"]
+    assert [row[:4] for row in rows[2:]] == [
+        ["1", "model1", "b", "0.1"],
+        ["2", "model1", "d", "0.3"],
+    ]
+
+
+def test_best_errors(repository, capsys):
+    best(repository, "loss", model_name="unknown")
+    assert "Model unknown not found" in capsys.readouterr().out
+
+    best(repository, "loss", where="metrics.loss >")
+    assert "Invalid expression" in capsys.readouterr().out
@@ -0,0 +1,117 @@
+import threading
+
+import pytest
+
+from amnesis.experiment import Experiment
+from amnesis.experiment_context import ExperimentContext
+from amnesis.metric_series import MetricSeries, read_series
+from amnesis.writer import BackgroundWriter
+
+
+def test_jobs_are_written_in_order():
+    written = []
+    writer = BackgroundWriter(lambda: None).start()
+    for index in range(10):
+        assert writer.submit(lambda index=index: written.append(index))
+    writer.close()
+
+    assert written == list(range(10))
+
+
+def test_checkpoints_are_coalesced():
+    checkpoints = []
+    writer = BackgroundWriter(lambda: checkpoints.append(1), interval=0.0).start()
+    release = threading.Event()
+    writer.submit(release.wait)
+
+    for _ in range(100):
+        writer.mark_dirty()
+    release.set()
+    writer.close()
+
+    assert len(checkpoints) <= 1
+
+
+def test_submit_never_blocks():
+    release = threading.Event()
+    writer = BackgroundWriter(lambda: None, max_pending=1).start()
+    writer.submit(release.wait)
+
+    results = [writer.submit(lambda: None) for _ in range(3)]
+    release.set()
+    writer.close()
+
+    assert results.count(False) >= 2
+
+
+def test_close_raises_the_first_error():
+    def fail():
+        raise OSError("No space left on device")
+
+    writer = BackgroundWriter(lambda: None).start()
+    writer.submit(fail)
+
+    with pytest.raises(OSError):
+        writer.close()
+
+
+def test_refused_points_are_kept(tmp_path):
+    release = threading.Event()
+    writer = BackgroundWriter(lambda: None, max_pending=1).start()
+    writer.submit(release.wait)
+
+    series = MetricSeries(tmp_path / "x.bin", buffer_size=10, writer=writer)
+    for step in range(1000):
+        series.append(float(step), step=step)
+
+    release.set()
+    series.flush()
+    writer.close()
+    series.writer = None
+    series.flush()
+
+    assert read_series(tmp_path / "x.bin")["step"].tolist() == list(range(1000))
+
+
+def test_failed_checkpoint_still_saves_metadata(repository, monkeypatch):
+    context = ExperimentContext("model", asynchronous=True, checkpoint_interval=0.0)
+    failed = threading.Event()
+
+    def write_checkpoint():
+        failed.set()
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(context, "_write_checkpoint", write_checkpoint)
+
+    with pytest.warns(UserWarning, match="Background write"):
+        with context:
+            context.log_metric("accuracy", 0.5)
+            context.checkpoint()
+            assert failed.wait(5)
+
+    experiment = Experiment.load(context.metadata_path)
+    assert experiment.status == "finished"
+    assert experiment.metrics == {"accuracy": 0.5}
+
+
+@pytest.mark.parametrize("asynchronous", [False, True])
+def test_checkpoint_of_a_running_experiment(repository, monkeypatch, asynchronous):
+    context = ExperimentContext("model", asynchronous=asynchronous, checkpoint_interval=0.0)
+    written = threading.Event()
+    write_checkpoint = context._write_checkpoint
+
+    def checkpoint():
+        write_checkpoint()
+        written.set()
+
+    monkeypatch.setattr(context, "_write_checkpoint", checkpoint)
+
+    with context:
+        context.log_metric("accuracy", 0.5)
+        context.checkpoint()
+        assert written.wait(5)
+        running = Experiment.load(context.metadata_path)
+
+    assert running.status == "running"
+    assert running.metrics == {"accuracy": 0.5}
+    assert Experiment.load(context.metadata_path).status == "finished"